@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Headless batch lead generation: runs the search pipeline in-process, no HTTP.
+
+Reads searches from CSV (header row) or JSONL with a business_type and a
+location per row; radius, lat, lon, target_leads, min_quality_score and
+max_radius are optional. Leads go to MongoDB as with the API, to a file, or both:
+
+    python backend/cli.py run searches.csv --concurrency 8 --overpass-rps 2
+    python backend/cli.py run searches.jsonl --no-mongo --out leads.jsonl
+    python backend/cli.py status searches.csv
+
+Every finished search is appended to a checkpoint file (searches.csv.checkpoint.jsonl
+by default), and a rerun skips the searches already in it, so an interrupted job
+resumes where it stopped. Leads are written before their search is checkpointed,
+so after a crash the last few searches may appear twice in --out.
+"""
+import asyncio
+import csv
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import typer
+from pydantic import ValidationError
+
+import server
+
+app = typer.Typer(add_completion=False, help="Batch lead generation without the HTTP API")
+
+SEARCH_FIELDS = ("business_type", "location", "radius", "lat", "lon", "target_leads", "min_quality_score", "max_radius")
+OUTPUT_CSV_FIELDS = (
+    "search_business_type", "search_location", "id", "name", "business_type", "address", "phone", "website",
+    "email", "lat", "lon", "quality_score", "lead_status", "last_updated",
+)
+
+
+def read_searches(path: Path, default_radius: float) -> List[server.BusinessSearch]:
+    """Parse the input file; fails on the first invalid row so a job never half-runs a bad list"""
+    if path.suffix.lower() == ".jsonl":
+        with path.open() as f:
+            rows = [(number, json.loads(line)) for number, line in enumerate(f, 1) if line.strip()]
+    else:
+        with path.open(newline="") as f:
+            rows = list(enumerate(csv.DictReader(f), 2))
+    searches = []
+    for number, row in rows:
+        fields = {key: value for key, value in row.items() if key in SEARCH_FIELDS and value not in (None, "")}
+        if "type" in row and "business_type" not in fields:
+            fields["business_type"] = row["type"]
+        fields.setdefault("radius", default_radius)
+        try:
+            searches.append(server.BusinessSearch(**fields))
+        except ValidationError as e:
+            raise typer.BadParameter(f"line {number}: {e.errors()[0]['loc'][0]}: {e.errors()[0]['msg']}")
+    return searches
+
+
+def read_checkpoint(path: Path, retry_incomplete: bool) -> Dict[str, Dict]:
+    """Searches already finished by earlier runs, by search key"""
+    done: Dict[str, Dict] = {}
+    if not path.exists():
+        return done
+    with path.open() as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by a crash
+            if entry.get("error") or (retry_incomplete and not entry.get("complete")):
+                done.pop(entry["key"], None)
+            else:
+                done[entry["key"]] = entry
+    return done
+
+
+class LeadFileWriter:
+    """Appends leads to a .jsonl or .csv file, continuing the file on resume"""
+
+    def __init__(self, path: Path):
+        self.csv = path.suffix.lower() == ".csv"
+        new = not path.exists() or path.stat().st_size == 0
+        self.file = path.open("a", newline="" if self.csv else None)
+        if self.csv:
+            self.writer = csv.DictWriter(self.file, OUTPUT_CSV_FIELDS, extrasaction="ignore")
+            if new:
+                self.writer.writeheader()
+
+    def write(self, search: server.BusinessSearch, businesses: List[Dict]) -> None:
+        for business in businesses:
+            row = {**business, "search_business_type": search.business_type, "search_location": search.location}
+            if self.csv:
+                self.writer.writerow(row)
+            else:
+                self.file.write(json.dumps(row, default=server.json_default) + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+async def run_searches(searches: List[server.BusinessSearch], concurrency: int, deadline: float, mongo: bool,
+                       writer: Optional[LeadFileWriter], checkpoint: Path,
+                       limiter: Optional[server.UpstreamLimiter] = None) -> Dict[str, int]:
+    queue: asyncio.Queue = asyncio.Queue()
+    for search in searches:
+        queue.put_nowait(search)
+    totals = {"searches": 0, "leads": 0, "incomplete": 0, "failed": 0}
+    started = time.perf_counter()
+
+    with checkpoint.open("a") as log:
+        async def worker():
+            while not queue.empty():
+                search = queue.get_nowait()
+                key = server.search_snapshot_key(search)
+                server.current_deadline.set(server.Deadline(deadline) if deadline > 0 else None)
+                search_started = time.perf_counter()
+                entry = {"key": key, "business_type": search.business_type, "location": search.location}
+                try:
+                    # Mongo runs also refresh the API's snapshots, so the next interactive repeat is instant
+                    result = await server.run_business_search(search, None, key if mongo else None, persist=mongo,
+                                                              limiter=limiter)
+                    if writer:
+                        writer.write(search, result["businesses"])
+                    entry.update(leads=len(result["businesses"]), complete=result["complete"])
+                    totals["leads"] += len(result["businesses"])
+                    totals["incomplete"] += not result["complete"]
+                except Exception as e:
+                    detail = e.detail if isinstance(e, server.HTTPException) else str(e)
+                    entry.update(error=detail)
+                    totals["failed"] += 1
+                entry.update(seconds=round(time.perf_counter() - search_started, 3),
+                             finished_at=datetime.now().isoformat())
+                log.write(json.dumps(entry) + "\n")
+                log.flush()
+                totals["searches"] += 1
+                status = f"error: {entry['error']}" if "error" in entry else \
+                    f"{entry['leads']} leads" + ("" if entry["complete"] else " (incomplete)")
+                typer.echo(f"[{totals['searches']}/{len(searches)}] {search.business_type} in {search.location}: "
+                           f"{status} in {entry['seconds']:.1f}s")
+
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(searches)))))
+    await server.close_upstream_client()
+    totals["seconds"] = round(time.perf_counter() - started, 1)
+    return totals
+
+
+@app.command()
+def run(
+    input_file: Path = typer.Argument(..., exists=True, dir_okay=False, help="CSV or JSONL list of searches"),
+    concurrency: int = typer.Option(4, "--concurrency", "-c", min=1, help="Searches run at once"),
+    geocode_rps: float = typer.Option(1.0, help="Nominatim requests per second (0 for no limit)"),
+    overpass_rps: float = typer.Option(1.0, help="Overpass queries per second (0 for no limit)"),
+    company_rps: float = typer.Option(5.0, help="OpenCorporates lookups per second (0 for no limit)"),
+    radius: float = typer.Option(5.0, help="Radius in km for rows that don't set one"),
+    deadline: float = typer.Option(0.0, help="Seconds per search before partial results are kept (0 for none)"),
+    mongo: bool = typer.Option(True, "--mongo/--no-mongo", help="Store leads in MongoDB like the API does"),
+    out: Optional[Path] = typer.Option(None, help="Also write leads to this .jsonl or .csv file"),
+    checkpoint: Optional[Path] = typer.Option(None, help="Progress file (default: <input>.checkpoint.jsonl)"),
+    retry_incomplete: bool = typer.Option(True, help="Rerun searches that finished incomplete"),
+    limit: Optional[int] = typer.Option(None, min=1, help="Run at most this many pending searches"),
+    verbose: bool = typer.Option(False, "--verbose", "-v", help="Show the server's log output"),
+):
+    """Run every search in INPUT_FILE that the checkpoint doesn't list as done"""
+    if not mongo and out is None:
+        raise typer.BadParameter("nothing would be kept: pass --out or leave --mongo on")
+    if out is not None and out.suffix.lower() not in (".jsonl", ".csv"):
+        raise typer.BadParameter("--out must end in .jsonl or .csv")
+    if not verbose:
+        server.logger.setLevel("WARNING")
+    checkpoint = checkpoint or input_file.with_name(input_file.name + ".checkpoint.jsonl")
+
+    searches = read_searches(input_file, radius)
+    done = read_checkpoint(checkpoint, retry_incomplete)
+    pending, seen = [], set(done)
+    for search in searches:
+        key = server.search_snapshot_key(search)
+        if key not in seen:
+            seen.add(key)
+            pending.append(search)
+    if limit:
+        pending = pending[:limit]
+    typer.echo(f"{len(searches)} searches, {len(done)} already done, running {len(pending)}")
+    if not pending:
+        return
+
+    if mongo:
+        server.ensure_indexes()
+    # A rate of 0 leaves that upstream unlimited
+    limiter = server.UpstreamLimiter({"geocode": geocode_rps, "overpass": overpass_rps, "company": company_rps})
+    writer = LeadFileWriter(out) if out else None
+    try:
+        totals = asyncio.run(run_searches(pending, concurrency, deadline, mongo, writer, checkpoint, limiter))
+    finally:
+        if writer:
+            writer.close()
+    typer.echo(f"Done: {totals['searches']} searches, {totals['leads']} leads, {totals['incomplete']} incomplete, "
+               f"{totals['failed']} failed in {totals['seconds']}s")
+    if totals["failed"]:
+        raise typer.Exit(1)
+
+
+@app.command()
+def status(
+    input_file: Path = typer.Argument(..., exists=True, dir_okay=False, help="CSV or JSONL list of searches"),
+    checkpoint: Optional[Path] = typer.Option(None, help="Progress file (default: <input>.checkpoint.jsonl)"),
+):
+    """Show how far a job has got"""
+    checkpoint = checkpoint or input_file.with_name(input_file.name + ".checkpoint.jsonl")
+    keys = {server.search_snapshot_key(search) for search in read_searches(input_file, 5.0)}
+    done = read_checkpoint(checkpoint, retry_incomplete=False)
+    finished = [entry for key, entry in done.items() if key in keys]
+    typer.echo(f"{len(finished)}/{len(keys)} searches done, {sum(e.get('leads', 0) for e in finished)} leads, "
+               f"{sum(1 for e in finished if not e.get('complete'))} incomplete")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,302 @@
+"""Bulk outreach delivery: the campaign queue and the SMTP workers that drain it.
+
+A campaign expands into one queued message document per lead. Workers lease
+due messages from Mongo, take a per-domain send slot and deliver over their own
+persistent SMTP connection; transient failures are rescheduled with exponential
+backoff. Delivery is at-least-once: a message whose worker died mid-send is sent
+again once its lease expires.
+"""
+import asyncio
+import os
+import random
+import re
+import smtplib
+import time
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import make_msgid
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+import server
+
+SMTP_HOST = os.environ.get('SMTP_HOST', '')  # workers only start when this is set
+SMTP_PORT = int(os.environ.get('SMTP_PORT', '587'))
+SMTP_USERNAME = os.environ.get('SMTP_USERNAME', '')
+SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD', '')
+SMTP_STARTTLS = os.environ.get('SMTP_STARTTLS', 'true').lower() == 'true'
+SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', '30'))
+SMTP_IDLE_SECONDS = 30  # a worker's connection is closed after this long without mail
+OUTREACH_FROM = os.environ.get('OUTREACH_FROM', 'outreach@localhost')
+OUTREACH_WORKERS = int(os.environ.get('OUTREACH_WORKERS', '4'))
+OUTREACH_DOMAIN_INTERVAL = float(os.environ.get('OUTREACH_DOMAIN_INTERVAL', '1.0'))  # seconds between mails to one domain
+OUTREACH_MAX_ATTEMPTS = int(os.environ.get('OUTREACH_MAX_ATTEMPTS', '5'))
+OUTREACH_RETRY_BASE = float(os.environ.get('OUTREACH_RETRY_BASE', '30'))  # seconds, doubled per attempt
+OUTREACH_MAX_CAMPAIGN_LEADS = int(os.environ.get('OUTREACH_MAX_CAMPAIGN_LEADS', '50000'))
+OUTREACH_LEASE_SECONDS = 120
+OUTREACH_POLL_INTERVAL = 1.0
+OUTREACH_CLAIM_ATTEMPTS = 8
+OUTREACH_ENQUEUE_BATCH = 1000
+OUTREACH_TEMPLATE_RE = re.compile(r'{{\s*(\w+)\s*}}')
+
+# Recipient domains known to have no free send slot until the given time (per process)
+outreach_domain_cooldowns: Dict[str, datetime] = {}
+
+def render_outreach_template(template: str, lead: Dict) -> str:
+    values = {
+        "business_name": lead.get("name"),
+        "industry": lead.get("business_type"),
+        "address": lead.get("address"),
+        "phone": lead.get("phone"),
+        "website": lead.get("website"),
+    }
+    return OUTREACH_TEMPLATE_RE.sub(
+        lambda m: str(values[m.group(1)] or "") if m.group(1) in values else m.group(0), template)
+
+def enqueue_outreach_campaign(campaign: "server.OutreachCampaign") -> Dict:
+    """Create a campaign and queue one message per distinct lead email address"""
+    campaign_id = str(uuid.uuid4())
+    now = datetime.now()
+    query: Dict[str, Any] = {"email": {"$nin": [None, ""]}}
+    if campaign.business_ids:
+        query["id"] = {"$in": campaign.business_ids}
+    else:
+        query["quality_score"] = {"$gte": campaign.min_quality_score}
+        query["lead_status"] = {"$in": campaign.lead_statuses}
+        if campaign.business_type:
+            query["business_type"] = campaign.business_type
+    limit = min(campaign.limit or OUTREACH_MAX_CAMPAIGN_LEADS, OUTREACH_MAX_CAMPAIGN_LEADS)
+    
+    server.outreach_campaigns_collection.insert_one({
+        "id": campaign_id,
+        "name": campaign.name,
+        "user_id": campaign.user_id,
+        "subject": campaign.subject,
+        "body": campaign.body,
+        "status": "queued",
+        "total": 0,
+        "sent": 0,
+        "failed": 0,
+        "cancelled": 0,
+        "created_at": now,
+    })
+    projection = {"_id": 0, "id": 1, "name": 1, "business_type": 1, "address": 1, "phone": 1, "website": 1, "email": 1}
+    total, batch, seen = 0, [], set()
+    for lead in server.businesses_collection.find(query, projection).sort("quality_score", -1).limit(limit):
+        to = lead["email"].strip()
+        if "@" not in to or to.lower() in seen:
+            continue
+        seen.add(to.lower())
+        batch.append({
+            "id": str(uuid.uuid4()),
+            "campaign_id": campaign_id,
+            "business_id": lead["id"],
+            "to": to,
+            "domain": to.rsplit("@", 1)[1].lower(),
+            "subject": render_outreach_template(campaign.subject, lead),
+            "body": render_outreach_template(campaign.body, lead),
+            "status": "queued",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+        })
+        if len(batch) == OUTREACH_ENQUEUE_BATCH:
+            server.outreach_messages_collection.insert_many(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        server.outreach_messages_collection.insert_many(batch)
+        total += len(batch)
+    
+    # Workers may already have finished messages; completion is only judged once total is known
+    updated = server.outreach_campaigns_collection.find_one_and_update(
+        {"id": campaign_id},
+        {"$set": {"total": total, "status": "running"}},
+        projection={"_id": 0, "body": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    return complete_outreach_campaign_if_done(updated)
+
+def complete_outreach_campaign_if_done(campaign: Optional[Dict]) -> Optional[Dict]:
+    if campaign and campaign.get("status") == "running" \
+            and campaign["sent"] + campaign["failed"] + campaign["cancelled"] >= campaign["total"]:
+        campaign["completed_at"] = datetime.now()
+        campaign["status"] = "completed"
+        server.outreach_campaigns_collection.update_one(
+            {"id": campaign["id"], "status": "running"},
+            {"$set": {"status": "completed", "completed_at": campaign["completed_at"]}},
+        )
+    return campaign
+
+def reserve_domain_slot(domain: str, now: datetime) -> Optional[datetime]:
+    """Take the next send slot for a recipient domain; if it is taken, return when it frees up"""
+    try:
+        server.outreach_domains_collection.find_one_and_update(
+            {"_id": domain, "next_send_at": {"$lte": now}},
+            {"$set": {"next_send_at": now + timedelta(seconds=OUTREACH_DOMAIN_INTERVAL)}},
+            upsert=True,
+        )
+        return None
+    except DuplicateKeyError:
+        # The upsert collided with a slot document that is still in the future
+        slot = server.outreach_domains_collection.find_one({"_id": domain})
+        return slot["next_send_at"] if slot else now
+
+def claim_outreach_message(worker_id: str) -> Optional[Dict]:
+    """Lease the next due message whose recipient domain has a free send slot"""
+    for _ in range(OUTREACH_CLAIM_ATTEMPTS):
+        now = datetime.now()
+        for domain, until in list(outreach_domain_cooldowns.items()):
+            if until <= now:
+                outreach_domain_cooldowns.pop(domain, None)
+        message = server.outreach_messages_collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued", "next_attempt_at": {"$lte": now}},
+                    {"status": "sending", "lease_until": {"$lt": now}},
+                ],
+                "domain": {"$nin": list(outreach_domain_cooldowns)},
+            },
+            {"$set": {"status": "sending", "lease_until": now + timedelta(seconds=OUTREACH_LEASE_SECONDS),
+                      "worker": worker_id}},
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if not message:
+            return None
+        busy_until = reserve_domain_slot(message["domain"], now)
+        if busy_until is None:
+            return message
+        outreach_domain_cooldowns[message["domain"]] = busy_until
+        server.outreach_messages_collection.update_one(
+            {"id": message["id"], "status": "sending"},
+            {"$set": {"status": "queued", "next_attempt_at": busy_until}, "$unset": {"lease_until": "", "worker": ""}},
+        )
+    return None
+
+def outreach_error_is_permanent(error: Exception) -> bool:
+    """5xx replies fail a message for good; connection problems and 4xx replies are retried"""
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False  # our credentials, not this message
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(500 <= code < 600 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 500 <= error.smtp_code < 600
+    return False
+
+class SMTPSender:
+    """One persistent SMTP connection, reused for every message a worker sends"""
+
+    def __init__(self):
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        smtp.ehlo()
+        if SMTP_STARTTLS and smtp.has_extn("starttls"):
+            smtp.starttls()
+            smtp.ehlo()
+        if SMTP_USERNAME:
+            smtp.login(SMTP_USERNAME, SMTP_PASSWORD)
+        return smtp
+
+    def send(self, email: EmailMessage) -> None:
+        for attempt in range(2):
+            if self._smtp is None:
+                self._smtp = self._connect()
+            try:
+                self._smtp.send_message(email)
+                self._last_used = time.monotonic()
+                return
+            except smtplib.SMTPServerDisconnected:
+                # Servers drop idle connections; reconnect once before giving up
+                self._smtp = None
+                if attempt:
+                    raise
+            except smtplib.SMTPException:
+                raise  # a reply to this message, the connection itself is fine
+            except OSError:
+                self.close()
+                raise
+
+    def close_if_idle(self) -> None:
+        if self._smtp is not None and time.monotonic() - self._last_used > SMTP_IDLE_SECONDS:
+            self.close()
+
+    def close(self) -> None:
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+def build_outreach_email(message: Dict) -> EmailMessage:
+    email = EmailMessage()
+    email["From"] = OUTREACH_FROM
+    email["To"] = message["to"]
+    email["Subject"] = message["subject"]
+    email["Message-ID"] = make_msgid(domain=OUTREACH_FROM.rsplit("@", 1)[-1])
+    email.set_content(message["body"])
+    return email
+
+def finish_outreach_message(campaign_id: str, outcome: str) -> None:
+    campaign = server.outreach_campaigns_collection.find_one_and_update(
+        {"id": campaign_id}, {"$inc": {outcome: 1}}, projection={"_id": 0, "body": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+    complete_outreach_campaign_if_done(campaign)
+
+def deliver_outreach_message(sender: SMTPSender, message: Dict) -> None:
+    """Send one leased message and record the outcome"""
+    attempts = message.get("attempts", 0) + 1
+    try:
+        with server.UPSTREAM_LATENCY.time(upstream="smtp"):
+            sender.send(build_outreach_email(message))
+    except (smtplib.SMTPException, OSError) as e:
+        server.UPSTREAM_ERRORS.inc(upstream="smtp")
+        if outreach_error_is_permanent(e) or attempts >= OUTREACH_MAX_ATTEMPTS:
+            server.outreach_messages_collection.update_one(
+                {"id": message["id"]},
+                {"$set": {"status": "failed", "attempts": attempts, "last_error": str(e)}, "$unset": {"lease_until": ""}},
+            )
+            server.OUTREACH_MESSAGES.inc(outcome="failed")
+            finish_outreach_message(message["campaign_id"], "failed")
+        else:
+            delay = OUTREACH_RETRY_BASE * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+            server.outreach_messages_collection.update_one(
+                {"id": message["id"]},
+                {"$set": {"status": "queued", "attempts": attempts, "last_error": str(e),
+                          "next_attempt_at": datetime.now() + timedelta(seconds=delay)},
+                 "$unset": {"lease_until": ""}},
+            )
+            server.OUTREACH_MESSAGES.inc(outcome="retried")
+        return
+    server.outreach_messages_collection.update_one(
+        {"id": message["id"]},
+        {"$set": {"status": "sent", "attempts": attempts, "sent_at": datetime.now()}, "$unset": {"lease_until": ""}},
+    )
+    server.OUTREACH_MESSAGES.inc(outcome="sent")
+    finish_outreach_message(message["campaign_id"], "sent")
+
+async def run_outreach_worker(worker_id: str):
+    """Deliver queued outreach messages until cancelled"""
+    sender = SMTPSender()
+    try:
+        while True:
+            try:
+                message = await asyncio.to_thread(claim_outreach_message, worker_id)
+                if message is None:
+                    await asyncio.to_thread(sender.close_if_idle)
+                    await asyncio.sleep(OUTREACH_POLL_INTERVAL)
+                    continue
+                await asyncio.to_thread(deliver_outreach_message, sender, message)
+            except Exception as e:
+                server.logger.error(f"Outreach worker error: {e}")
+                await asyncio.sleep(OUTREACH_POLL_INTERVAL)
+    finally:
+        sender.close()
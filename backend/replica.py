@@ -0,0 +1,247 @@
+"""In-memory columnar replica of the businesses collection.
+
+Filter columns are typed NumPy arrays (one row per lead, in insertion order);
+the rest of every lead's public document is kept as a key-less UTF-8 JSON array
+in one append-only byte arena. Queries build a boolean mask over the columns and
+only decode the rows they return. server.py loads the snapshot and feeds the
+store from local writes and the lead event log.
+"""
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+# Optional: without numpy the API serves every read from MongoDB
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LEAD_REPLICA_COMPACT_BYTES = 1024 * 1024  # compact once this much of the row arena is dead
+LEAD_REPLICA_ROW_FIELDS = ("id", "osm_type", "osm_id", "name", "address", "phone", "website", "email",
+                           "lat", "lon", "company_info")
+LEAD_REPLICA_COLUMN_FIELDS = ("business_type", "quality_score", "lead_status", "last_updated")
+LEAD_REPLICA_DATETIME_FIELDS = ("last_updated", "website_crawled_at")
+LEAD_REPLICA_EPOCH = datetime(1970, 1, 1)
+LEAD_REPLICA_NO_TIME = -(2 ** 63)
+LEAD_REPLICA_HAS_PHONE, LEAD_REPLICA_HAS_WEBSITE, LEAD_REPLICA_HAS_EMAIL = 1, 2, 4
+LEAD_REPLICA_SORTS = {
+    "quality_score": ("score", False), "-quality_score": ("score", True),
+    "last_updated": ("updated", False), "-last_updated": ("updated", True),
+}
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+class CategoryCodes:
+    """Stable small-integer codes for the values of a categorical column; None is code 0"""
+
+    def __init__(self):
+        self.codes: Dict[Optional[str], int] = {None: 0}
+        self.values: List[Optional[str]] = [None]
+
+    def encode(self, value: Optional[str]) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+class LeadColumnStore:
+    """Columnar in-memory copy of the businesses collection"""
+
+    COLUMNS = {
+        "score": "int8", "type_code": "uint16", "status_code": "uint8", "lat": "float32", "lon": "float32",
+        "updated": "int64", "contacts": "uint8", "alive": "bool", "offset": "int64", "length": "int32",
+    }
+
+    def __init__(self, capacity: int = 1024):
+        self.lock = threading.RLock()
+        self.ready = False
+        self.types = CategoryCodes()
+        self.statuses = CategoryCodes()
+        self.rows: Dict[str, int] = {}  # lead id -> row
+        self.size = 0  # rows in use, live or dead
+        self.arena = bytearray()
+        self.dead_bytes = 0
+        self.columns = {name: np.zeros(capacity, dtype) for name, dtype in self.COLUMNS.items()}
+        self._pending: Optional[List[Dict]] = []  # events that arrive while the snapshot loads
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def nbytes(self) -> int:
+        return len(self.arena) + sum(column.nbytes for column in self.columns.values())
+
+    def _grow(self) -> None:
+        for name, column in self.columns.items():
+            grown = np.zeros(len(column) * 2, column.dtype)
+            grown[:len(column)] = column
+            self.columns[name] = grown
+
+    def _upsert(self, lead: Dict) -> None:
+        """Merge a lead's fields into its row, like the $set that wrote them to MongoDB"""
+        row = self.rows.get(lead["id"])
+        if row is None:
+            if self.size == len(self.columns["alive"]):
+                self._grow()
+            row = self.rows[lead["id"]] = self.size
+            self.size += 1
+        else:
+            # Fields this write didn't carry (crawled contacts, fields set by other writers) are kept
+            start, length = int(self.columns["offset"][row]), int(self.columns["length"][row])
+            lead = {**self._decode(self.arena[start:start + length], row), **lead}
+            self.dead_bytes += length
+        payload = self._encode(lead)
+        columns = self.columns
+        columns["offset"][row] = len(self.arena)
+        columns["length"][row] = len(payload)
+        self.arena.extend(payload)
+        columns["score"][row] = max(-128, min(127, int(lead.get("quality_score") or 0)))
+        columns["type_code"][row] = self.types.encode(lead.get("business_type"))
+        columns["status_code"][row] = self.statuses.encode(lead.get("lead_status"))
+        columns["lat"][row] = lead.get("lat") or 0.0
+        columns["lon"][row] = lead.get("lon") or 0.0
+        updated = lead.get("last_updated")
+        columns["updated"][row] = (
+            (updated - LEAD_REPLICA_EPOCH) // timedelta(microseconds=1) if isinstance(updated, datetime)
+            else LEAD_REPLICA_NO_TIME
+        )
+        columns["contacts"][row] = (
+            (LEAD_REPLICA_HAS_PHONE if lead.get("phone") else 0)
+            | (LEAD_REPLICA_HAS_WEBSITE if lead.get("website") else 0)
+            | (LEAD_REPLICA_HAS_EMAIL if lead.get("email") else 0)
+        )
+        columns["alive"][row] = True
+
+    def _remove(self, lead_id: str) -> None:
+        row = self.rows.pop(lead_id, None)
+        if row is not None:
+            self.columns["alive"][row] = False
+            self.dead_bytes += int(self.columns["length"][row])
+
+    def _compact(self) -> None:
+        """Drop dead rows and their bytes, keeping row order"""
+        keep = np.flatnonzero(self.columns["alive"][:self.size])
+        arena = bytearray()
+        offsets = np.empty(len(keep), "int64")
+        for i, row in enumerate(keep):
+            start = int(self.columns["offset"][row])
+            offsets[i] = len(arena)
+            arena.extend(self.arena[start:start + int(self.columns["length"][row])])
+        capacity = max(1024, len(self.columns["alive"]))
+        for name, column in self.columns.items():
+            compacted = np.zeros(capacity, column.dtype)
+            compacted[:len(keep)] = offsets if name == "offset" else column[keep]
+            self.columns[name] = compacted
+        self.rows = {lead_id: new_row for new_row, lead_id in enumerate(
+            sorted(self.rows, key=self.rows.__getitem__))}
+        self.arena = arena
+        self.size = len(keep)
+        self.dead_bytes = 0
+
+    @staticmethod
+    def _encode(lead: Dict) -> bytes:
+        if not all(field in lead for field in LEAD_REPLICA_ROW_FIELDS + LEAD_REPLICA_COLUMN_FIELDS):
+            # Irregular (legacy) documents are kept whole
+            row: Any = lead
+        else:
+            known = set(LEAD_REPLICA_ROW_FIELDS + LEAD_REPLICA_COLUMN_FIELDS)
+            row = [lead[field] for field in LEAD_REPLICA_ROW_FIELDS]
+            extra = {key: value for key, value in lead.items() if key not in known}
+            if extra:
+                row.append(extra)
+        return json.dumps(row, default=_json_default, separators=(",", ":")).encode()
+
+    def _decode(self, payload: bytes, row: int) -> Dict:
+        decoded = json.loads(payload)
+        if isinstance(decoded, dict):
+            lead = decoded
+        else:
+            columns = self.columns
+            values = dict(zip(LEAD_REPLICA_ROW_FIELDS, decoded))
+            updated = int(columns["updated"][row])
+            lead = {
+                "id": values["id"], "osm_type": values["osm_type"], "osm_id": values["osm_id"],
+                "name": values["name"], "business_type": self.types.values[columns["type_code"][row]],
+                "address": values["address"], "phone": values["phone"], "website": values["website"],
+                "email": values["email"], "lat": values["lat"], "lon": values["lon"],
+                "quality_score": int(columns["score"][row]),
+                "lead_status": self.statuses.values[columns["status_code"][row]],
+                "last_updated": (LEAD_REPLICA_EPOCH + timedelta(microseconds=updated)
+                                 if updated != LEAD_REPLICA_NO_TIME else None),
+                "company_info": values["company_info"],
+            }
+            if len(decoded) > len(LEAD_REPLICA_ROW_FIELDS):
+                lead.update(decoded[-1])
+        for field in LEAD_REPLICA_DATETIME_FIELDS:
+            if isinstance(lead.get(field), str):
+                lead[field] = datetime.fromisoformat(lead[field])
+        return lead
+
+    def load(self, leads) -> int:
+        """Replace the contents with a snapshot, then apply the events that arrived meanwhile"""
+        fresh = LeadColumnStore()
+        for lead in leads:
+            fresh._upsert(lead)
+        with self.lock:
+            self.types, self.statuses = fresh.types, fresh.statuses
+            self.rows, self.size, self.arena, self.dead_bytes = fresh.rows, fresh.size, fresh.arena, 0
+            self.columns = fresh.columns
+            pending, self._pending = self._pending or [], None
+            self.ready = True
+            self.apply(pending)
+            return len(self.rows)
+
+    def apply(self, events: List[Dict]) -> None:
+        """Apply lead change events; safe to call from any thread"""
+        with self.lock:
+            if self._pending is not None:
+                self._pending.extend(events)
+                return
+            for event in events:
+                if event["type"] in ("lead_upserted", "lead_rescored"):
+                    lead = {k: v for k, v in event["data"].items() if k not in ("previous_score", "previous_status")}
+                    self._upsert(lead)
+                elif event["type"] == "lead_removed":
+                    self._remove(event["business_id"])
+            if self.dead_bytes > LEAD_REPLICA_COMPACT_BYTES and self.dead_bytes * 2 > len(self.arena):
+                self._compact()
+
+    def query(self, business_type: Optional[str] = None, min_quality_score: int = 0,
+              lead_status: Optional[str] = None, bbox: Optional[tuple] = None,
+              has_contacts: int = 0, sort: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Leads matching the filters; bbox is (south, west, north, east) and may cross the antimeridian"""
+        with self.lock:
+            columns = self.columns
+            n = self.size
+            mask = columns["alive"][:n] & (columns["score"][:n] >= max(-128, min(127, min_quality_score)))
+            if business_type:
+                code = self.types.codes.get(business_type)
+                if code is None:
+                    return []
+                mask &= columns["type_code"][:n] == code
+            if lead_status:
+                code = self.statuses.codes.get(lead_status)
+                if code is None:
+                    return []
+                mask &= columns["status_code"][:n] == code
+            if has_contacts:
+                mask &= (columns["contacts"][:n] & has_contacts) == has_contacts
+            if bbox:
+                south, west, north, east = (np.float32(v) for v in bbox)
+                lat, lon = columns["lat"][:n], columns["lon"][:n]
+                mask &= (lat >= south) & (lat <= north)
+                mask &= ((lon >= west) | (lon <= east)) if west > east else ((lon >= west) & (lon <= east))
+            rows = np.flatnonzero(mask)
+            if sort:
+                column, descending = LEAD_REPLICA_SORTS[sort]
+                keys = columns[column][rows]
+                rows = rows[np.argsort(-keys.astype("int64") if descending else keys, kind="stable")]
+            if limit is not None:
+                rows = rows[:limit]
+            offsets, lengths = columns["offset"][rows].tolist(), columns["length"][rows].tolist()
+            return [self._decode(self.arena[start:start + length], row)
+                    for row, start, length in zip(rows.tolist(), offsets, lengths)]
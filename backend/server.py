@@ -1,17 +1,50 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from pymongo import MongoClient
+from pymongo import MongoClient, ReplaceOne, ReturnDocument, UpdateOne, monitoring
 import os
 import httpx
 import asyncio
 from typing import List, Optional, Dict, Any
 import uuid
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 import urllib.parse
+import codecs
 import re
+import math
+import time
+import functools
+import hashlib
+import hmac
+import threading
+import sys
+import weakref
+import random
+import heapq
+import itertools
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+import io
+import unicodedata
+import html
+from urllib.robotparser import RobotFileParser
+import socket
+
+# Optional columnar export support
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+import outreach
+import replica
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -26,17 +59,851 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Trace-Id", "X-Profile-Id"],
 )
 
+# Metrics (Prometheus text exposition format)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRICS_REGISTRY: List[Any] = []
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    pairs = []
+    for name, value in zip(labelnames, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        METRICS_REGISTRY.append(self)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(name, "") for name in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket latency histogram with optional labels"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: Dict[tuple, list] = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+        METRICS_REGISTRY.append(self)
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{labels} {bucket_count}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+class CallbackMetric:
+    """Unlabelled metric whose value is read from a callback at scrape time"""
+
+    def __init__(self, name: str, documentation: str, metric_type: str, callback):
+        self.name = name
+        self.documentation = documentation
+        self.metric_type = metric_type
+        self.callback = callback
+        METRICS_REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}",
+                f"{self.name} {self.callback()}"]
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in METRICS_REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+HTTP_REQUEST_LATENCY = Histogram(
+    "leadgen_http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+UPSTREAM_LATENCY = Histogram(
+    "leadgen_upstream_request_duration_seconds", "Latency of upstream API calls", ("upstream",))
+UPSTREAM_ERRORS = Counter(
+    "leadgen_upstream_errors_total", "Upstream API calls that raised an error", ("upstream",))
+SEARCH_STAGE_LATENCY = Histogram(
+    "leadgen_search_stage_duration_seconds", "Time spent per search_businesses pipeline stage", ("stage",))
+MONGO_OPERATION_LATENCY = Histogram(
+    "leadgen_mongo_operation_duration_seconds", "MongoDB command latency", ("collection", "operation", "outcome"))
+SEARCH_ELEMENTS_IN = Counter(
+    "leadgen_search_osm_elements_total", "OSM elements returned by Overpass per business type", ("business_type",))
+SEARCH_LEADS_OUT = Counter(
+    "leadgen_search_leads_total", "Qualified leads returned by searches per business type", ("business_type",))
+OVERPASS_ATTEMPTS = Counter(
+    "leadgen_overpass_attempts_total", "Overpass requests by outcome (won, lost, cancelled, error, http_<status>)",
+    ("outcome",))
+OVERPASS_HEDGES = Counter(
+    "leadgen_overpass_hedges_total", "Extra Overpass requests sent for a query by reason", ("reason",))
+ADMISSION_REJECTIONS = Counter(
+    "leadgen_admission_rejections_total", "Requests shed by admission control by route and reason", ("route", "reason"))
+ADMISSION_WAIT = Histogram(
+    "leadgen_admission_wait_seconds", "Time admitted requests spent queued by priority", ("priority",))
+OUTREACH_MESSAGES = Counter(
+    "leadgen_outreach_messages_total", "Outreach message delivery attempts by outcome", ("outcome",))
+CRAWL_PAGES = Counter(
+    "leadgen_crawl_pages_total", "Website pages requested by the contact crawler by outcome", ("outcome",))
+CRAWL_LEADS_ENRICHED = Counter(
+    "leadgen_crawl_leads_enriched_total", "Stored leads given an email or phone found on their website")
+SEARCH_DEADLINE_EXCEEDED = Counter(
+    "leadgen_search_deadline_exceeded_total", "Searches cut short by their deadline, by the stage that ran out", ("stage",))
+SEARCH_SNAPSHOTS = Counter(
+    "leadgen_search_snapshots_total", "Searches by snapshot outcome (fresh, stale, expired, miss)", ("outcome",))
+SEARCH_REVALIDATIONS = Counter(
+    "leadgen_search_revalidations_total", "Background refreshes of stale search snapshots by outcome", ("outcome",))
+LEAD_EVENTS_PUBLISHED = Counter(
+    "leadgen_lead_events_total", "Change events appended to the lead event log by type", ("type",))
+
+# Per-request tracing (Server-Timing header and sampled JSON trace dumps)
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0'))
+trace_logger = logging.getLogger("leadgen.trace")
+
+class RequestTrace:
+    """Spans recorded while serving one request"""
+
+    MAX_SPANS = 1000  # per-element spans can be numerous; totals stay exact past the cap
+
+    def __init__(self, name: str, sampled: bool = False):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.sampled = sampled
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.totals: "OrderedDict[str, list]" = OrderedDict()  # span name -> [seconds, count]
+        self.dropped_spans = 0
+
+    def add_span(self, name: str, start: float, duration: float, **attributes) -> None:
+        total = self.totals.setdefault(name, [0.0, 0])
+        total[0] += duration
+        total[1] += 1
+        if not self.sampled:
+            return
+        if len(self.spans) >= self.MAX_SPANS:
+            self.dropped_spans += 1
+            return
+        self.spans.append({
+            "name": name,
+            "offset_ms": round((start - self.start) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            **attributes,
+        })
+
+    def server_timing(self) -> str:
+        entries = []
+        for name, (seconds, count) in self.totals.items():
+            entry = f"{name};dur={seconds * 1000:.1f}"
+            if count > 1:
+                entry += f';desc="{count} calls"'
+            entries.append(entry)
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self, status: int, elapsed: float) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "status": status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "totals_ms": {name: round(seconds * 1000, 3) for name, (seconds, _) in self.totals.items()},
+            "spans": self.spans,
+            "dropped_spans": self.dropped_spans,
+        }
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+
+@contextmanager
+def trace_span(name: str, **attributes):
+    """Record a span on the current request trace, if any"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add_span(name, start, time.perf_counter() - start, **attributes)
+
+def observe_upstream(upstream: str):
+    """Record the latency of an upstream coroutine under the given name"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                with trace_span(upstream):
+                    return await func(*args, **kwargs)
+            finally:
+                UPSTREAM_LATENCY.observe(time.perf_counter() - start, upstream=upstream)
+        return wrapper
+    return decorator
+
+@contextmanager
+def stage_timer(timings: Optional[Dict[str, float]], stage: str):
+    """Accumulate wall time for a pipeline stage into timings and trace it as a span"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add_span(stage, start, elapsed)
+
+class Deadline:
+    """A request's end-to-end time budget, shared by every stage of its pipeline.
+
+    Stages narrow the cutoff upstream calls must finish by with limit(); work
+    still outstanding at the cutoff is abandoned and the stage records that
+    the result is incomplete.
+    """
+
+    def __init__(self, budget: float, started: Optional[float] = None):
+        self.budget = budget
+        self.expires_at = (started if started is not None else time.monotonic()) + budget
+        self.cutoff = self.expires_at
+        self.expired_in: Optional[str] = None  # first stage that ran out of time
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def timeout(self) -> float:
+        """Seconds left before the current stage's cutoff"""
+        return max(0.0, self.cutoff - time.monotonic())
+
+    @contextmanager
+    def limit(self, fraction: float = 1.0, reserve: float = 0.0):
+        """Cap the enclosed stage at a fraction of the remaining budget, ending a reserve (share of the budget) early"""
+        previous = self.cutoff
+        self.cutoff = min(previous, time.monotonic() + self.remaining() * fraction, self.expires_at - self.budget * reserve)
+        try:
+            yield
+        finally:
+            self.cutoff = previous
+
+    def expire(self, stage: str) -> None:
+        if self.expired_in is None:
+            self.expired_in = stage
+            SEARCH_DEADLINE_EXCEEDED.inc(stage=stage)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "budget": self.budget,
+            "elapsed": round(self.budget - (self.expires_at - time.monotonic()), 3),
+            "expired_in": self.expired_in,
+        }
+
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar("current_deadline", default=None)
+
+def deadline_timeout() -> Optional[float]:
+    """Seconds the current stage has left, or None without a deadline"""
+    deadline = current_deadline.get()
+    return None if deadline is None else deadline.timeout()
+
+@contextmanager
+def deadline_limit(fraction: float = 1.0, reserve: float = 0.0):
+    """Deadline.limit on the current request's deadline, if it has one"""
+    deadline = current_deadline.get()
+    if deadline is None:
+        yield
+    else:
+        with deadline.limit(fraction, reserve):
+            yield
+
+# Sampling profiler: while a session is active a background thread snapshots every thread's Python
+# stack each PROFILER_INTERVAL_MS and counts them as collapsed stacks (flamegraph.pl / speedscope input)
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')  # bearer token for /api/admin routes; they are disabled without one
+PROFILER_INTERVAL_MS = float(os.environ.get('PROFILER_INTERVAL_MS', '10'))
+PROFILER_MAX_SECONDS = 60
+PROFILER_MAX_DEPTH = 128
+PROFILE_RETENTION = 86400  # seconds a per-request profile is kept
+# Leaf frames of threads that are parked rather than running Python code
+PROFILER_IDLE_FRAMES = {
+    ("selectors.py", "select"), ("threading.py", "wait"), ("queue.py", "get"), ("thread.py", "_worker"),
+    ("periodic_executor.py", "_run"),
+}
+
+def is_admin(request: Request) -> bool:
+    if not ADMIN_TOKEN:
+        return False
+    return hmac.compare_digest(request.headers.get("authorization", "").encode(), f"Bearer {ADMIN_TOKEN}".encode())
+
+def require_admin(request: Request) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(request):
+        raise HTTPException(status_code=401, detail="Admin token required", headers={"WWW-Authenticate": "Bearer"})
+
+class StackProfile:
+    """Sample counts per collapsed stack for one profiling session"""
+
+    def __init__(self, include_idle: bool):
+        self.include_idle = include_idle
+        self.counts: Dict[str, int] = {}
+        self.samples = 0
+        self.idle_samples = 0
+        self.started = time.monotonic()
+        self.seconds = 0.0
+
+    def add(self, stack: str, idle: bool) -> None:
+        self.samples += 1
+        if idle:
+            self.idle_samples += 1
+            if not self.include_idle:
+                return
+        self.counts[stack] = self.counts.get(stack, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "seconds": round(self.seconds, 3),
+            "interval_ms": PROFILER_INTERVAL_MS,
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+            "distinct_stacks": len(self.counts),
+        }
+
+current_profile: ContextVar[Optional[StackProfile]] = ContextVar("current_profile", default=None)
+
+class SamplingProfiler:
+    """Background stack sampler shared by all profiling sessions of this worker.
+
+    Worker-wide sessions take samples of every thread. Request sessions take
+    event-loop samples only while one of the request's tasks is running, and
+    executor-thread samples only while the thread runs work submitted on the
+    request's behalf; attach() installs the task factory and executor that
+    track both. Nothing runs while no session is active.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.sessions: List[StackProfile] = []
+        self.request_sessions: List[StackProfile] = []
+        self.tasks: "weakref.WeakKeyDictionary[asyncio.Task, StackProfile]" = weakref.WeakKeyDictionary()
+        self.thread_sessions: Dict[int, StackProfile] = {}  # executor thread id -> request session
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread: Optional[int] = None
+        self._labels: Dict[Any, str] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.loop_thread = threading.get_ident()
+
+        def task_factory(loop, coro, **kwargs):
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+            context = kwargs.get("context")
+            profile = context.get(current_profile) if context is not None else current_profile.get()
+            if profile is not None:
+                self.tasks[task] = profile
+            return task
+
+        loop.set_task_factory(task_factory)
+        loop.set_default_executor(ProfiledThreadPoolExecutor(self))
+
+    def start(self, profile: StackProfile, request_scoped: bool = False) -> None:
+        with self._lock:
+            (self.request_sessions if request_scoped else self.sessions).append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+
+    def stop(self, profile: StackProfile) -> None:
+        with self._lock:
+            for sessions in (self.sessions, self.request_sessions):
+                if profile in sessions:
+                    sessions.remove(profile)
+            profile.seconds = time.monotonic() - profile.started
+
+    def label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            if len(self._labels) > 50000:
+                self._labels.clear()
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)})".replace(";", ":")
+            self._labels[code] = label
+        return label
+
+    def collapse(self, frame, thread_name: str) -> str:
+        labels = []
+        while frame is not None and len(labels) < PROFILER_MAX_DEPTH:
+            labels.append(self.label(frame.f_code))
+            frame = frame.f_back
+        labels.append(thread_name)
+        return ";".join(reversed(labels))
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            frames = sys._current_frames()
+            running = asyncio.current_task(self.loop) if self.loop is not None and self.request_sessions else None
+            with self._lock:
+                if not self.sessions and not self.request_sessions:
+                    self._thread = None
+                    return
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in frames.items():
+                    if ident == own:
+                        continue
+                    owner = self.tasks.get(running) if ident == self.loop_thread and running is not None \
+                        else self.thread_sessions.get(ident)
+                    targets = self.sessions + [owner] if owner in self.request_sessions else self.sessions
+                    if not targets:
+                        continue
+                    code = frame.f_code
+                    idle = (os.path.basename(code.co_filename), code.co_name) in PROFILER_IDLE_FRAMES
+                    stack = self.collapse(frame, names.get(ident, str(ident)))
+                    for profile in targets:
+                        profile.add(stack, idle)
+            del frames
+            time.sleep(self.interval)
+
+class ProfiledThreadPoolExecutor(ThreadPoolExecutor):
+    """Default executor that tells the sampler which request a worker thread is running for"""
+
+    def __init__(self, profiler: SamplingProfiler):
+        super().__init__(thread_name_prefix="asyncio")
+        self._profiler = profiler
+
+    def submit(self, fn, /, *args, **kwargs):
+        profile = current_profile.get()
+        if profile is None:
+            return super().submit(fn, *args, **kwargs)
+        threads = self._profiler.thread_sessions
+
+        def run():
+            ident = threading.get_ident()
+            threads[ident] = profile
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                threads.pop(ident, None)
+        return super().submit(run)
+
+sampling_profiler = SamplingProfiler(PROFILER_INTERVAL_MS / 1000)
+
+@app.on_event("startup")
+async def attach_sampling_profiler():
+    if ADMIN_TOKEN:
+        sampling_profiler.attach(asyncio.get_running_loop())
+
+def store_request_profile(profile: StackProfile, request: Request) -> Optional[str]:
+    """Keep a per-request profile for GET /api/admin/profiles/{id}"""
+    profile_id = uuid.uuid4().hex
+    try:
+        request_profiles_collection.insert_one({
+            "id": profile_id,
+            "method": request.method,
+            "path": request.url.path,
+            "created_at": datetime.now(),
+            **profile.summary(),
+            "counts": [[stack, count] for stack, count in profile.counts.items()],
+        })
+    except Exception as e:
+        logger.error(f"Profile store error: {e}")
+        return None
+    return profile_id
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command issued by the client and traces it on the current request"""
+
+    def __init__(self):
+        self._collections: Dict[tuple, str] = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = collection if isinstance(collection, str) else ""
+
+    def _finish(self, event, outcome: str):
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        duration = event.duration_micros / 1e6
+        MONGO_OPERATION_LATENCY.observe(duration, collection=collection, operation=event.command_name, outcome=outcome)
+        # Listeners run synchronously in the calling context, so the request trace is visible here
+        trace = current_trace.get()
+        if trace is not None:
+            trace.add_span(f"db-{event.command_name}", time.perf_counter() - duration, duration,
+                           collection=collection, outcome=outcome)
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
+
 # MongoDB connection
 MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/leadgen_db')
-client = MongoClient(MONGO_URL)
+client = MongoClient(MONGO_URL, event_listeners=[MongoCommandMetrics()])
 db = client.leadgen_db
 
 # Collections
 businesses_collection = db.businesses
 favorites_collection = db.favorites
 users_collection = db.users
+search_results_collection = db.search_results
+lead_rollups_collection = db.lead_rollups
+lead_clusters_collection = db.lead_clusters
+outreach_campaigns_collection = db.outreach_campaigns
+outreach_messages_collection = db.outreach_messages
+outreach_domains_collection = db.outreach_domains
+lead_events_collection = db.lead_events
+event_counters_collection = db.event_counters
+website_contacts_collection = db.website_contacts
+search_snapshots_collection = db.search_snapshots
+request_profiles_collection = db.request_profiles
+
+# Lead fields that are internal to the backend and never returned by the API
+LEAD_PUBLIC_FIELDS = {"_id": 0, "search_terms": 0}
+
+# Lead freshness: leads not refreshed by a search within the TTL are swept in the background
+LEAD_TTL_HOURS = float(os.environ.get('LEAD_TTL_HOURS', '720'))
+LEAD_SWEEP_INTERVAL = float(os.environ.get('LEAD_SWEEP_INTERVAL', '3600'))  # seconds
+LEAD_SWEEP_BATCH = 1000
+
+# Search processing: radii above SEARCH_TILE_KM are split into square tiles of that side,
+# fetched concurrently; a tile stops parsing after SEARCH_MAX_ELEMENTS_PER_TILE elements
+SEARCH_TILE_KM = float(os.environ.get('SEARCH_TILE_KM', '10'))
+SEARCH_TILE_CONCURRENCY = int(os.environ.get('SEARCH_TILE_CONCURRENCY', '3'))
+SEARCH_MAX_TILES_PER_SIDE = int(os.environ.get('SEARCH_MAX_TILES_PER_SIDE', '8'))  # very large radii get bigger tiles
+SEARCH_MAX_ELEMENTS_PER_TILE = int(os.environ.get('SEARCH_MAX_ELEMENTS_PER_TILE', '10000'))
+SEARCH_ENRICH_CONCURRENCY = int(os.environ.get('SEARCH_ENRICH_CONCURRENCY', '8'))
+SEARCH_MAX_PAGE_SIZE = 500
+ADAPTIVE_START_KM = float(os.environ.get('ADAPTIVE_START_KM', '1'))
+ADAPTIVE_GROWTH = float(os.environ.get('ADAPTIVE_GROWTH', '2'))
+ADAPTIVE_MAX_RADIUS_KM = float(os.environ.get('ADAPTIVE_MAX_RADIUS_KM', '25'))
+SEARCH_RESULTS_TTL = int(os.environ.get('SEARCH_RESULTS_TTL', '3600'))  # seconds a paginated result set is kept
+# Stale-while-revalidate (opt-in with SEARCH_SWR=true): a repeat search is answered from the snapshot of its
+# last run. Snapshots older than SEARCH_STALE_AFTER are refreshed in the background; past SEARCH_MAX_STALENESS
+# the search runs inline again
+SEARCH_SWR_ENABLED = os.environ.get('SEARCH_SWR', 'false').lower() == 'true'
+SEARCH_STALE_AFTER = float(os.environ.get('SEARCH_STALE_AFTER', '900'))  # seconds
+SEARCH_MAX_STALENESS = float(os.environ.get('SEARCH_MAX_STALENESS', str(6 * 3600)))  # seconds
+SEARCH_REVALIDATE_CONCURRENCY = int(os.environ.get('SEARCH_REVALIDATE_CONCURRENCY', '2'))
+SEARCH_REVALIDATE_LEASE = 300  # seconds one worker owns a snapshot's refresh
+SEARCH_REVALIDATE_BACKOFF = 60  # seconds before a failed refresh is retried
+# End-to-end search deadline in seconds (X-Request-Deadline header or the deadline field; 0 means none).
+# Geocoding gets at most SEARCH_GEOCODE_SHARE of it and Overpass SEARCH_FETCH_SHARE of what is left;
+# enrichment stops SEARCH_DEADLINE_RESERVE of the budget early so ranking and storing still fit.
+# Searches that don't ask for one get SEARCH_DEFAULT_DEADLINE, which is off unless configured:
+# a partial result neither cleans up vanished leads nor refreshes the search's snapshot
+SEARCH_DEFAULT_DEADLINE = float(os.environ.get('SEARCH_DEFAULT_DEADLINE', '0'))
+SEARCH_MAX_DEADLINE = float(os.environ.get('SEARCH_MAX_DEADLINE', '300'))
+SEARCH_GEOCODE_SHARE = 0.2
+SEARCH_FETCH_SHARE = 0.7
+SEARCH_DEADLINE_RESERVE = 0.1
+OVERPASS_STREAM_CHUNK_BYTES = 64 * 1024
+
+# Batch search limits (upstream politeness: Nominatim allows ~1 req/s, Overpass ~2 slots per client)
+BATCH_MAX_SEARCHES = int(os.environ.get('BATCH_MAX_SEARCHES', '100'))
+BATCH_GEOCODE_CONCURRENCY = int(os.environ.get('BATCH_GEOCODE_CONCURRENCY', '2'))
+BATCH_OVERPASS_CONCURRENCY = int(os.environ.get('BATCH_OVERPASS_CONCURRENCY', '2'))
+BATCH_ENRICH_CONCURRENCY = int(os.environ.get('BATCH_ENRICH_CONCURRENCY', '8'))
+BATCH_MAX_AREAS_PER_QUERY = int(os.environ.get('BATCH_MAX_AREAS_PER_QUERY', '12'))
+BATCH_MAX_RADIUS_KM = float(os.environ.get('BATCH_MAX_RADIUS_KM', '25'))  # batch areas are not tiled
+BATCH_MAX_ELEMENTS_PER_SEARCH = int(os.environ.get('BATCH_MAX_ELEMENTS_PER_SEARCH', '2000'))
+
+# Admission control for the search routes: at most SEARCH_MAX_CONCURRENT run at once, up to
+# SEARCH_MAX_QUEUED wait (interactive before batch) for at most SEARCH_MAX_QUEUE_WAIT seconds,
+# everything else is answered 503 right away
+SEARCH_MAX_CONCURRENT = int(os.environ.get('SEARCH_MAX_CONCURRENT', '8'))
+SEARCH_MAX_QUEUED = int(os.environ.get('SEARCH_MAX_QUEUED', '32'))
+SEARCH_MAX_QUEUE_WAIT = float(os.environ.get('SEARCH_MAX_QUEUE_WAIT', '10'))
+ADMISSION_PRIORITY_INTERACTIVE = 0
+ADMISSION_PRIORITY_BATCH = 1
+ADMISSION_ROUTES = {
+    ("POST", "/api/search-businesses"): ADMISSION_PRIORITY_INTERACTIVE,
+    ("POST", "/api/search-businesses/batch"): ADMISSION_PRIORITY_BATCH,
+}
+
+# Upstream endpoints (overridable to point at mirrors or local stand-ins)
+NOMINATIM_URL = os.environ.get('NOMINATIM_URL', 'https://nominatim.openstreetmap.org/search')
+OVERPASS_URL = os.environ.get('OVERPASS_URL', 'https://overpass-api.de/api/interpreter')
+OPENCORPORATES_URL = os.environ.get('OPENCORPORATES_URL', 'https://api.opencorporates.com/v0.4/companies/search')
+UPSTREAM_TIMEOUT = float(os.environ.get('UPSTREAM_TIMEOUT', '5'))  # seconds, Nominatim and OpenCorporates
+
+# Overpass endpoints (comma-separated, e.g. public mirrors or self-hosted instances). Queries go
+# to the endpoint with the lowest median time to first byte; when no response has started after
+# that endpoint's p95, one hedge is sent to the next endpoint and the first 200 wins
+OVERPASS_URLS = [url.strip() for url in os.environ.get('OVERPASS_URLS', OVERPASS_URL).split(',') if url.strip()]
+OVERPASS_MAX_ATTEMPTS = int(os.environ.get('OVERPASS_MAX_ATTEMPTS', '2'))  # per query, hedges and failovers included
+OVERPASS_HEDGE_DEFAULT_DELAY = float(os.environ.get('OVERPASS_HEDGE_DEFAULT_DELAY', '3'))  # until p95 is known
+OVERPASS_HEDGE_MIN_DELAY = float(os.environ.get('OVERPASS_HEDGE_MIN_DELAY', '0.25'))
+OVERPASS_HEDGE_BUDGET = float(os.environ.get('OVERPASS_HEDGE_BUDGET', '0.1'))  # hedges per query, long-run maximum
+OVERPASS_LATENCY_WINDOW = 200  # recent first-byte times kept per endpoint
+OVERPASS_MIN_SAMPLES = 20  # before an endpoint's percentiles are trusted
+OVERPASS_FAILURE_THRESHOLD = 3  # consecutive failures before an endpoint is benched
+OVERPASS_COOLDOWN = float(os.environ.get('OVERPASS_COOLDOWN', '30'))  # seconds, doubled per further failure
+OVERPASS_EXPLORE_RATE = 0.05  # share of queries sent to the runner-up to keep its latency current
+
+# Website contact crawling: leads with a website but no email are crawled in the background
+# (home page, then a contact page) and rescored with what was found
+CRAWL_WORKERS = int(os.environ.get('CRAWL_WORKERS', '8'))  # 0 disables crawling
+CRAWL_QUEUE_SIZE = int(os.environ.get('CRAWL_QUEUE_SIZE', '10000'))
+CRAWL_HOST_INTERVAL = float(os.environ.get('CRAWL_HOST_INTERVAL', '2'))  # seconds between requests to one host
+CRAWL_TIMEOUT = float(os.environ.get('CRAWL_TIMEOUT', '10'))  # per request
+CRAWL_SITE_TIMEOUT = float(os.environ.get('CRAWL_SITE_TIMEOUT', '45'))  # all requests for one website
+CRAWL_MAX_BYTES = int(os.environ.get('CRAWL_MAX_BYTES', str(512 * 1024)))  # pages are truncated beyond this
+CRAWL_CACHE_TTL = int(os.environ.get('CRAWL_CACHE_TTL', str(30 * 86400)))  # seconds a crawl result is reused
+CRAWL_RETRY_TTL = int(os.environ.get('CRAWL_RETRY_TTL', '86400'))  # seconds before a failed website is retried
+CRAWL_USER_AGENT = os.environ.get('CRAWL_USER_AGENT', 'ProspectLeadBot/1.0')
+# Route every crawl to a local stand-in: https://host/path is fetched as {prefix}/host/path
+CRAWL_SITE_PREFIX = os.environ.get('CRAWL_SITE_PREFIX', '').rstrip('/')
+CRAWL_ROBOTS_CACHE_SIZE = 4096
+CRAWL_MAX_CONTACTS = 5
+
+# Change event stream (GET /api/events)
+LEAD_EVENTS_RETENTION = int(os.environ.get('LEAD_EVENTS_RETENTION', '86400'))  # seconds a resume token stays usable
+LEAD_EVENTS_POLL_INTERVAL = float(os.environ.get('LEAD_EVENTS_POLL_INTERVAL', '1'))  # seconds, picks up other workers' writes
+LEAD_EVENTS_HEARTBEAT = float(os.environ.get('LEAD_EVENTS_HEARTBEAT', '15'))  # seconds between keepalive comments
+LEAD_EVENTS_QUEUE_SIZE = 1000  # per subscriber; a client that falls further behind is disconnected and resumes
+LEAD_EVENTS_REPLAY_LIMIT = 5000
+LEAD_EVENTS_GAP_GRACE = 2.0  # seconds to wait for an allocated sequence number to be written
+LEAD_EVENTS_RETRY_MS = 3000
+LEAD_EVENT_TYPES = ("lead_upserted", "lead_rescored", "lead_removed", "favorited", "unfavorited")
+
+# In-memory columnar replica of the businesses collection, serving GET /api/businesses and
+# /api/export-csv; kept current from local writes and the lead event log
+LEAD_REPLICA_ENABLED = os.environ.get('LEAD_REPLICA', 'false').lower() == 'true'
+LEAD_REPLICA_LOAD_BATCH = 5000
+
+# Query result cache for GET /api/businesses
+BUSINESS_CACHE_MAX_ENTRIES = int(os.environ.get('BUSINESS_CACHE_MAX_ENTRIES', '512'))
+BUSINESS_CACHE_TTL = float(os.environ.get('BUSINESS_CACHE_TTL', '300'))  # seconds, guards writes from other workers
+
+class BusinessQueryCache:
+    """In-process LRU cache of business queries, invalidated by per-type generation counters.
+
+    Every write to the businesses collection bumps the generation of the affected
+    business_type (and the global generation, which unfiltered queries depend on).
+    A cached entry is only served while the generation it was computed under is current.
+    """
+
+    def __init__(self, max_entries: int = BUSINESS_CACHE_MAX_ENTRIES, ttl: float = BUSINESS_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._global_generation = 0
+        self._epoch = 0  # bumped by full invalidations, folded into every per-type generation
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(business_type: Optional[str], min_quality_score: int, lead_status: Optional[str], limit: int,
+                 *extra) -> tuple:
+        return (business_type or None, int(min_quality_score), lead_status or None, int(limit), *extra)
+
+    def generation(self, business_type: Optional[str]) -> int:
+        if business_type:
+            return self._epoch + self._generations.get(business_type, 0)
+        return self._global_generation
+
+    def get(self, key: tuple) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            generation, stored_at, result = entry
+            if generation == self.generation(key[0]) and time.monotonic() - stored_at < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: tuple, generation: int, result: Any) -> None:
+        # A write that landed while the query ran makes this result stale on arrival
+        if generation != self.generation(key[0]):
+            return
+        self._entries[key] = (generation, time.monotonic(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, business_type: Optional[str] = None) -> None:
+        """Bump generations after a write; None invalidates every business type"""
+        self.invalidations += 1
+        self._global_generation += 1
+        if business_type:
+            self._generations[business_type] = self._generations.get(business_type, 0) + 1
+        else:
+            self._epoch += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+business_query_cache = BusinessQueryCache()
+
+CallbackMetric("leadgen_business_cache_hits_total", "Business query cache hits", "counter",
+               lambda: business_query_cache.hits)
+CallbackMetric("leadgen_business_cache_misses_total", "Business query cache misses", "counter",
+               lambda: business_query_cache.misses)
+CallbackMetric("leadgen_business_cache_entries", "Business query cache entries", "gauge",
+               lambda: len(business_query_cache._entries))
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Concurrency limit with a bounded priority wait queue.
+
+    Lower priority values are admitted first, FIFO within a priority. When the
+    queue is full a newcomer displaces the newest waiter of a lower priority,
+    or is rejected if there is none. Released slots pass straight to the next
+    waiter, so queued requests are never overtaken by new arrivals.
+    """
+
+    def __init__(self, max_concurrent: int, max_queued: int, max_wait: float):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.max_wait = max_wait
+        self.active = 0
+        self.waiters: List[list] = []  # heap of [priority, arrival, future]
+        self._arrivals = itertools.count()
+        self.service_time = 1.0  # moving average of seconds per admitted request
+        self.admitted = 0
+        self.rejected = 0
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        backlog = len(self.waiters) + self.active
+        return max(1, min(60, math.ceil(backlog * self.service_time / self.max_concurrent)))
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        self.rejected += 1
+        return AdmissionRejected(reason, self.retry_after())
+
+    def _drop(self, entry: list) -> None:
+        if entry in self.waiters:
+            self.waiters.remove(entry)
+            heapq.heapify(self.waiters)
+
+    async def acquire(self, priority: int) -> None:
+        if self.active < self.max_concurrent and not self.waiters:
+            self.active += 1
+            self.admitted += 1
+            ADMISSION_WAIT.observe(0.0, priority=str(priority))
+            return
+        if len(self.waiters) >= self.max_queued:
+            victim = max((e for e in self.waiters if e[0] > priority), key=lambda e: (e[0], e[1]), default=None)
+            if victim is None:
+                raise self._reject("queue_full")
+            self._drop(victim)
+            victim[2].set_exception(self._reject("displaced"))
+        
+        entry = [priority, next(self._arrivals), asyncio.get_running_loop().create_future()]
+        future = entry[2]
+        queued_at = time.perf_counter()
+        admitted = False
+        heapq.heappush(self.waiters, entry)
+        try:
+            done, _ = await asyncio.wait({future}, timeout=self.max_wait)
+            if not done:
+                raise self._reject("queue_timeout")
+            future.result()  # raises when displaced
+            admitted = True
+        finally:
+            if not admitted:
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    # Cancelled after a slot was granted; hand it on
+                    self.release(None)
+                else:
+                    # Never leave the entry behind for release() to hand a slot to
+                    self._drop(entry)
+                    future.cancel()
+        self.admitted += 1
+        ADMISSION_WAIT.observe(time.perf_counter() - queued_at, priority=str(priority))
+
+    def release(self, elapsed: Optional[float]) -> None:
+        if elapsed is not None:
+            self.service_time += 0.2 * (elapsed - self.service_time)
+        while self.waiters:
+            _, _, future = heapq.heappop(self.waiters)
+            if not future.done():
+                future.set_result(None)  # the slot passes on, active stays the same
+                return
+        self.active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": len(self.waiters),
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "service_time": round(self.service_time, 3),
+        }
+
+search_admission = AdmissionController(SEARCH_MAX_CONCURRENT, SEARCH_MAX_QUEUED, SEARCH_MAX_QUEUE_WAIT)
+
+CallbackMetric("leadgen_search_admission_active", "Search requests currently admitted", "gauge",
+               lambda: search_admission.active)
+CallbackMetric("leadgen_search_admission_queued", "Search requests waiting for admission", "gauge",
+               lambda: len(search_admission.waiters))
 
 # Pydantic models
 class BusinessSearch(BaseModel):
@@ -45,6 +912,17 @@ class BusinessSearch(BaseModel):
     radius: Optional[float] = 5.0  # km
     lat: Optional[float] = None
     lon: Optional[float] = None
+    page: Optional[int] = 1
+    page_size: Optional[int] = 50
+    # Adaptive mode: grow the radius in rings from ADAPTIVE_START_KM until target_leads
+    # leads scoring at least min_quality_score are found or max_radius is reached
+    target_leads: Optional[int] = None
+    min_quality_score: Optional[int] = 30
+    max_radius: Optional[float] = None
+    # Oldest stored result (seconds) the caller accepts for a repeat search; 0 always runs the search
+    max_staleness: Optional[float] = None
+    # Seconds the whole search may take; leads found by then are returned, flagged incomplete
+    deadline: Optional[float] = None
 
 class Business(BaseModel):
     id: str
@@ -60,10 +938,25 @@ class Business(BaseModel):
     lead_status: str
     last_updated: datetime
 
+class BatchSearch(BaseModel):
+    searches: List[BusinessSearch]
+    merged_limit: Optional[int] = 100
+
 class FavoriteBusiness(BaseModel):
     business_id: str
     user_id: str = "default_user"
 
+class OutreachCampaign(BaseModel):
+    name: str
+    subject: str
+    body: str  # {{business_name}}, {{industry}}, {{address}}, {{phone}}, {{website}} are filled in per lead
+    business_ids: Optional[List[str]] = None  # explicit leads; otherwise leads are selected by the filters below
+    business_type: Optional[str] = None
+    lead_statuses: List[str] = ["hot", "warm"]
+    min_quality_score: int = 0
+    limit: Optional[int] = None
+    user_id: str = "default_user"
+
 class LeadFilters(BaseModel):
     min_quality_score: Optional[int] = 60
     business_types: Optional[List[str]] = None
@@ -71,6 +964,40 @@ class LeadFilters(BaseModel):
     has_phone: Optional[bool] = None
     has_email: Optional[bool] = None
 
+# Business type to OSM tag mapping for lead generation
+OSM_BUSINESS_TAGS = {
+    'saas': 'office',
+    'software': 'office',
+    'tech': 'office',
+    'startup': 'office',
+    'fintech': 'office=financial',
+    'healthcare': 'amenity=clinic',
+    'dental': 'amenity=dentist',
+    'medical': 'amenity=clinic',
+    'legal': 'office=lawyer',
+    'law': 'office=lawyer',
+    'accounting': 'office=accountant',
+    'insurance': 'office=insurance',
+    'realestate': 'office=estate_agent',
+    'marketing': 'office',
+    'consulting': 'office',
+    'construction': 'craft',
+    'restaurant': 'amenity=restaurant',
+    'shop': 'shop',
+    'office': 'office',
+    'hotel': 'tourism=hotel',
+    'gym': 'leisure=fitness_centre',
+    'beauty': 'shop=beauty',
+    'automotive': 'shop=car_repair',
+    'retail': 'shop',
+    'service': 'craft',
+}
+
+def business_type_label(business_type: str) -> str:
+    """Bounded-cardinality metric label for a (possibly free-text) business type"""
+    business_type = business_type.lower()
+    return business_type if business_type in OSM_BUSINESS_TAGS else "custom"
+
 # AI-powered business type mapping for custom search
 def map_custom_search_to_osm_tags(search_term: str) -> str:
     """Map custom search terms to OSM tags using pattern matching"""
@@ -108,101 +1035,470 @@ def map_custom_search_to_osm_tags(search_term: str) -> str:
     return 'office'
 
 # Utility functions
+@observe_upstream("geocode_location")
 async def geocode_location(location: str) -> tuple:
     """Geocode location using Nominatim (OpenStreetMap)"""
+    await upstream_turn("geocode")
     try:
         encoded_location = urllib.parse.quote(location)
-        url = f"https://nominatim.openstreetmap.org/search?format=json&q={encoded_location}&limit=1"
+        url = f"{NOMINATIM_URL}?format=json&q={encoded_location}&limit=1"
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers={"User-Agent": "Prospect Lead Intelligence 1.0"})
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    return float(data[0]['lat']), float(data[0]['lon'])
+        response = await upstream_client().get(url, headers={"User-Agent": "Prospect Lead Intelligence 1.0"})
+        if response.status_code == 200:
+            data = response.json()
+            if data:
+                return float(data[0]['lat']), float(data[0]['lon'])
     except Exception as e:
         logger.error(f"Geocoding error: {e}")
+        UPSTREAM_ERRORS.inc(upstream="geocode_location")
     return None, None
 
-async def fetch_businesses_from_overpass(lat: float, lon: float, radius: float, business_type: str) -> List[Dict]:
+def resolve_osm_tag(business_type: str) -> str:
+    """OSM tag filter for a business type, falling back to custom search mapping"""
+    tag_query = OSM_BUSINESS_TAGS.get(business_type.lower())
+    if not tag_query:
+        tag_query = map_custom_search_to_osm_tags(business_type)
+    return tag_query
+
+def overpass_area_clauses(tag_query: str, lat: float, lon: float, radius: float) -> str:
+    return f"""
+          node[{tag_query}](around:{radius*1000},{lat},{lon});
+          way[{tag_query}](around:{radius*1000},{lat},{lon});
+          relation[{tag_query}](around:{radius*1000},{lat},{lon});"""
+
+def build_overpass_query(clauses: List[str], timeout: int = 25) -> str:
+    return f"""
+        [out:json][timeout:{timeout}];
+        ({"".join(clauses)}
+        );
+        out center meta;
+        """
+
+def element_matches_tag(element: Dict, tag_query: str) -> bool:
+    """Whether an element satisfies an Overpass [key] or [key=value] filter"""
+    key, _, value = tag_query.partition('=')
+    tags = element.get('tags', {})
+    return tags.get(key) == value if value else key in tags
+
+def element_coordinates(element: Dict) -> tuple:
+    """Node position, or the center Overpass computed for ways and relations"""
+    if element['type'] == 'node':
+        return element.get('lat'), element.get('lon')
+    center = element.get('center', {})
+    return center.get('lat'), center.get('lon')
+
+class OverpassElements(list):
+    """Elements parsed from an Overpass response.
+
+    complete is False when parsing stopped early or the response was cut off, in
+    which case absence of an element says nothing about whether it still exists.
+    """
+    complete = True
+
+    @classmethod
+    def failed(cls) -> "OverpassElements":
+        elements = cls()
+        elements.complete = False
+        return elements
+
+ELEMENTS_ARRAY_RE = re.compile(r'"elements"\s*:\s*\[')
+
+class OverpassStreamParser:
+    """Incrementally decodes the "elements" array of an Overpass JSON response.
+
+    Only the unparsed tail of the stream is buffered, so memory stays bounded by
+    the chunk size plus one element rather than the whole response body.
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self.in_elements = False
+        self.finished = False
+
+    def feed(self, chunk: bytes) -> List[Dict]:
+        if self.finished:
+            return []
+        self._buffer += self._text.decode(chunk)
+        if not self.in_elements:
+            match = ELEMENTS_ARRAY_RE.search(self._buffer)
+            if not match:
+                return []
+            self._buffer = self._buffer[match.end():]
+            self.in_elements = True
+
+        elements = []
+        buffer, pos, end = self._buffer, 0, len(self._buffer)
+        while True:
+            while pos < end and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos >= end:
+                break
+            if buffer[pos] == ']':
+                self.finished = True
+                break
+            try:
+                element, pos = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # element continues in the next chunk
+            elements.append(element)
+        self._buffer = "" if self.finished else buffer[pos:]
+        return elements
+
+_upstream_client: Optional[tuple] = None  # (event loop, client)
+
+def upstream_client() -> httpx.AsyncClient:
+    """Connection-pooled client shared by upstream calls made on the running event loop"""
+    global _upstream_client
+    loop = asyncio.get_running_loop()
+    if _upstream_client is None or _upstream_client[0] is not loop or _upstream_client[1].is_closed:
+        _upstream_client = (loop, httpx.AsyncClient(timeout=UPSTREAM_TIMEOUT))
+    return _upstream_client[1]
+
+@app.on_event("shutdown")
+async def close_upstream_client():
+    if _upstream_client is not None and _upstream_client[0] is asyncio.get_running_loop():
+        await _upstream_client[1].aclose()
+
+class OverpassEndpoint:
+    """One Overpass instance and its recent time-to-first-byte samples"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.first_byte = deque(maxlen=OVERPASS_LATENCY_WINDOW)
+        self.consecutive_failures = 0
+        self.benched_until = 0.0
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.first_byte) < OVERPASS_MIN_SAMPLES:
+            return None
+        samples = sorted(self.first_byte)
+        return samples[min(len(samples) - 1, int(q / 100 * len(samples)))]
+
+    def benched(self) -> bool:
+        return time.monotonic() < self.benched_until
+
+    def hedge_delay(self) -> float:
+        p95 = self.percentile(95)
+        return OVERPASS_HEDGE_DEFAULT_DELAY if p95 is None else max(OVERPASS_HEDGE_MIN_DELAY, p95)
+
+    def record_success(self, first_byte: float) -> None:
+        self.first_byte.append(first_byte)
+        self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        extra = self.consecutive_failures - OVERPASS_FAILURE_THRESHOLD
+        if extra >= 0:
+            self.benched_until = time.monotonic() + OVERPASS_COOLDOWN * 2 ** min(extra, 4)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "samples": len(self.first_byte),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "consecutive_failures": self.consecutive_failures,
+            "benched": self.benched(),
+        }
+
+class OverpassPool:
+    """Latency-ranked Overpass endpoints plus the token budget that caps hedging"""
+
+    def __init__(self, urls: List[str]):
+        self.endpoints = [OverpassEndpoint(url) for url in urls]
+        self.hedge_tokens = 1.0
+
+    def ranked(self) -> List[OverpassEndpoint]:
+        """Healthy endpoints fastest first, benched ones last as a final resort"""
+        def key(endpoint: OverpassEndpoint) -> tuple:
+            median = endpoint.percentile(50)
+            return (endpoint.benched(), median if median is not None else OVERPASS_HEDGE_DEFAULT_DELAY / 2)
+        ranked = sorted(self.endpoints, key=key)
+        if len(ranked) > 1 and not ranked[1].benched() and random.random() < OVERPASS_EXPLORE_RATE:
+            ranked[0], ranked[1] = ranked[1], ranked[0]
+        return ranked
+
+    def earn_hedge(self) -> None:
+        self.hedge_tokens = min(10.0, self.hedge_tokens + OVERPASS_HEDGE_BUDGET)
+
+    def spend_hedge(self) -> bool:
+        if self.hedge_tokens < 1.0:
+            return False
+        self.hedge_tokens -= 1.0
+        return True
+
+overpass_pool = OverpassPool(OVERPASS_URLS)
+
+async def overpass_attempt(endpoint: OverpassEndpoint, overpass_query: str, timeout: float,
+                           max_elements: Optional[int], winner: asyncio.Future) -> OverpassElements:
+    """POST a query to one endpoint; only the first attempt to get a 200 goes on to parse its body"""
+    start = time.perf_counter()
+    try:
+        async with upstream_client().stream("POST", endpoint.url, content=overpass_query, timeout=timeout) as response:
+            if response.status_code != 200:
+                endpoint.record_failure()
+                OVERPASS_ATTEMPTS.inc(outcome=f"http_{response.status_code}")
+                raise httpx.HTTPStatusError(f"Overpass returned {response.status_code}",
+                                            request=response.request, response=response)
+            endpoint.record_success(time.perf_counter() - start)
+            if winner.done():
+                OVERPASS_ATTEMPTS.inc(outcome="lost")
+                return OverpassElements.failed()
+            winner.set_result(asyncio.current_task())
+            OVERPASS_ATTEMPTS.inc(outcome="won")
+            
+            elements = OverpassElements()
+            parser = OverpassStreamParser()
+            chunks = response.aiter_bytes(OVERPASS_STREAM_CHUNK_BYTES)
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), deadline_timeout())
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    # Out of time: keep the elements parsed so far
+                    current_deadline.get().expire("fetch")
+                    elements.complete = False
+                    return elements
+                # Decoding runs in a worker thread so dense areas don't stall the event loop
+                elements.extend(await asyncio.to_thread(parser.feed, chunk))
+                if max_elements is not None and len(elements) >= max_elements:
+                    del elements[max_elements:]
+                    elements.complete = False
+                    return elements
+    except httpx.TransportError:
+        endpoint.record_failure()
+        OVERPASS_ATTEMPTS.inc(outcome="error")
+        raise
+    except asyncio.CancelledError:
+        if not winner.done() or winner.result() is not asyncio.current_task():
+            OVERPASS_ATTEMPTS.inc(outcome="cancelled")
+        raise
+    if not parser.finished:
+        # Overpass reports timeouts as a 200 with a truncated element list
+        logger.warning("Overpass response ended before the element list was complete")
+        elements.complete = False
+    return elements
+
+async def post_overpass_query(overpass_query: str, timeout: float = 30.0,
+                              max_elements: Optional[int] = None) -> OverpassElements:
+    """POST a query and parse the streamed response, stopping after max_elements.
+
+    Goes to the fastest endpoint; a hedge is sent to the next one when no
+    response has started within the first endpoint's p95, and a failed attempt
+    is retried on the next endpoint straight away. The first 200 wins and the
+    other attempts are cancelled. Under a request deadline, a query that has
+    not started returning elements by the cutoff comes back empty and incomplete.
+    """
+    await upstream_turn("overpass")
+    deadline = current_deadline.get()
+    if deadline is not None:
+        if deadline.timeout() <= 0:
+            deadline.expire("fetch")
+            return OverpassElements.failed()
+        timeout = min(timeout, deadline.timeout())
+    endpoints = iter(overpass_pool.ranked())
+    winner: asyncio.Future = asyncio.get_running_loop().create_future()
+    overpass_pool.earn_hedge()
+    first = next(endpoints)
+    attempts = {asyncio.create_task(overpass_attempt(first, overpass_query, timeout, max_elements, winner))}
+    launched, last_error = 1, None
+    loop = asyncio.get_running_loop()
+    hedge_at = loop.time() + first.hedge_delay() if len(overpass_pool.endpoints) > 1 else None
+    
+    def launch_next(reason: str) -> bool:
+        nonlocal launched
+        endpoint = next(endpoints, None)
+        if endpoint is None or launched >= OVERPASS_MAX_ATTEMPTS:
+            return False
+        launched += 1
+        OVERPASS_HEDGES.inc(reason=reason)
+        attempts.add(asyncio.create_task(overpass_attempt(endpoint, overpass_query, timeout, max_elements, winner)))
+        return True
+    
+    try:
+        while not winner.done():
+            if not attempts:
+                if last_error is not None:
+                    raise last_error
+                return OverpassElements.failed()
+            hedge_pending = hedge_at is not None and launched < OVERPASS_MAX_ATTEMPTS
+            wait = max(0.0, hedge_at - loop.time()) if hedge_pending else None
+            if deadline is not None:
+                wait = deadline.timeout() if wait is None else min(wait, deadline.timeout())
+            done, _ = await asyncio.wait(attempts | {winner}, return_when=asyncio.FIRST_COMPLETED, timeout=wait)
+            if not done and deadline is not None and deadline.timeout() <= 0:
+                deadline.expire("fetch")
+                return OverpassElements.failed()
+            if not done:
+                # Slow primary: hedge once, if the budget allows
+                if overpass_pool.spend_hedge():
+                    launch_next("slow")
+                hedge_at = None
+                continue
+            for attempt in done & attempts:
+                attempts.discard(attempt)
+                error = attempt.exception()
+                if error is not None:
+                    last_error = error
+                    if not winner.done():
+                        launch_next("failed")
+        winning = winner.result()
+        for attempt in attempts - {winning}:
+            attempt.cancel()
+        return await winning
+    finally:
+        for attempt in attempts:
+            attempt.cancel()
+
+@observe_upstream("fetch_businesses_from_overpass")
+async def fetch_businesses_from_overpass(lat: float, lon: float, radius: float, business_type: str,
+                                         max_elements: Optional[int] = None) -> List[Dict]:
     """Fetch businesses from OpenStreetMap using Overpass API"""
     try:
-        # Enhanced business type mapping for lead generation
-        osm_tags = {
-            'saas': 'office',
-            'software': 'office',
-            'tech': 'office',
-            'startup': 'office',
-            'fintech': 'office=financial',
-            'healthcare': 'amenity=clinic',
-            'dental': 'amenity=dentist',
-            'medical': 'amenity=clinic',
-            'legal': 'office=lawyer',
-            'law': 'office=lawyer',
-            'accounting': 'office=accountant',
-            'insurance': 'office=insurance',
-            'realestate': 'office=estate_agent',
-            'marketing': 'office',
-            'consulting': 'office',
-            'construction': 'craft',
-            'restaurant': 'amenity=restaurant',
-            'shop': 'shop',
-            'office': 'office',
-            'hotel': 'tourism=hotel',
-            'gym': 'leisure=fitness_centre',
-            'beauty': 'shop=beauty',
-            'automotive': 'shop=car_repair',
-            'retail': 'shop',
-            'service': 'craft',
-        }
-        
         # Use custom mapping for AI-powered search
-        tag_query = osm_tags.get(business_type.lower())
-        if not tag_query:
-            tag_query = map_custom_search_to_osm_tags(business_type)
+        tag_query = resolve_osm_tag(business_type)
         
         # Build Overpass query
-        overpass_query = f"""
-        [out:json][timeout:25];
-        (
-          node[{tag_query}](around:{radius*1000},{lat},{lon});
-          way[{tag_query}](around:{radius*1000},{lat},{lon});
-          relation[{tag_query}](around:{radius*1000},{lat},{lon});
-        );
+        overpass_query = build_overpass_query([overpass_area_clauses(tag_query, lat, lon, radius)])
+        return await post_overpass_query(overpass_query, max_elements=max_elements)
+    except Exception as e:
+        logger.error(f"Overpass API error: {e}")
+        UPSTREAM_ERRORS.inc(upstream="fetch_businesses_from_overpass")
+    return OverpassElements.failed()
+
+def build_overpass_annulus_query(tag_query: str, lat: float, lon: float, inner_km: float, outer_km: float,
+                                 timeout: int = 25) -> str:
+    """Query for the ring between two radii, so a wider search only downloads what is new"""
+    return f"""
+        [out:json][timeout:{timeout}];
+        ({overpass_area_clauses(tag_query, lat, lon, outer_km)}
+        )->.outer;
+        ({overpass_area_clauses(tag_query, lat, lon, inner_km)}
+        )->.inner;
+        (.outer; - .inner;);
         out center meta;
         """
-        
-        url = "https://overpass-api.de/api/interpreter"
-        
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, data=overpass_query)
-            if response.status_code == 200:
-                return response.json().get('elements', [])
+
+@observe_upstream("fetch_overpass_annulus")
+async def fetch_overpass_annulus(lat: float, lon: float, inner_km: float, outer_km: float, business_type: str,
+                                 max_elements: Optional[int] = None) -> List[Dict]:
+    """Fetch the elements between inner_km and outer_km of a point"""
+    try:
+        overpass_query = build_overpass_annulus_query(resolve_osm_tag(business_type), lat, lon, inner_km, outer_km)
+        return await post_overpass_query(overpass_query, max_elements=max_elements)
+    except Exception as e:
+        logger.error(f"Overpass API error: {e}")
+        UPSTREAM_ERRORS.inc(upstream="fetch_overpass_annulus")
+    return OverpassElements.failed()
+
+def overpass_bbox_clauses(tag_query: str, bbox: tuple) -> str:
+    south, west, north, east = bbox
+    return f"""
+          node[{tag_query}]({south},{west},{north},{east});
+          way[{tag_query}]({south},{west},{north},{east});
+          relation[{tag_query}]({south},{west},{north},{east});"""
+
+def tile_bboxes(lat: float, lon: float, radius_km: float, tile_km: float) -> List[tuple]:
+    """Square (south, west, north, east) tiles of about tile_km covering a circle"""
+    count = max(1, math.ceil(2 * radius_km / tile_km))
+    lat_step = 2 * radius_km / count / 111.0
+    lon_step = 2 * radius_km / count / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+    south_edge = lat - radius_km / 111.0
+    west_edge = lon - lon_step * count / 2
+    tiles = []
+    for row in range(count):
+        for col in range(count):
+            south, west = south_edge + row * lat_step, west_edge + col * lon_step
+            north, east = south + lat_step, west + lon_step
+            # Skip corner tiles that lie entirely outside the circle
+            nearest_lat, nearest_lon = min(max(lat, south), north), min(max(lon, west), east)
+            if haversine_km(lat, lon, nearest_lat, nearest_lon) <= radius_km:
+                tiles.append((south, west, north, east))
+    return tiles
+
+@observe_upstream("fetch_overpass_tile")
+async def fetch_overpass_tile(bbox: tuple, business_type: str, max_elements: Optional[int] = None) -> List[Dict]:
+    """Fetch one bounding-box tile of a large-area search"""
+    try:
+        overpass_query = build_overpass_query([overpass_bbox_clauses(resolve_osm_tag(business_type), bbox)])
+        return await post_overpass_query(overpass_query, max_elements=max_elements)
+    except Exception as e:
+        logger.error(f"Overpass API error: {e}")
+        UPSTREAM_ERRORS.inc(upstream="fetch_overpass_tile")
+    return OverpassElements.failed()
+
+async def fetch_businesses_tiled(lat: float, lon: float, radius: float, business_type: str) -> OverpassElements:
+    """Fetch a search area, splitting large radii into concurrently queried tiles.
+
+    Elements are deduplicated across tiles (ways can span several) and clipped to
+    the search circle. The result is incomplete if any tile was.
+    """
+    if radius <= SEARCH_TILE_KM:
+        return await fetch_businesses_from_overpass(lat, lon, radius, business_type,
+                                                    max_elements=SEARCH_MAX_ELEMENTS_PER_TILE)
+    semaphore = asyncio.Semaphore(SEARCH_TILE_CONCURRENCY)
+
+    async def fetch_tile(bbox: tuple) -> List[Dict]:
+        async with semaphore:
+            return await fetch_overpass_tile(bbox, business_type, max_elements=SEARCH_MAX_ELEMENTS_PER_TILE)
+
+    tile_km = max(SEARCH_TILE_KM, 2 * radius / SEARCH_MAX_TILES_PER_SIDE)
+    tiles = await asyncio.gather(*(fetch_tile(bbox) for bbox in tile_bboxes(lat, lon, radius, tile_km)))
+    merged = OverpassElements()
+    seen = set()
+    for tile_elements in tiles:
+        if not getattr(tile_elements, "complete", True):
+            merged.complete = False
+        for element in tile_elements:
+            key = (element.get('type'), element.get('id'))
+            if key in seen:
+                continue
+            seen.add(key)
+            element_lat, element_lon = element_coordinates(element)
+            if element_lat is not None and element_lon is not None \
+                    and haversine_km(lat, lon, element_lat, element_lon) <= radius:
+                merged.append(element)
+    return merged
+
+@observe_upstream("fetch_overpass_union")
+async def fetch_overpass_union(areas: List[tuple], timeout: int = 60,
+                               max_elements: Optional[int] = None) -> List[Dict]:
+    """Fetch several (tag_query, lat, lon, radius) areas with a single Overpass union query"""
+    try:
+        clauses = [overpass_area_clauses(*area) for area in areas]
+        return await post_overpass_query(build_overpass_query(clauses, timeout), timeout=timeout + 5,
+                                         max_elements=max_elements)
     except Exception as e:
         logger.error(f"Overpass API error: {e}")
-    return []
+        UPSTREAM_ERRORS.inc(upstream="fetch_overpass_union")
+    return OverpassElements.failed()
 
+@observe_upstream("fetch_company_info")
 async def fetch_company_info(company_name: str) -> Dict:
     """Fetch company info from OpenCorporates (no API key required for basic search)"""
+    await upstream_turn("company")
     try:
         encoded_name = urllib.parse.quote(company_name)
-        url = f"https://api.opencorporates.com/v0.4/companies/search?q={encoded_name}&format=json&limit=1"
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            if response.status_code == 200:
-                data = response.json()
-                companies = data.get('results', {}).get('companies', [])
-                if companies:
-                    company = companies[0]['company']
-                    return {
-                        'name': company.get('name', ''),
-                        'status': company.get('company_type', ''),
-                        'address': company.get('registered_address_in_full', ''),
-                        'incorporation_date': company.get('incorporation_date', ''),
-                    }
+        url = f"{OPENCORPORATES_URL}?q={encoded_name}&format=json&limit=1"
+        
+        response = await upstream_client().get(url)
+        if response.status_code == 200:
+            data = response.json()
+            companies = data.get('results', {}).get('companies', [])
+            if companies:
+                company = companies[0]['company']
+                return {
+                    'name': company.get('name', ''),
+                    'status': company.get('company_type', ''),
+                    'address': company.get('registered_address_in_full', ''),
+                    'incorporation_date': company.get('incorporation_date', ''),
+                }
     except Exception as e:
         logger.error(f"OpenCorporates error: {e}")
+        UPSTREAM_ERRORS.inc(upstream="fetch_company_info")
     return {}
 
 def calculate_lead_quality_score(business_data: Dict, company_info: Dict) -> int:
@@ -242,6 +1538,20 @@ def calculate_lead_quality_score(business_data: Dict, company_info: Dict) -> int
     
     return max(0, min(100, score))
 
+PHONE_STRIP_RE = re.compile(r'[^\d+\-\(\)\s]')
+
+def clean_phone(phone: Optional[str]) -> Optional[str]:
+    """Strip everything but digits, +, -, parentheses and whitespace from a phone number"""
+    if phone:
+        return PHONE_STRIP_RE.sub('', phone)
+    return phone
+
+def normalize_website(website: Optional[str]) -> Optional[str]:
+    """Ensure a website URL carries a scheme"""
+    if website and not website.startswith(('http://', 'https://')):
+        return 'https://' + website
+    return website
+
 def determine_lead_status(quality_score: int) -> str:
     """Determine lead status with higher thresholds for B2B"""
     if quality_score >= 85:
@@ -253,7 +1563,39 @@ def determine_lead_status(quality_score: int) -> str:
     else:
         return "unqualified"  # Poor quality leads
 
-async def process_osm_business(element: Dict, business_type: str) -> Optional[Dict]:
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in km"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Dict[str, Dict[str, float]]:
+    """Mongo range filter on lat/lon covering a circle"""
+    lat_delta = radius_km / 111.0
+    lon_delta = radius_km / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+    return {
+        "lat": {"$gte": lat - lat_delta, "$lte": lat + lat_delta},
+        "lon": {"$gte": lon - lon_delta, "$lte": lon + lon_delta},
+    }
+
+def osm_lead_id(osm_type: str, osm_id: int) -> str:
+    """Stable lead id derived from the OSM element identity"""
+    return f"osm-{osm_type}-{osm_id}"
+
+def osm_address(tags: Dict, lat: float, lon: float) -> str:
+    """Address of an OSM element from its addr:* tags, or a location description"""
+    address_parts = []
+    for key in ['addr:housenumber', 'addr:street', 'addr:city', 'addr:state', 'addr:postcode']:
+        if tags.get(key):
+            address_parts.append(tags[key])
+    if not address_parts:
+        return f"Near {lat:.4f}, {lon:.4f}"
+    return ', '.join(address_parts)
+
+async def process_osm_business(element: Dict, business_type: str, timings: Optional[Dict[str, float]] = None,
+                               company_info_fetcher=None) -> Optional[Dict]:
     """Process OSM element into business data"""
     try:
         tags = element.get('tags', {})
@@ -268,42 +1610,24 @@ async def process_osm_business(element: Dict, business_type: str) -> Optional[Di
             return None
         
         # Get coordinates
-        if element['type'] == 'node':
-            lat, lon = element['lat'], element['lon']
-        else:
-            center = element.get('center', {})
-            lat, lon = center.get('lat'), center.get('lon')
+        lat, lon = element_coordinates(element)
         
         if not lat or not lon:
             return None
         
-        # Build comprehensive address
-        address_parts = []
-        for key in ['addr:housenumber', 'addr:street', 'addr:city', 'addr:state', 'addr:postcode']:
-            if tags.get(key):
-                address_parts.append(tags[key])
-        
-        if not address_parts:
-            # Fallback to location description
-            address = f"Near {lat:.4f}, {lon:.4f}"
-        else:
-            address = ', '.join(address_parts)
+        address = osm_address(tags, lat, lon)
         
         # Extract enhanced contact info
         phone = tags.get('phone', tags.get('contact:phone', tags.get('telephone')))
         website = tags.get('website', tags.get('contact:website', tags.get('url')))
         email = tags.get('email', tags.get('contact:email'))
         
-        # Clean phone number
-        if phone:
-            phone = re.sub(r'[^\d+\-\(\)\s]', '', phone)
-        
-        # Clean website URL
-        if website and not website.startswith(('http://', 'https://')):
-            website = 'https://' + website
+        phone = clean_phone(phone)
+        website = normalize_website(website)
         
         # Get company info for verification (important for B2B leads)
-        company_info = await fetch_company_info(name)
+        with stage_timer(timings, "enrich"):
+            company_info = await (company_info_fetcher or fetch_company_info)(name)
         
         business_data = {
             'name': name,
@@ -316,11 +1640,14 @@ async def process_osm_business(element: Dict, business_type: str) -> Optional[Di
             'lon': lon,
         }
         
-        quality_score = calculate_lead_quality_score(business_data, company_info)
-        lead_status = determine_lead_status(quality_score)
+        with stage_timer(timings, "score"):
+            quality_score = calculate_lead_quality_score(business_data, company_info)
+            lead_status = determine_lead_status(quality_score)
         
         return {
-            'id': str(uuid.uuid4()),
+            'id': osm_lead_id(element['type'], element['id']),
+            'osm_type': element['type'],
+            'osm_id': element['id'],
             'name': name,
             'business_type': business_type,
             'address': address,
@@ -338,94 +1665,2081 @@ async def process_osm_business(element: Dict, business_type: str) -> Optional[Di
         logger.error(f"Error processing OSM business: {e}")
         return None
 
-# API Routes
-@app.get("/api/health")
-async def health_check():
-    return {"status": "healthy", "message": "Prospect Lead Intelligence API is running"}
+# Analytics rollups: per-business-type and per-region counters kept in step with every
+# write to the businesses collection, so dashboards read a handful of documents
+ROLLUP_FIELDS = {"_id": 0, "business_type": 1, "lead_status": 1, "quality_score": 1, "lat": 1, "lon": 1}
+ROLLUP_REGION_DEGREES = 1.0
+SCORE_BUCKETS = [f"{low}-{low + 9}" for low in range(0, 90, 10)] + ["90-100"]
 
-@app.post("/api/search-businesses")
-async def search_businesses(search: BusinessSearch):
-    """Search for businesses using OpenStreetMap data with AI-powered search understanding"""
-    try:
-        # Geocode location if coordinates not provided
-        if not search.lat or not search.lon:
-            lat, lon = await geocode_location(search.location)
-            if not lat or not lon:
-                raise HTTPException(status_code=400, detail="Could not geocode location")
-        else:
-            lat, lon = search.lat, search.lon
-        
-        # Fetch businesses from Overpass API
-        osm_elements = await fetch_businesses_from_overpass(lat, lon, search.radius, search.business_type)
-        
-        # Process businesses with enhanced filtering
-        businesses = []
-        processed_names = set()  # Avoid duplicates
-        
-        for element in osm_elements[:100]:  # Process more elements but filter better
-            business = await process_osm_business(element, search.business_type)
-            if business and business['name'] not in processed_names:
-                # Only include businesses with reasonable quality scores for lead generation
-                if business['quality_score'] >= 30:  # Minimum threshold
-                    businesses.append(business)
-                    processed_names.add(business['name'])
-        
-        # Sort by quality score (highest first)
-        businesses.sort(key=lambda x: x['quality_score'], reverse=True)
-        
-        # Limit results to top prospects
-        businesses = businesses[:50]
-        
-        # Store in database
-        if businesses:
-            # Clear old results for this search type and location
-            businesses_collection.delete_many({
-                "business_type": search.business_type,
-                "last_updated": {"$lt": datetime.now()}
-            })
-            
-            # Insert new results
-            for business in businesses:
-                businesses_collection.update_one(
-                    {"name": business["name"], "address": business["address"]},
-                    {"$set": business},
-                    upsert=True
-                )
-        
-        return {
-            "businesses": businesses,
-            "total": len(businesses),
-            "search_location": {"lat": lat, "lon": lon},
-            "message": f"Found {len(businesses)} qualified prospects for {search.business_type} in {search.location}"
-        }
-        
-    except Exception as e:
-        logger.error(f"Search error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+def score_bucket(score: Optional[int]) -> str:
+    return SCORE_BUCKETS[min(max(int(score or 0), 0) // 10, 9)]
 
-@app.get("/api/businesses")
-async def get_businesses(
-    business_type: Optional[str] = None,
-    min_quality_score: int = 60,
+def region_cell(lat: Optional[float], lon: Optional[float]) -> Optional[tuple]:
+    """South-west corner of the region grid cell containing a point"""
+    if lat is None or lon is None:
+        return None
+    return (math.floor(lat / ROLLUP_REGION_DEGREES) * ROLLUP_REGION_DEGREES,
+            math.floor(lon / ROLLUP_REGION_DEGREES) * ROLLUP_REGION_DEGREES)
+
+def rollup_contributions(doc: Dict) -> List[tuple]:
+    """(rollup _id, identifying fields, counter deltas) a lead document adds to"""
+    status = doc.get("lead_status") or "unknown"
+    business_type = doc.get("business_type") or "unknown"
+    contributions = [(
+        f"type:{business_type}",
+        {"kind": "business_type", "business_type": business_type},
+        {"count": 1, f"by_status.{status}": 1, f"score_histogram.{score_bucket(doc.get('quality_score'))}": 1},
+    )]
+    cell = region_cell(doc.get("lat"), doc.get("lon"))
+    if cell:
+        contributions.append((
+            f"region:{cell[0]}:{cell[1]}",
+            {"kind": "region", "lat": cell[0], "lon": cell[1], "size_degrees": ROLLUP_REGION_DEGREES},
+            {"count": 1, f"by_status.{status}": 1},
+        ))
+    return contributions
+
+# Map clusters: for every zoom below CLUSTER_POINTS_ZOOM each lead is counted in one grid cell
+# (a Web Mercator tile CLUSTER_CELL_SHIFT levels deeper than the zoom, i.e. 64px on screen),
+# per business type and status, so the map reads at most one cell per 64px of viewport
+CLUSTER_POINTS_ZOOM = int(os.environ.get('CLUSTER_POINTS_ZOOM', '16'))  # from here on individual leads are served
+CLUSTER_CELL_SHIFT = 2
+# Cells are stored every CLUSTER_ZOOM_STEP zooms, counting down from CLUSTER_POINTS_ZOOM - 1; a zoom in
+# between merges the 4 (or 16, ...) finer cells of the next stored zoom. Deep zooms hold about one lead per
+# cell, so each stored zoom costs close to one upsert per lead written; a step of 2 halves those writes
+CLUSTER_ZOOM_STEP = max(1, int(os.environ.get('CLUSTER_ZOOM_STEP', '2')))
+CLUSTER_MAX_POINTS = int(os.environ.get('CLUSTER_MAX_POINTS', '2000'))
+MERCATOR_MAX_LAT = 85.0511287798
+
+def mercator_fraction(lat: float, lon: float) -> tuple:
+    """Position of a point on the Web Mercator square, both axes in [0, 1)"""
+    lat = min(max(lat, -MERCATOR_MAX_LAT), MERCATOR_MAX_LAT)
+    x = (lon + 180.0) / 360.0
+    y = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0
+    return min(max(x, 0.0), 1.0 - 1e-12), min(max(y, 0.0), 1.0 - 1e-12)
+
+def cluster_cell(lat: float, lon: float, zoom: int) -> tuple:
+    """(x, y) of the cluster grid cell containing a point at a zoom level"""
+    x, y = mercator_fraction(lat, lon)
+    cells = 1 << (zoom + CLUSTER_CELL_SHIFT)
+    return int(x * cells), int(y * cells)
+
+def stored_cluster_zoom(zoom: int) -> int:
+    """The zoom whose stored cells serve clusters at `zoom` (the same zoom or a finer one)"""
+    return zoom + (CLUSTER_POINTS_ZOOM - 1 - zoom) % CLUSTER_ZOOM_STEP
+
+def cluster_cell_bounds(x: int, y: int, zoom: int) -> List[float]:
+    """[south, west, north, east] of a cluster grid cell"""
+    cells = 1 << (zoom + CLUSTER_CELL_SHIFT)
+    def cell_lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / cells))))
+    return [cell_lat(y + 1), x / cells * 360.0 - 180.0, cell_lat(y), (x + 1) / cells * 360.0 - 180.0]
+
+def cluster_contributions(doc: Dict) -> List[tuple]:
+    """(cluster cell _id, identifying fields, counter deltas) of a lead document at every stored zoom"""
+    lat, lon = doc.get("lat"), doc.get("lon")
+    if lat is None or lon is None:
+        return []
+    status = doc.get("lead_status") or "unknown"
+    business_type = doc.get("business_type") or "unknown"
+    score = int(doc.get("quality_score") or 0)
+    counters = {"count": 1, "lat_sum": lat, "lon_sum": lon, "score_sum": score,
+                f"score_histogram.{score_bucket(score)}": 1}
+    fx, fy = mercator_fraction(lat, lon)
+    contributions = []
+    for zoom in range(CLUSTER_POINTS_ZOOM - 1, -1, -CLUSTER_ZOOM_STEP):
+        cells = 1 << (zoom + CLUSTER_CELL_SHIFT)
+        x, y = int(fx * cells), int(fy * cells)
+        contributions.append((
+            f"{zoom}:{x}:{y}:{business_type}:{status}",
+            {"zoom": zoom, "x": x, "y": y, "business_type": business_type, "lead_status": status},
+            counters,
+        ))
+    return contributions
+
+def accumulate_counter_deltas(contributions, docs: List[Dict], sign: int, deltas: Dict, identities: Dict) -> None:
+    for doc in docs:
+        for key, identity, fields in contributions(doc):
+            identities[key] = identity
+            counters = deltas.setdefault(key, {})
+            for field, amount in fields.items():
+                counters[field] = counters.get(field, 0) + sign * amount
+
+def apply_rollup_changes(removed: List[Dict] = (), added: List[Dict] = ()) -> None:
+    """Apply the counter deltas of replacing/removing/adding lead documents to the analytics
+    rollups and the map cluster cells, one bulk write per collection.
+
+    Deltas are summed per counter document over the whole write and zero deltas
+    are dropped: re-storing unchanged leads writes nothing, and the leads of one
+    search share their coarse cells (400 new leads in a 5 km radius upsert about
+    650 cells, against 3200 if every lead wrote all 8 stored zooms).
+    """
+    for collection, contributions in ((lead_rollups_collection, rollup_contributions),
+                                      (lead_clusters_collection, cluster_contributions)):
+        deltas: Dict[str, Dict[str, float]] = {}
+        identities: Dict[str, Dict] = {}
+        accumulate_counter_deltas(contributions, removed, -1, deltas, identities)
+        accumulate_counter_deltas(contributions, added, 1, deltas, identities)
+        operations = []
+        for key, counters in deltas.items():
+            counters = {field: delta for field, delta in counters.items() if delta}
+            if counters:
+                operations.append(UpdateOne(
+                    {"_id": key},
+                    {"$inc": counters, "$setOnInsert": identities[key]},
+                    upsert=True,
+                ))
+        if operations:
+            collection.bulk_write(operations, ordered=False)
+
+def replace_counter_documents(collection, docs: List[Dict]) -> None:
+    """Swap a counter collection's contents for freshly computed documents without emptying it.
+
+    Every document is replaced in place, and only the ones the rebuild no longer
+    produces are deleted afterwards, so readers never see missing counters.
+    """
+    stale = list({doc["_id"] for doc in collection.find({}, {"_id": 1})} - {doc["_id"] for doc in docs})
+    for start in range(0, len(docs), 10000):
+        collection.bulk_write([ReplaceOne({"_id": doc["_id"]}, doc, upsert=True)
+                               for doc in docs[start:start + 10000]], ordered=False)
+    for start in range(0, len(stale), 10000):
+        collection.delete_many({"_id": {"$in": stale[start:start + 10000]}})
+
+def rebuild_lead_rollups() -> int:
+    """Recompute every rollup from the businesses collection (backfills, drift repair).
+
+    Holds lead_write_lock, so this process's searches wait instead of having
+    their increments overwritten; writes from other workers that land while it
+    runs are only corrected by the next rebuild.
+    """
+    with lead_write_lock:
+        return _rebuild_lead_rollups()
+
+def _rebuild_lead_rollups() -> int:
+    status = {"$ifNull": ["$lead_status", "unknown"]}
+    business_type = {"$ifNull": ["$business_type", "unknown"]}
+    bucket = {"$min": [{"$floor": {"$divide": [{"$ifNull": ["$quality_score", 0]}, 10]}}, 9]}
+    type_pipeline = [
+        {"$group": {"_id": {"type": business_type, "status": status, "bucket": bucket}, "count": {"$sum": 1}}},
+    ]
+    region_pipeline = [
+        {"$match": {"lat": {"$type": "number"}, "lon": {"$type": "number"}}},
+        {"$group": {
+            "_id": {
+                "lat": {"$floor": {"$divide": ["$lat", ROLLUP_REGION_DEGREES]}},
+                "lon": {"$floor": {"$divide": ["$lon", ROLLUP_REGION_DEGREES]}},
+                "status": status,
+            },
+            "count": {"$sum": 1},
+        }},
+    ]
+    
+    rollups: Dict[str, Dict] = {}
+    for group in businesses_collection.aggregate(type_pipeline, allowDiskUse=True):
+        key, count = group["_id"], group["count"]
+        rollup = rollups.setdefault(f"type:{key['type']}", {
+            "_id": f"type:{key['type']}", "kind": "business_type", "business_type": key["type"],
+            "count": 0, "by_status": {}, "score_histogram": {},
+        })
+        label = SCORE_BUCKETS[max(int(key["bucket"]), 0)]
+        rollup["count"] += count
+        rollup["by_status"][key["status"]] = rollup["by_status"].get(key["status"], 0) + count
+        rollup["score_histogram"][label] = rollup["score_histogram"].get(label, 0) + count
+    for group in businesses_collection.aggregate(region_pipeline, allowDiskUse=True):
+        key, count = group["_id"], group["count"]
+        lat, lon = key["lat"] * ROLLUP_REGION_DEGREES, key["lon"] * ROLLUP_REGION_DEGREES
+        rollup = rollups.setdefault(f"region:{lat}:{lon}", {
+            "_id": f"region:{lat}:{lon}", "kind": "region", "lat": lat, "lon": lon,
+            "size_degrees": ROLLUP_REGION_DEGREES, "count": 0, "by_status": {},
+        })
+        rollup["count"] += count
+        rollup["by_status"][key["status"]] = rollup["by_status"].get(key["status"], 0) + count
+    
+    replace_counter_documents(lead_rollups_collection, list(rollups.values()))
+    return len(rollups)
+
+def rebuild_lead_clusters() -> int:
+    """Recompute every map cluster cell from the businesses collection, like rebuild_lead_rollups"""
+    with lead_write_lock:
+        return _rebuild_lead_clusters()
+
+def _rebuild_lead_clusters() -> int:
+    deltas: Dict[str, Dict[str, float]] = {}
+    identities: Dict[str, Dict] = {}
+    for doc in businesses_collection.find({"lat": {"$type": "number"}, "lon": {"$type": "number"}}, ROLLUP_FIELDS):
+        accumulate_counter_deltas(cluster_contributions, [doc], 1, deltas, identities)
+    cells = []
+    for key, counters in deltas.items():
+        cell = {"_id": key, **identities[key], "score_histogram": {}}
+        for field, value in counters.items():
+            if field.startswith("score_histogram."):
+                cell["score_histogram"][field.split(".", 1)[1]] = value
+            else:
+                cell[field] = value
+        cells.append(cell)
+    
+    replace_counter_documents(lead_clusters_collection, cells)
+    return len(cells)
+
+def migrate_legacy_lead_ids(businesses: List[Dict], changes: "LeadChanges") -> None:
+    """Move leads stored under random ids onto their OSM-derived ids.
+
+    Leads written before ids were derived from OSM identity are found by
+    (name, address); their favorites are repointed to the new id and the legacy
+    document is removed so the following upsert by id owns the lead.
+    """
+    new_ids = {(b["name"], b["address"]): b["id"] for b in businesses}
+    legacy_docs = list(businesses_collection.find(
+        {
+            "$or": [{"name": name, "address": address} for name, address in new_ids],
+            "id": {"$nin": list(new_ids.values())},
+        },
+        {**ROLLUP_FIELDS, "id": 1, "name": 1, "address": 1},
+    ))
+    for legacy in legacy_docs:
+        repoint_favorites(legacy["id"], new_ids[(legacy["name"], legacy["address"])])
+        businesses_collection.delete_one({"id": legacy["id"]})
+    if legacy_docs:
+        apply_rollup_changes(removed=legacy_docs)
+        changes.publish([lead_event("lead_removed", legacy, replaced_by=new_ids[(legacy["name"], legacy["address"])])
+                         for legacy in legacy_docs])
+        logger.info(f"Migrated {len(legacy_docs)} leads to OSM-derived ids")
+
+def repoint_favorites(old_id: str, new_id: str) -> None:
+    """Move favorites to a lead's new id, dropping those the user already holds on it"""
+    for favorite in favorites_collection.find({"business_id": old_id}, {"_id": 0}):
+        if favorites_collection.find_one({"business_id": new_id, "user_id": favorite["user_id"]}):
+            favorites_collection.delete_one({"id": favorite["id"]})
+        else:
+            favorites_collection.update_one({"id": favorite["id"]}, {"$set": {"business_id": new_id}})
+
+# Favorites of legacy leads the searches never meet again are migrated at startup: each such lead is
+# matched to a stored OSM-derived lead with its name and address, else to the OSM element of that
+# name within LEGACY_MATCH_RADIUS_KM. Leads without a single match are marked legacy_unmatched and
+# left to the search write path.
+LEGACY_MATCH_RADIUS_KM = 0.1
+
+def find_legacy_favorite_leads() -> List[Dict]:
+    """Favorited leads still stored under random ids that no earlier run failed to match"""
+    favorite_ids = [business_id for business_id in favorites_collection.distinct("business_id")
+                    if not business_id.startswith("osm-")]
+    if not favorite_ids:
+        return []
+    return list(businesses_collection.find(
+        {"id": {"$in": favorite_ids}, "legacy_unmatched": {"$exists": False}}, LEAD_PUBLIC_FIELDS))
+
+def osm_match_query(legacy: Dict) -> str:
+    name = legacy["name"].replace("\\", "\\\\").replace('"', '\\"')
+    return build_overpass_query([overpass_area_clauses(f'"name"="{name}"', legacy["lat"], legacy["lon"],
+                                                       LEGACY_MATCH_RADIUS_KM)])
+
+def match_osm_element(legacy: Dict, elements: List[Dict]) -> Optional[Dict]:
+    """The one element a legacy lead was made from: same address if that decides it, else the only candidate"""
+    candidates = [e for e in elements if e.get("tags", {}).get("name") == legacy["name"]
+                  and all(element_coordinates(e))]
+    same_address = [e for e in candidates if osm_address(e["tags"], *element_coordinates(e)) == legacy["address"]]
+    for matches in (same_address, candidates):
+        if len(matches) == 1:
+            return matches[0]
+        if matches:
+            return None  # ambiguous
+    return None
+
+def migrate_legacy_lead(legacy: Dict, element: Optional[Dict]) -> "LeadChanges":
+    """Give a legacy lead its OSM-derived id, or merge it into the stored lead that already has it"""
+    changes = LeadChanges()
+    if element is None:
+        businesses_collection.update_one({"id": legacy["id"]}, {"$set": {"legacy_unmatched": True}})
+        return changes
+    new_id = osm_lead_id(element["type"], element["id"])
+    with lead_write_lock:
+        if businesses_collection.find_one({"id": new_id}, {"_id": 1}):
+            businesses_collection.delete_one({"id": legacy["id"]})
+            apply_rollup_changes(removed=[legacy])
+            events = [lead_event("lead_removed", legacy, replaced_by=new_id)]
+        else:
+            # Renamed in place: the counters it contributes to don't change
+            migrated = {**legacy, "id": new_id, "osm_type": element["type"], "osm_id": element["id"]}
+            businesses_collection.update_one({"id": legacy["id"]}, {"$set": {
+                "id": new_id, "osm_type": element["type"], "osm_id": element["id"]}})
+            events = [lead_event("lead_removed", legacy, replaced_by=new_id),
+                      lead_event("lead_upserted", migrated)]
+        repoint_favorites(legacy["id"], new_id)
+    changes.publish(events)
+    return changes
+
+def stored_osm_match(legacy: Dict) -> Optional[Dict]:
+    """An OSM-derived lead already stored with the legacy lead's name and address, as an element"""
+    stored = businesses_collection.find_one(
+        {"name": legacy["name"], "address": legacy["address"], "osm_id": {"$exists": True}},
+        {"_id": 0, "osm_type": 1, "osm_id": 1})
+    return {"type": stored["osm_type"], "id": stored["osm_id"]} if stored else None
+
+async def migrate_legacy_favorites() -> int:
+    """Move the favorites of every legacy lead onto OSM-derived ids; returns how many leads moved"""
+    migrated = 0
+    for legacy in await asyncio.to_thread(find_legacy_favorite_leads):
+        element = await asyncio.to_thread(stored_osm_match, legacy)
+        if element is None and legacy.get("lat") is not None and legacy.get("lon") is not None:
+            elements = await post_overpass_query(osm_match_query(legacy))
+            if not elements.complete:
+                continue  # try again on the next start
+            element = match_osm_element(legacy, elements)
+        elif element is None:
+            continue
+        changes = await asyncio.to_thread(migrate_legacy_lead, legacy, element)
+        changes.apply()
+        migrated += element is not None
+    return migrated
+
+def remove_vanished_leads(business_type: str, lat: float, lon: float, radius_km: float, osm_elements: List[Dict],
+                          changes: "LeadChanges") -> int:
+    """Delete leads inside the searched circle whose OSM element is no longer returned.
+
+    Only documents of this business type inside the area are read, so the write
+    volume follows the search, not the collection. Favorited leads are kept.
+    """
+    seen_ids = {osm_lead_id(e['type'], e['id']) for e in osm_elements if 'type' in e and 'id' in e}
+    candidates = businesses_collection.find(
+        {"business_type": business_type, "osm_id": {"$exists": True}, **bounding_box(lat, lon, radius_km)},
+        {**ROLLUP_FIELDS, "id": 1},
+    )
+    vanished = [
+        c for c in candidates
+        if c["id"] not in seen_ids and haversine_km(lat, lon, c["lat"], c["lon"]) <= radius_km
+    ]
+    if not vanished:
+        return 0
+    favorited = set(favorites_collection.distinct("business_id", {"business_id": {"$in": [c["id"] for c in vanished]}}))
+    doomed = [c for c in vanished if c["id"] not in favorited]
+    result = businesses_collection.delete_many({"id": {"$in": [c["id"] for c in doomed]}})
+    apply_rollup_changes(removed=doomed)
+    changes.publish([lead_event("lead_removed", doc) for doc in doomed])
+    return result.deleted_count
+
+def sweep_stale_leads(now: Optional[datetime] = None) -> "LeadChanges":
+    """Delete leads not refreshed within LEAD_TTL_HOURS, except favorited ones.
+
+    Runs in a worker thread; the returned changes are applied on the event loop.
+    """
+    cutoff = (now or datetime.now()) - timedelta(hours=LEAD_TTL_HOURS)
+    kept: set = set()
+    changes = LeadChanges()
+    while True:
+        stale = list(businesses_collection.find(
+            {"last_updated": {"$lt": cutoff}, "id": {"$nin": list(kept)}},
+            {**ROLLUP_FIELDS, "id": 1},
+        ).limit(LEAD_SWEEP_BATCH))
+        if not stale:
+            break
+        ids = [doc["id"] for doc in stale]
+        favorited = set(favorites_collection.distinct("business_id", {"business_id": {"$in": ids}}))
+        kept.update(favorited)
+        doomed = [doc for doc in stale if doc["id"] not in favorited]
+        if doomed:
+            businesses_collection.delete_many({"id": {"$in": [doc["id"] for doc in doomed]}})
+            apply_rollup_changes(removed=doomed)
+            changes.publish([lead_event("lead_removed", doc) for doc in doomed])
+        if len(stale) < LEAD_SWEEP_BATCH:
+            break
+    # Cluster cells emptied by removals since the last sweep
+    lead_clusters_collection.delete_many({"count": {"$lte": 0}})
+    return changes
+
+async def run_lead_sweeper():
+    """Periodically sweep stale leads off the event loop"""
+    while True:
+        await asyncio.sleep(LEAD_SWEEP_INTERVAL)
+        try:
+            changes = await asyncio.to_thread(sweep_stale_leads)
+            changes.apply()
+            if changes.touched_types:
+                logger.info(f"Swept stale leads for {sorted(t for t in changes.touched_types if t)}")
+        except Exception as e:
+            logger.error(f"Lead sweep error: {e}")
+
+background_tasks: List[asyncio.Task] = []
+
+async def run_legacy_favorites_migration():
+    try:
+        migrated = await migrate_legacy_favorites()
+        if migrated:
+            logger.info(f"Migrated {migrated} favorited leads to OSM-derived ids")
+    except Exception as e:
+        logger.error(f"Legacy favorites migration error: {e}")
+
+async def run_search_terms_backfill():
+    try:
+        updated = await asyncio.to_thread(backfill_lead_search_terms)
+        if updated:
+            logger.info(f"Backfilled search terms for {updated} leads")
+    except Exception as e:
+        logger.error(f"Search terms backfill error: {e}")
+
+@app.on_event("startup")
+async def start_background_tasks():
+    background_tasks.append(asyncio.create_task(run_lead_sweeper()))
+    background_tasks.append(lead_event_hub.start())
+    if CRAWL_WORKERS > 0:
+        background_tasks.append(website_enricher.start())
+    if lead_replica is not None:
+        background_tasks.append(asyncio.create_task(start_lead_replica()))
+    elif LEAD_REPLICA_ENABLED:
+        logger.warning("LEAD_REPLICA needs numpy; serving reads from MongoDB")
+    background_tasks.append(asyncio.create_task(run_search_terms_backfill()))
+    background_tasks.append(asyncio.create_task(run_legacy_favorites_migration()))
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for task in background_tasks:
+        task.cancel()
+
+@app.on_event("startup")
+def ensure_indexes():
+    """Index the keys the routes look leads and favorites up by"""
+    try:
+        businesses_collection.create_index("id", unique=True)
+        businesses_collection.create_index([("name", 1), ("address", 1)])
+        businesses_collection.create_index("last_updated")
+        businesses_collection.create_index([("business_type", 1), ("lat", 1), ("lon", 1)])
+        businesses_collection.create_index("search_terms")
+        businesses_collection.create_index("website")
+        businesses_collection.create_index(
+            [("name", "text"), ("address", "text"), ("company_info.name", "text"), ("company_info.address", "text")],
+            weights={"name": 10, "company_info.name": 5, "address": 2, "company_info.address": 1},
+            name="lead_text",
+        )
+        favorites_collection.create_index([("business_id", 1), ("user_id", 1)])
+        favorites_collection.create_index("id", unique=True)
+        lead_rollups_collection.create_index("kind")
+        lead_clusters_collection.create_index([("zoom", 1), ("x", 1), ("y", 1)])
+        search_results_collection.create_index("search_id", unique=True)
+        outreach_campaigns_collection.create_index("id", unique=True)
+        outreach_campaigns_collection.create_index("user_id")
+        outreach_messages_collection.create_index("id", unique=True)
+        outreach_messages_collection.create_index([("status", 1), ("next_attempt_at", 1)])
+        outreach_messages_collection.create_index([("campaign_id", 1), ("status", 1)])
+        search_results_collection.create_index("created_at", expireAfterSeconds=SEARCH_RESULTS_TTL)
+        lead_events_collection.create_index("seq", unique=True)
+        website_contacts_collection.create_index("website", unique=True)
+        website_contacts_collection.create_index("expires_at", expireAfterSeconds=0)
+        search_snapshots_collection.create_index("key", unique=True)
+        search_snapshots_collection.create_index("search_id")
+        search_snapshots_collection.create_index("expires_at", expireAfterSeconds=0)
+        request_profiles_collection.create_index("id", unique=True)
+        request_profiles_collection.create_index("created_at", expireAfterSeconds=PROFILE_RETENTION)
+        lead_events_collection.create_index("created_at", expireAfterSeconds=LEAD_EVENTS_RETENTION)
+    except Exception as e:
+        logger.error(f"Index creation error: {e}")
+
+async def qualify_businesses(osm_elements: List[Dict], business_type: str, timings: Optional[Dict[str, float]] = None,
+                             company_info_fetcher=None, concurrent: bool = False, crawl_cache: bool = True) -> List[Dict]:
+    """Turn OSM elements into deduplicated, score-ranked leads.
+
+    With concurrent=True elements are processed in parallel; the company info
+    fetcher is then expected to bound upstream concurrency itself. crawl_cache=False
+    skips the website_contacts lookup, for runs that don't use MongoDB.
+    """
+    if concurrent:
+        processed = await asyncio.gather(*(
+            process_osm_business(element, business_type, timings, company_info_fetcher) for element in osm_elements
+        ))
+    else:
+        processed = [
+            await process_osm_business(element, business_type, timings, company_info_fetcher) for element in osm_elements
+        ]
+    
+    processed = [business for business in processed if business]
+    # Contacts already crawled from the leads' websites count towards their scores
+    if crawl_cache:
+        merge_crawled_contacts(processed)
+    
+    businesses = []
+    processed_names = set()  # Avoid duplicates
+    for business in processed:
+        if business and business['name'] not in processed_names:
+            # Only include businesses with reasonable quality scores for lead generation
+            if business['quality_score'] >= 30:  # Minimum threshold
+                businesses.append(business)
+                processed_names.add(business['name'])
+    
+    # Sort by quality score (highest first)
+    businesses.sort(key=lambda x: x['quality_score'], reverse=True)
+    return businesses
+
+async def adaptive_radius_search(lat: float, lon: float, search: "BusinessSearch", timings: Optional[Dict[str, float]],
+                                 company_info_fetcher, crawl_cache: bool = True) -> tuple:
+    """Expand the search radius ring by ring until enough qualified leads are found.
+
+    Each step only queries the annulus added since the previous one. Returns
+    (elements, businesses, info) where info describes how far the search went.
+    """
+    max_radius = search.max_radius or ADAPTIVE_MAX_RADIUS_KM
+    min_score = search.min_quality_score if search.min_quality_score is not None else 30
+    deadline = current_deadline.get()
+    elements = OverpassElements()
+    businesses: List[Dict] = []
+    seen_names = set()
+    inner, outer, rings = 0.0, min(ADAPTIVE_START_KM, max_radius), 0
+    while True:
+        rings += 1
+        with stage_timer(timings, "fetch"), deadline_limit(SEARCH_FETCH_SHARE):
+            if inner == 0:
+                ring = await fetch_businesses_from_overpass(lat, lon, outer, search.business_type,
+                                                            max_elements=SEARCH_MAX_ELEMENTS_PER_TILE)
+            else:
+                ring = await fetch_overpass_annulus(lat, lon, inner, outer, search.business_type,
+                                                    max_elements=SEARCH_MAX_ELEMENTS_PER_TILE)
+        if not getattr(ring, "complete", True):
+            elements.complete = False
+        elements.extend(ring)
+        with deadline_limit(reserve=SEARCH_DEADLINE_RESERVE):
+            qualified_ring = await qualify_businesses(ring, search.business_type, timings, company_info_fetcher,
+                                                      concurrent=True, crawl_cache=crawl_cache)
+        for business in qualified_ring:
+            if business['name'] not in seen_names:
+                seen_names.add(business['name'])
+                businesses.append(business)
+        qualified = sum(1 for b in businesses if b['quality_score'] >= min_score)
+        if qualified >= search.target_leads or outer >= max_radius or (deadline and deadline.expired_in):
+            break
+        inner, outer = outer, min(outer * ADAPTIVE_GROWTH, max_radius)
+    businesses.sort(key=lambda x: x['quality_score'], reverse=True)
+    info = {"searched_radius": outer, "rings": rings, "target_reached": qualified >= search.target_leads}
+    return elements, businesses, info
+
+def store_search_results(business_ids: List[str]) -> str:
+    """Keep a search's ranked lead ids so later pages can be served without re-running it"""
+    search_id = uuid.uuid4().hex
+    search_results_collection.insert_one({
+        "search_id": search_id,
+        "business_ids": business_ids,
+        "created_at": datetime.now(),
+    })
+    return search_id
+
+def find_search_results(search_id: str) -> Optional[Dict]:
+    """A stored result set, or the search snapshot answered under this search_id"""
+    return (search_results_collection.find_one({"search_id": search_id}, {"_id": 0, "business_ids": 1})
+            or search_snapshots_collection.find_one({"search_id": search_id}, {"_id": 0, "business_ids": 1}))
+
+def paginate(total: int, page: Optional[int], page_size: Optional[int]) -> tuple:
+    """Clamp paging parameters; returns (page, page_size, start, total_pages)"""
+    page_size = max(1, min(page_size or 50, SEARCH_MAX_PAGE_SIZE))
+    total_pages = max(1, math.ceil(total / page_size))
+    page = max(1, page or 1)
+    return page, page_size, (page - 1) * page_size, total_pages
+
+def load_result_page(business_ids: List[str], page: Optional[int], page_size: Optional[int]) -> Dict:
+    """One page of a stored result set, counting only the leads that still exist.
+
+    Leads swept or removed since the ids were stored are skipped before paging,
+    so pages stay full and total matches what can be paged through. Blocking;
+    call it in a worker thread.
+    """
+    existing = {doc["id"] for doc in businesses_collection.find({"id": {"$in": business_ids}}, {"_id": 0, "id": 1})}
+    live_ids = [business_id for business_id in business_ids if business_id in existing]
+    page, page_size, start, total_pages = paginate(len(live_ids), page, page_size)
+    page_ids = live_ids[start:start + page_size]
+    found = {b["id"]: b for b in businesses_collection.find({"id": {"$in": page_ids}}, LEAD_PUBLIC_FIELDS)}
+    return {
+        "businesses": [found[business_id] for business_id in page_ids if business_id in found],
+        "total": len(live_ids),
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+    }
+
+class CompanyInfoPool:
+    """Deduplicated, bounded-concurrency company lookups shared across a batch"""
+
+    def __init__(self, concurrency: int = BATCH_ENRICH_CONCURRENCY):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._lookups: Dict[str, asyncio.Future] = {}
+        self._waiting: Dict[str, int] = {}  # callers currently awaiting each lookup
+        self.requested = 0
+
+    async def fetch(self, company_name: str) -> Dict:
+        self.requested += 1
+        key = company_name.strip().lower()
+        lookup = self._lookups.get(key)
+        if lookup is None:
+            lookup = self._lookups[key] = asyncio.ensure_future(self._fetch(company_name))
+        if lookup.cancelled():
+            return {}  # abandoned earlier when everyone waiting for it ran out of time
+        self._waiting[key] = self._waiting.get(key, 0) + 1
+        try:
+            # Shielded: a caller that times out or is cancelled must not cancel the lookup
+            # under the other leads with the same name that are still waiting on it
+            return await asyncio.wait_for(asyncio.shield(lookup), deadline_timeout())
+        except asyncio.TimeoutError:
+            # Out of time: score the lead without company details
+            current_deadline.get().expire("enrich")
+            return {}
+        finally:
+            self._waiting[key] -= 1
+            if not self._waiting[key] and not lookup.done():
+                lookup.cancel()  # the last waiter left; nobody needs the result any more
+
+    async def _fetch(self, company_name: str) -> Dict:
+        async with self._semaphore:
+            return await fetch_company_info(company_name)
+
+    @property
+    def unique_lookups(self) -> int:
+        return len(self._lookups)
+
+def coalesce_areas(areas: List[tuple], max_per_query: int = BATCH_MAX_AREAS_PER_QUERY) -> List[List[tuple]]:
+    """Group (tag_query, lat, lon, radius) areas whose circles overlap so each group is one Overpass query"""
+    parent = list(range(len(areas)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, (_, lat_i, lon_i, radius_i) in enumerate(areas):
+        for j in range(i + 1, len(areas)):
+            _, lat_j, lon_j, radius_j = areas[j]
+            if haversine_km(lat_i, lon_i, lat_j, lon_j) <= radius_i + radius_j:
+                parent[find(j)] = find(i)
+
+    groups: Dict[int, List[tuple]] = {}
+    for i, area in enumerate(areas):
+        groups.setdefault(find(i), []).append(area)
+    # Keep individual union queries small enough to finish within the Overpass timeout
+    return [group[k:k + max_per_query] for group in groups.values() for k in range(0, len(group), max_per_query)]
+
+def elements_in_area(elements: List[Dict], tag_query: str, lat: float, lon: float, radius: float,
+                     max_elements: Optional[int] = None) -> OverpassElements:
+    """Elements of a union response that belong to one area, at most max_elements of them.
+
+    The result is incomplete if the union response was or if elements were cut off.
+    """
+    matched = OverpassElements()
+    matched.complete = getattr(elements, "complete", True)
+    for element in elements:
+        if not element_matches_tag(element, tag_query):
+            continue
+        element_lat, element_lon = element_coordinates(element)
+        # Way/relation centers can sit slightly outside the circle their nodes matched
+        if element_lat is not None and element_lon is not None \
+                and haversine_km(lat, lon, element_lat, element_lon) <= radius * 1.1:
+            if max_elements is not None and len(matched) >= max_elements:
+                matched.complete = False
+                break
+            matched.append(element)
+    return matched
+
+# Website contact enrichment. Crawl results are cached per website in website_contacts, so
+# repeat searches pick them up synchronously (one indexed read) and only websites without a
+# fresh entry are queued for the background crawler.
+# Pages are arbitrary input (inline base64 images, minified scripts), so every pattern is
+# bounded: a match may only start where its run of characters starts, and no repetition is
+# unlimited, which keeps a scan linear in the page size instead of quadratic in its longest run
+CRAWL_EMAIL_RE = re.compile(
+    r'(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9-]{1,63}(?:\.[A-Za-z0-9-]{1,63}){0,8}\.[A-Za-z]{2,24}')
+CRAWL_MAILTO_RE = re.compile(r'mailto:([^"\'?>\s]{1,254})', re.IGNORECASE)
+CRAWL_TEL_RE = re.compile(r'(?:tel:|"telephone"\s{0,8}:\s{0,8}")([^"\'>]{1,64})', re.IGNORECASE)
+CRAWL_LINK_RE = re.compile(
+    r'<a\s[^>]{0,1000}?href\s{0,8}=\s{0,8}["\']([^"\'#>]{1,1000})["\'][^>]{0,1000}>(.{0,1000}?)</a>',
+    re.IGNORECASE | re.DOTALL)
+CRAWL_CONTACT_WORDS = ("contact", "kontakt", "contacto", "contatti", "impressum", "get-in-touch", "about")
+CRAWL_IGNORED_EMAIL_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".css", ".js")
+CRAWL_IGNORED_EMAIL_DOMAINS = ("sentry.io", "wixpress.com", "sentry-next.wixpress.com")
+
+def site_host(url: str) -> str:
+    return urllib.parse.urlsplit(url).netloc.lower().removeprefix("www.")
+
+def extract_contacts(page: str, website: str) -> tuple:
+    """Emails and phone numbers found in an HTML page, the website's own domain first"""
+    text = html.unescape(page)
+    candidates = [urllib.parse.unquote(m) for m in CRAWL_MAILTO_RE.findall(text)] + CRAWL_EMAIL_RE.findall(text)
+    emails = []
+    for email in candidates:
+        email = email.strip().lower()
+        domain = email.rsplit("@", 1)[-1]
+        if (not CRAWL_EMAIL_RE.fullmatch(email) or email.endswith(CRAWL_IGNORED_EMAIL_SUFFIXES)
+                or domain.endswith(CRAWL_IGNORED_EMAIL_DOMAINS) or email in emails):
+            continue
+        emails.append(email)
+    host = site_host(website)
+    emails.sort(key=lambda email: not (host and email.rsplit("@", 1)[-1].removeprefix("www.") == host))
+    
+    phones = []
+    for raw in CRAWL_TEL_RE.findall(text):
+        phone = clean_phone(urllib.parse.unquote(raw)).strip()
+        if 7 <= sum(c.isdigit() for c in phone) <= 15 and phone not in phones:
+            phones.append(phone)
+    return emails[:CRAWL_MAX_CONTACTS], phones[:CRAWL_MAX_CONTACTS]
+
+def find_contact_page(page: str, base_url: str) -> Optional[str]:
+    """The first same-site link that looks like a contact page"""
+    host = site_host(base_url)
+    links = CRAWL_LINK_RE.findall(page)
+    for word in CRAWL_CONTACT_WORDS:
+        for href, label in links:
+            if word not in href.lower() and word not in label.lower():
+                continue
+            url = urllib.parse.urljoin(base_url, href.strip())
+            if url.startswith(("http://", "https://")) and site_host(url) == host and url.rstrip("/") != base_url.rstrip("/"):
+                return url
+    return None
+
+def crawl_fetch_url(url: str) -> str:
+    if not CRAWL_SITE_PREFIX:
+        return url
+    parts = urllib.parse.urlsplit(url)
+    return f"{CRAWL_SITE_PREFIX}/{parts.netloc}{parts.path or '/'}" + (f"?{parts.query}" if parts.query else "")
+
+class HostThrottle:
+    """Spaces requests to the same host at least `interval` seconds apart"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_slot: Dict[str, float] = {}
+
+    async def wait(self, host: str) -> None:
+        now = time.monotonic()
+        if len(self._next_slot) > 10000:
+            self._next_slot = {h: t for h, t in self._next_slot.items() if t > now}
+        slot = max(now, self._next_slot.get(host, 0.0))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+class UpstreamLimiter:
+    """Request rates for the upstreams of a caller's searches (the batch CLI), shared by all of them.
+
+    rates maps "geocode", "overpass" and "company" to requests per second; an
+    upstream without a positive rate is not limited.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        self.throttles = {upstream: HostThrottle(1 / rps) for upstream, rps in rates.items() if rps > 0}
+
+    async def wait(self, upstream: str) -> None:
+        throttle = self.throttles.get(upstream)
+        if throttle is not None:
+            await throttle.wait(upstream)
+
+current_upstream_limiter: ContextVar[Optional[UpstreamLimiter]] = ContextVar("current_upstream_limiter", default=None)
+
+async def upstream_turn(upstream: str) -> None:
+    """Wait until the current search's limiter, if it has one, lets another request to upstream start"""
+    limiter = current_upstream_limiter.get()
+    if limiter is not None:
+        await limiter.wait(upstream)
+
+class WebsiteCrawler:
+    """Fetches a website's home and contact pages politely"""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+        self.throttle = HostThrottle(CRAWL_HOST_INTERVAL)
+        self.robots: OrderedDict = OrderedDict()  # origin -> RobotFileParser
+
+    async def fetch_page(self, url: str) -> Optional[str]:
+        """GET one HTML page, reading at most CRAWL_MAX_BYTES of it"""
+        await self.throttle.wait(site_host(url))
+        try:
+            async with self.client.stream("GET", crawl_fetch_url(url)) as response:
+                if response.status_code != 200:
+                    CRAWL_PAGES.inc(outcome="http_error")
+                    return None
+                if "html" not in response.headers.get("content-type", "text/html"):
+                    CRAWL_PAGES.inc(outcome="not_html")
+                    return None
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) >= CRAWL_MAX_BYTES:
+                        break
+                CRAWL_PAGES.inc(outcome="truncated" if len(body) >= CRAWL_MAX_BYTES else "ok")
+                return bytes(body[:CRAWL_MAX_BYTES]).decode(response.encoding or "utf-8", errors="replace")
+        except httpx.HTTPError:
+            CRAWL_PAGES.inc(outcome="error")
+            return None
+
+    async def allowed(self, url: str) -> bool:
+        """Whether robots.txt lets us fetch url; unreachable robots files allow everything"""
+        parts = urllib.parse.urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        parser = self.robots.get(origin)
+        if parser is None:
+            parser = RobotFileParser()
+            await self.throttle.wait(site_host(url))
+            try:
+                response = await self.client.get(crawl_fetch_url(f"{origin}/robots.txt"))
+                if response.status_code in (401, 403):
+                    parser.disallow_all = True
+                elif response.status_code == 200:
+                    parser.parse(response.text[:CRAWL_MAX_BYTES].splitlines())
+                else:
+                    parser.allow_all = True
+            except httpx.HTTPError:
+                parser.allow_all = True
+            parser.modified()
+            self.robots[origin] = parser
+            if len(self.robots) > CRAWL_ROBOTS_CACHE_SIZE:
+                self.robots.popitem(last=False)
+        else:
+            self.robots.move_to_end(origin)
+        return parser.can_fetch(CRAWL_USER_AGENT, url)
+
+    async def crawl(self, website: str) -> Dict:
+        """Contacts listed on a website's home page, or on its contact page if the home page has no email"""
+        if not await self.allowed(website):
+            CRAWL_PAGES.inc(outcome="robots")
+            return {"status": "blocked", "emails": [], "phones": [], "pages": 0}
+        home = await self.fetch_page(website)
+        if home is None:
+            return {"status": "error", "emails": [], "phones": [], "pages": 0}
+        # Scanning a page takes milliseconds per 100 KB; keep it off the event loop
+        emails, phones = await asyncio.to_thread(extract_contacts, home, website)
+        pages = 1
+        contact_url = None if emails else await asyncio.to_thread(find_contact_page, home, website)
+        if contact_url and await self.allowed(contact_url):
+            contact_page = await self.fetch_page(contact_url)
+            if contact_page is not None:
+                pages += 1
+                more_emails, more_phones = await asyncio.to_thread(extract_contacts, contact_page, website)
+                emails = (emails + [e for e in more_emails if e not in emails])[:CRAWL_MAX_CONTACTS]
+                phones = (phones + [p for p in more_phones if p not in phones])[:CRAWL_MAX_CONTACTS]
+        return {"status": "ok", "emails": emails, "phones": phones, "pages": pages}
+
+def apply_website_contacts(lead: Dict, contacts: Dict) -> bool:
+    """Fill a lead's missing email and phone from a crawl result and rescore it.
+
+    Returns whether the lead changed.
+    """
+    lead["website_crawled_at"] = contacts["fetched_at"]
+    changed = False
+    if not lead.get("email") and contacts.get("emails"):
+        lead["email"] = contacts["emails"][0]
+        changed = True
+    if not lead.get("phone") and contacts.get("phones"):
+        lead["phone"] = contacts["phones"][0]
+        changed = True
+    if changed:
+        lead["contact_source"] = "website"
+        lead["quality_score"] = calculate_lead_quality_score(lead, lead.get("company_info") or {})
+        lead["lead_status"] = determine_lead_status(lead["quality_score"])
+    return changed
+
+def merge_crawled_contacts(businesses: List[Dict]) -> None:
+    """Apply cached crawl results to freshly processed leads"""
+    websites = list({b["website"] for b in businesses if b.get("website") and not b.get("email")})
+    if not websites:
+        return
+    cached = {
+        doc["website"]: doc for doc in website_contacts_collection.find(
+            {"website": {"$in": websites}, "expires_at": {"$gt": datetime.now()}}, {"_id": 0})
+    }
+    for business in businesses:
+        contacts = cached.get(business.get("website"))
+        if contacts and not business.get("email"):
+            apply_website_contacts(business, contacts)
+
+def store_crawled_contacts(website: str, contacts: Dict) -> "LeadChanges":
+    """Cache a crawl result and enrich the stored leads of that website.
+
+    Runs in a worker thread; the returned changes are applied on the event loop.
+    """
+    now = datetime.now()
+    ttl = CRAWL_CACHE_TTL if contacts["status"] == "ok" else CRAWL_RETRY_TTL
+    entry = {**contacts, "website": website, "fetched_at": now, "expires_at": now + timedelta(seconds=ttl)}
+    website_contacts_collection.replace_one({"website": website}, entry, upsert=True)
+    changes = LeadChanges()
+    if not contacts["emails"] and not contacts["phones"]:
+        return changes
+    
+    removed, added, events = [], [], []
+    for lead in businesses_collection.find({"website": website, "email": None}, LEAD_PUBLIC_FIELDS):
+        previous = dict(lead)
+        if not apply_website_contacts(lead, entry):
+            continue
+        filled = {field: lead[field] for field in
+                  ("email", "phone", "quality_score", "lead_status", "contact_source", "website_crawled_at")}
+        # A search may have rewritten the lead meanwhile; only fill what is still missing
+        if not businesses_collection.update_one({"id": lead["id"], "email": None}, {"$set": filled}).modified_count:
+            continue
+        removed.append(previous)
+        added.append(lead)
+        events.append(lead_event("lead_rescored", lead, previous_score=previous.get("quality_score"),
+                                 previous_status=previous.get("lead_status")))
+    apply_rollup_changes(removed=removed, added=added)
+    changes.publish(events)
+    CRAWL_LEADS_ENRICHED.inc(len(added))
+    return changes
+
+class WebsiteEnricher:
+    """Queue of websites to crawl, drained by CRAWL_WORKERS tasks sharing one HTTP client"""
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self.pending: set = set()  # websites queued or being crawled
+
+    def start(self) -> asyncio.Task:
+        self.queue = asyncio.Queue(CRAWL_QUEUE_SIZE)
+        return asyncio.create_task(self.run())
+
+    def enqueue(self, businesses: List[Dict]) -> int:
+        """Queue the websites of leads that lack an email and have no fresh crawl result"""
+        if self.queue is None:
+            return 0
+        queued = 0
+        for business in businesses:
+            website = business.get("website")
+            if not website or business.get("email") or business.get("website_crawled_at") or website in self.pending:
+                continue
+            try:
+                self.queue.put_nowait(website)
+            except asyncio.QueueFull:
+                break  # picked up again by a later search of the area
+            self.pending.add(website)
+            queued += 1
+        return queued
+
+    async def run(self):
+        headers = {"User-Agent": CRAWL_USER_AGENT, "Accept": "text/html,application/xhtml+xml"}
+        limits = httpx.Limits(max_connections=CRAWL_WORKERS * 2, max_keepalive_connections=CRAWL_WORKERS)
+        async with httpx.AsyncClient(headers=headers, timeout=CRAWL_TIMEOUT, limits=limits,
+                                     follow_redirects=True, max_redirects=3) as client:
+            crawler = WebsiteCrawler(client)
+            await asyncio.gather(*(self.work(crawler) for _ in range(CRAWL_WORKERS)))
+
+    async def work(self, crawler: WebsiteCrawler):
+        while True:
+            website = await self.queue.get()
+            try:
+                contacts = await asyncio.wait_for(crawler.crawl(website), CRAWL_SITE_TIMEOUT)
+                changes = await asyncio.to_thread(store_crawled_contacts, website, contacts)
+                changes.apply()
+            except asyncio.TimeoutError:
+                CRAWL_PAGES.inc(outcome="timeout")
+                await asyncio.to_thread(store_crawled_contacts, website,
+                                        {"status": "timeout", "emails": [], "phones": [], "pages": 0})
+            except Exception as e:
+                logger.error(f"Website crawl error for {website}: {e}")
+            finally:
+                self.pending.discard(website)
+
+website_enricher = WebsiteEnricher()
+CallbackMetric("leadgen_crawl_queue_depth", "Websites waiting for the contact crawler", "gauge",
+               lambda: website_enricher.queue.qsize() if website_enricher.queue is not None else 0)
+
+# Change events: lead and favorite writes append to the lead_events log under a global
+# sequence number, which doubles as the resume token of GET /api/events. One hub per
+# process tails the log and fans events out to its subscribers, so writes made by any
+# worker reach every connected client.
+def json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def lead_event(event_type: str, lead: Dict, **extra) -> Dict:
+    return {
+        "type": event_type,
+        "business_id": lead["id"],
+        "business_type": lead.get("business_type"),
+        "data": {**lead, **extra},
+    }
+
+def append_lead_events(events: List[Dict]) -> List[Dict]:
+    """Append change events to the log; returns them numbered, or [] if the append failed.
+
+    Only touches MongoDB, so it is safe in worker threads. A failure is logged
+    rather than raised: the write that produced the events has already happened,
+    and clients that miss them can resync.
+    """
+    if not events:
+        return []
+    try:
+        counter = event_counters_collection.find_one_and_update(
+            {"_id": "lead_events"}, {"$inc": {"seq": len(events)}},
+            upsert=True, return_document=ReturnDocument.AFTER,
+        )
+        first_seq = counter["seq"] - len(events) + 1
+        now = datetime.now()
+        lead_events_collection.insert_many(
+            [{**event, "seq": first_seq + i, "created_at": now} for i, event in enumerate(events)])
+        for event in events:
+            LEAD_EVENTS_PUBLISHED.inc(type=event["type"])
+        return [{**event, "seq": first_seq + i} for i, event in enumerate(events)]
+    except Exception as e:
+        logger.error(f"Lead event publish error: {e}")
+        return []
+
+def deliver_lead_events(numbered: List[Dict]) -> None:
+    """Apply appended events to this process's replica and wake its subscribers; event loop only"""
+    if not numbered:
+        return
+    if lead_replica is not None:
+        # Read-your-writes for this process; the hub re-delivers them in log order
+        lead_replica.apply(numbered)
+    lead_event_hub.notify()
+
+def publish_lead_events(events: List[Dict]) -> None:
+    """Append change events to the log and deliver them locally; event loop only"""
+    deliver_lead_events(append_lead_events(events))
+
+class LeadChanges:
+    """What a lead write made in a worker thread leaves for the event loop to do.
+
+    The query cache and the lead replica belong to the loop, so threads append
+    their events to the log (MongoDB only) and collect the touched business
+    types here; the loop then calls apply().
+    """
+
+    def __init__(self):
+        self.events: List[Dict] = []  # appended, numbered events
+        self.touched_types: set = set()
+
+    def publish(self, events: List[Dict]) -> None:
+        self.events.extend(append_lead_events(events))
+        self.touched_types.update(event.get("business_type") for event in events)
+
+    def apply(self) -> None:
+        deliver_lead_events(self.events)
+        for business_type in self.touched_types:
+            if business_type:
+                business_query_cache.invalidate(business_type)
+
+def latest_lead_event_seq() -> int:
+    latest = lead_events_collection.find_one({}, {"_id": 0, "seq": 1}, sort=[("seq", -1)])
+    return latest["seq"] if latest else 0
+
+def load_lead_events(after_seq: int, until_seq: Optional[int] = None, limit: int = LEAD_EVENTS_REPLAY_LIMIT) -> List[Dict]:
+    seq_range: Dict[str, int] = {"$gt": after_seq}
+    if until_seq is not None:
+        seq_range["$lte"] = until_seq
+    return list(lead_events_collection.find({"seq": seq_range}, {"_id": 0}).sort("seq", 1).limit(limit))
+
+def replay_lead_events(after_seq: int, until_seq: int) -> Optional[List[Dict]]:
+    """Events in (after_seq, until_seq], or None when some have expired or there are too many"""
+    oldest = lead_events_collection.find_one({}, {"_id": 0, "seq": 1}, sort=[("seq", 1)])
+    if oldest is None or oldest["seq"] > after_seq + 1:
+        return None
+    events = load_lead_events(after_seq, until_seq)
+    if len(events) == LEAD_EVENTS_REPLAY_LIMIT and events[-1]["seq"] < until_seq:
+        return None
+    return events
+
+class LeadEventSubscription:
+    """One client's event filter and its buffer of undelivered events"""
+
+    def __init__(self, user_id: str, business_type: Optional[str], types: set):
+        self.user_id = user_id
+        self.business_type = business_type
+        self.types = types
+        self.queue: asyncio.Queue = asyncio.Queue(LEAD_EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+
+    def wants(self, event: Dict) -> bool:
+        if self.types and event["type"] not in self.types:
+            return False
+        # Favorite events belong to one user; lead events are shared by everyone
+        if event.get("user_id") is not None and event["user_id"] != self.user_id:
+            return False
+        if self.business_type and event.get("business_type") not in (None, self.business_type):
+            return False
+        return True
+
+    def offer(self, event: Dict) -> None:
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+class LeadEventHub:
+    """Tails the lead event log while this process has subscribers"""
+
+    def __init__(self):
+        self.subscribers: set = set()
+        self.cursor = 0  # last sequence number dispatched
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._gap_since: Optional[float] = None
+
+    def start(self) -> asyncio.Task:
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        return asyncio.create_task(self.run())
+
+    def notify(self) -> None:
+        """Wake the tailer after a local write; safe to call from worker threads"""
+        if self._loop is None or not self.subscribers:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    async def subscribe(self, subscription: LeadEventSubscription) -> int:
+        """Register a subscriber; returns the sequence number live delivery starts after"""
+        if not self.subscribers:
+            # Nothing was tailed while nobody listened; start from the head of the log
+            self.cursor = await asyncio.to_thread(latest_lead_event_seq)
+            self._gap_since = None
+        self.subscribers.add(subscription)
+        return self.cursor
+
+    def unsubscribe(self, subscription: LeadEventSubscription) -> None:
+        self.subscribers.discard(subscription)
+
+    def dispatch(self, events: List[Dict]) -> None:
+        for event in events:
+            if event["seq"] != self.cursor + 1:
+                # Another writer holds the missing numbers but has not inserted them yet;
+                # wait a little so events are delivered in order, then skip the hole
+                now = time.monotonic()
+                if self._gap_since is None:
+                    self._gap_since = now
+                if now - self._gap_since < LEAD_EVENTS_GAP_GRACE:
+                    return
+            self._gap_since = None
+            self.cursor = event["seq"]
+            for subscription in list(self.subscribers):
+                if subscription.wants(event):
+                    subscription.offer(event)
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), LEAD_EVENTS_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not self.subscribers:
+                continue
+            try:
+                self.dispatch(await asyncio.to_thread(load_lead_events, self.cursor))
+            except Exception as e:
+                logger.error(f"Lead event tail error: {e}")
+
+lead_event_hub = LeadEventHub()
+CallbackMetric("leadgen_lead_event_subscribers", "Open GET /api/events streams in this process", "gauge",
+               lambda: len(lead_event_hub.subscribers))
+
+# Lead replica (replica.py): loaded from a snapshot at startup, then kept current by the event hub
+class LeadReplicaSubscription(LeadEventSubscription):
+    """Feeds every lead event tailed by the hub into the replica, without a queue"""
+
+    def __init__(self, store: replica.LeadColumnStore):
+        super().__init__("", None, {"lead_upserted", "lead_rescored", "lead_removed"})
+        self.store = store
+
+    def offer(self, event: Dict) -> None:
+        self.store.apply([event])
+
+lead_replica: Optional[replica.LeadColumnStore] = (
+    replica.LeadColumnStore() if LEAD_REPLICA_ENABLED and replica.np is not None else None)
+
+def load_lead_replica() -> int:
+    return lead_replica.load(businesses_collection.find({}, LEAD_PUBLIC_FIELDS).batch_size(LEAD_REPLICA_LOAD_BATCH))
+
+async def start_lead_replica():
+    """Subscribe to the event log first so nothing written during the snapshot is lost"""
+    try:
+        await lead_event_hub.subscribe(LeadReplicaSubscription(lead_replica))
+        started = time.perf_counter()
+        loaded = await asyncio.to_thread(load_lead_replica)
+        logger.info(f"Lead replica loaded {loaded} leads ({lead_replica.nbytes() / 1e6:.1f} MB) "
+                    f"in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        logger.error(f"Lead replica load error: {e}")
+
+if lead_replica is not None:
+    CallbackMetric("leadgen_lead_replica_rows", "Leads held by the in-memory replica", "gauge",
+                   lambda: len(lead_replica))
+    CallbackMetric("leadgen_lead_replica_bytes", "Memory held by the in-memory replica", "gauge",
+                   lambda: lead_replica.nbytes())
+
+# Stored-lead lookup: a weighted Mongo text index for full-text search, plus normalized
+# name/address tokens (search_terms) whose multikey index serves prefix autocomplete
+LEAD_SEARCH_MAX_LIMIT = 100
+LEAD_SEARCH_MAX_TERMS = 64
+LEAD_SEARCH_TOKEN_RE = re.compile(r'[^\W_]+')
+LEAD_SEARCH_BACKFILL_BATCH = 1000
+
+def search_tokens(text: Optional[str]) -> List[str]:
+    """Lower-cased, accent-folded word tokens of a string"""
+    if not text:
+        return []
+    folded = ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+    return LEAD_SEARCH_TOKEN_RE.findall(folded.lower())
+
+def lead_search_terms(business: Dict) -> List[str]:
+    """Distinct tokens of a lead's name, address and registered company details"""
+    company_info = business.get("company_info") or {}
+    terms: Dict[str, None] = {}
+    for text in (business.get("name"), business.get("address"), company_info.get("name"), company_info.get("address")):
+        for token in search_tokens(text):
+            terms.setdefault(token)
+    return list(terms)[:LEAD_SEARCH_MAX_TERMS]
+
+def lead_search_filters(business_type: Optional[str], min_quality_score: int, lead_status: Optional[str]) -> Dict:
+    query: Dict[str, Any] = {"quality_score": {"$gte": min_quality_score}}
+    if business_type:
+        query["business_type"] = business_type
+    if lead_status:
+        query["lead_status"] = lead_status
+    return query
+
+def backfill_lead_search_terms() -> int:
+    """Add search_terms to leads stored before they were maintained on write"""
+    updated = 0
+    while True:
+        docs = list(businesses_collection.find(
+            {"search_terms": {"$exists": False}},
+            {"_id": 0, "id": 1, "name": 1, "address": 1, "company_info": 1},
+        ).limit(LEAD_SEARCH_BACKFILL_BATCH))
+        if not docs:
+            break
+        businesses_collection.bulk_write([
+            UpdateOne({"id": doc["id"]}, {"$set": {"search_terms": lead_search_terms(doc)}}) for doc in docs
+        ], ordered=False)
+        updated += len(docs)
+        if len(docs) < LEAD_SEARCH_BACKFILL_BATCH:
+            break
+    return updated
+
+# Serializes this process's read-then-write of lead documents, so two searches storing the
+# same lead can't both count its previous version out of the rollups
+lead_write_lock = threading.Lock()
+
+def persist_search_results(business_type: str, lat: float, lon: float, radius: float,
+                           osm_elements: List[Dict], businesses: List[Dict]) -> "LeadChanges":
+    """Merge one search's leads into the collection, touching only the searched area.
+
+    Runs in a worker thread (see save_search_leads): previous versions are read
+    in one query, the leads go out in one bulk write, and their rollup and
+    cluster deltas are summed in memory into one bulk write per collection.
+    """
+    changes = LeadChanges()
+    changes.touched_types.add(business_type)
+    with lead_write_lock:
+        if businesses:
+            # Repoint favorites of leads stored under pre-OSM random ids
+            migrate_legacy_lead_ids(businesses, changes)
+            
+            # Insert new results, keyed by the stable OSM-derived id
+            previous_docs = {doc["id"]: doc for doc in businesses_collection.find(
+                {"id": {"$in": [b["id"] for b in businesses]}}, {**ROLLUP_FIELDS, "id": 1})}
+            businesses_collection.bulk_write([
+                UpdateOne({"id": b["id"]}, {"$set": {**b, "search_terms": lead_search_terms(b)}}, upsert=True)
+                for b in businesses
+            ], ordered=False)
+            events = []
+            for business in businesses:
+                previous = previous_docs.get(business["id"])
+                if previous:
+                    # An upsert can re-type a lead stored under another business type
+                    if previous.get("business_type"):
+                        changes.touched_types.add(previous["business_type"])
+                    if previous.get("quality_score") != business["quality_score"]:
+                        events.append(lead_event("lead_rescored", business,
+                                                 previous_score=previous.get("quality_score"),
+                                                 previous_status=previous.get("lead_status")))
+                        continue
+                events.append(lead_event("lead_upserted", business))
+            apply_rollup_changes(removed=list(previous_docs.values()), added=businesses)
+            changes.publish(events)
+        
+        # Drop leads in the searched area that OSM no longer returns (only a full response proves absence)
+        if getattr(osm_elements, "complete", True):
+            remove_vanished_leads(business_type, lat, lon, radius, osm_elements, changes)
+    return changes
+
+async def save_search_leads(business_type: str, lat: float, lon: float, radius: float,
+                            osm_elements: List[Dict], businesses: List[Dict]) -> None:
+    """Persist a search's leads off the event loop, then apply the local effects on it"""
+    changes = await asyncio.to_thread(persist_search_results, business_type, lat, lon, radius,
+                                      osm_elements, businesses)
+    changes.apply()
+    website_enricher.enqueue(businesses)
+
+# Search snapshots: the ranked lead ids of a search's last complete run, served to repeat searches
+def search_snapshot_key(search: BusinessSearch) -> str:
+    """Identity of a search's result set: type, area and adaptive settings, but not paging"""
+    if search.lat and search.lon:
+        where = f"{search.lat:.4f},{search.lon:.4f}"
+    else:
+        where = " ".join(search.location.lower().split())
+    if search.target_leads:
+        extent = ["adaptive", search.target_leads, search.min_quality_score, search.max_radius]
+    else:
+        extent = ["radius", search.radius]
+    identity = [search.business_type.strip().lower(), where, *extent]
+    return hashlib.sha1(json.dumps(identity).encode()).hexdigest()
+
+def save_search_snapshot(key: str, search: BusinessSearch, lat: float, lon: float,
+                         business_ids: List[str], adaptive: Dict) -> None:
+    """Replace a search's snapshot; its search_id pages the snapshot through /api/search-results"""
+    now = datetime.now()
+    search_snapshots_collection.update_one(
+        {"key": key},
+        {
+            "$set": {
+                "key": key,
+                "search_id": uuid.uuid4().hex,
+                "business_type": search.business_type,
+                "location": search.location,
+                "search_location": {"lat": lat, "lon": lon},
+                "business_ids": business_ids,
+                "adaptive": adaptive,
+                "refreshed_at": now,
+                "expires_at": now + timedelta(seconds=SEARCH_MAX_STALENESS),
+            },
+            "$unset": {"revalidating_until": "", "revalidate_failed": ""},
+        },
+        upsert=True,
+    )
+
+def search_freshness(source: str, refreshed_at: datetime, revalidating: bool) -> Dict:
+    """How old the leads in a search response are and whether newer ones are on the way"""
+    age = max(0.0, (datetime.now() - refreshed_at).total_seconds())
+    return {
+        "source": source,
+        "refreshed_at": refreshed_at.isoformat(),
+        "age_seconds": round(age, 1),
+        "stale": age > SEARCH_STALE_AFTER,
+        "revalidating": revalidating,
+    }
+
+async def serve_search_snapshot(snapshot: Dict, search: BusinessSearch, revalidating: bool) -> Dict:
+    """Answer a search from its snapshot, reading the requested page of leads as currently stored"""
+    result_page = await asyncio.to_thread(load_result_page, snapshot["business_ids"], search.page, search.page_size)
+    return {
+        **snapshot["adaptive"],
+        **result_page,
+        "search_id": snapshot["search_id"],
+        "complete": True,
+        "search_location": snapshot["search_location"],
+        "freshness": search_freshness("snapshot", snapshot["refreshed_at"], revalidating),
+        "message": f"Found {result_page['total']} qualified prospects for {search.business_type} in {search.location}"
+    }
+
+class SearchRevalidator:
+    """Background refreshes of stale snapshots, one at a time per snapshot across all workers.
+
+    A refresh holds a lease on the snapshot document, so repeat searches that
+    arrive while it runs (here or on another worker) don't start their own.
+    Refreshes take admission slots at batch priority, behind interactive searches.
+    """
+
+    def __init__(self, concurrency: int = SEARCH_REVALIDATE_CONCURRENCY):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def claim(key: str) -> Optional[bool]:
+        """Take the snapshot's refresh lease; None if claimed, else whether another refresh is in flight"""
+        now = datetime.now()
+        claimed = search_snapshots_collection.find_one_and_update(
+            {"key": key, "$or": [{"revalidating_until": None}, {"revalidating_until": {"$lt": now}}]},
+            {"$set": {"revalidating_until": now + timedelta(seconds=SEARCH_REVALIDATE_LEASE), "revalidate_failed": False}},
+            projection={"_id": 1},
+        )
+        if claimed:
+            return None
+        # Either another worker is refreshing it or the last refresh failed and is backing off
+        snapshot = search_snapshots_collection.find_one({"key": key}, {"_id": 0, "revalidate_failed": 1})
+        return bool(snapshot) and not snapshot.get("revalidate_failed")
+
+    async def schedule(self, key: str, search: BusinessSearch) -> bool:
+        """Start a refresh unless one is already running; returns whether one is in flight"""
+        if key in self.tasks:
+            SEARCH_REVALIDATIONS.inc(outcome="deduplicated")
+            return True
+        in_flight = await asyncio.to_thread(self.claim, key)
+        if in_flight is not None:
+            if in_flight:
+                SEARCH_REVALIDATIONS.inc(outcome="deduplicated")
+            return in_flight
+        task = asyncio.create_task(self.refresh(key, search))
+        self.tasks[key] = task
+        task.add_done_callback(lambda _: self.tasks.pop(key, None))
+        return True
+
+    async def refresh(self, key: str, search: BusinessSearch) -> None:
+        current_deadline.set(None)  # the triggering request's deadline doesn't bind its background refresh
+        refreshed = False
+        try:
+            async with self._semaphore:
+                try:
+                    await search_admission.acquire(ADMISSION_PRIORITY_BATCH)
+                except AdmissionRejected:
+                    SEARCH_REVALIDATIONS.inc(outcome="shed")
+                    return
+                started = time.perf_counter()
+                try:
+                    result = await run_business_search(search, None, key)
+                    refreshed = result["complete"]
+                    SEARCH_REVALIDATIONS.inc(outcome="refreshed" if refreshed else "incomplete")
+                except Exception as e:
+                    logger.error(f"Search revalidation error: {e}")
+                    SEARCH_REVALIDATIONS.inc(outcome="error")
+                finally:
+                    search_admission.release(time.perf_counter() - started)
+        finally:
+            if not refreshed:
+                # Keep serving the old snapshot and let a later repeat search try again
+                await asyncio.to_thread(search_snapshots_collection.update_one, {"key": key}, {"$set": {
+                    "revalidating_until": datetime.now() + timedelta(seconds=SEARCH_REVALIDATE_BACKOFF),
+                    "revalidate_failed": True,
+                }})
+
+    def cancel(self) -> None:
+        for task in list(self.tasks.values()):
+            task.cancel()
+
+search_revalidator = SearchRevalidator()
+
+@app.on_event("shutdown")
+async def stop_search_revalidations():
+    search_revalidator.cancel()
+
+# Request middlewares. Starlette runs the one registered last outermost, so the order below is
+# inside out: the profiler samples only the route's own work, admission control queues before
+# any of it starts, and instrumentation times the whole request including its time in the queue.
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """Sample the Python stacks that serve this request when an admin asks with X-Profile: 1"""
+    if request.headers.get("x-profile") != "1" or not is_admin(request):
+        return await call_next(request)
+    profile = StackProfile(include_idle=False)
+    token = current_profile.set(profile)
+    task = asyncio.current_task()
+    sampling_profiler.tasks[task] = profile
+    sampling_profiler.start(profile, request_scoped=True)
+    try:
+        response = await call_next(request)
+    finally:
+        sampling_profiler.stop(profile)
+        sampling_profiler.tasks.pop(task, None)
+        current_profile.reset(token)
+    profile_id = store_request_profile(profile, request)
+    if profile_id:
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    """Queue or shed requests to the expensive routes before any work is done for them"""
+    priority = ADMISSION_ROUTES.get((request.method, request.url.path))
+    if priority is None:
+        return await call_next(request)
+    if request.headers.get("x-request-priority") == "batch":
+        priority = ADMISSION_PRIORITY_BATCH
+    request.state.arrived_at = time.monotonic()  # deadlines include time spent queued
+    try:
+        await search_admission.acquire(priority)
+    except AdmissionRejected as rejection:
+        ADMISSION_REJECTIONS.inc(route=request.url.path, reason=rejection.reason)
+        return JSONResponse(
+            {"detail": "Search capacity exhausted, retry later"},
+            status_code=503,
+            headers={"Retry-After": str(rejection.retry_after)},
+        )
+    started = time.perf_counter()
+    try:
+        return await call_next(request)
+    finally:
+        search_admission.release(time.perf_counter() - started)
+
+@app.middleware("http")
+async def instrument_request(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    sampled = request.headers.get("x-trace-sample") == "1" or random.random() < TRACE_SAMPLE_RATE
+    trace = RequestTrace(f"{request.method} {request.url.path}", sampled)
+    token = current_trace.set(trace)
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["Server-Timing"] = trace.server_timing()
+        response.headers["Timing-Allow-Origin"] = "*"
+        response.headers["X-Trace-Id"] = trace.trace_id
+        return response
+    finally:
+        current_trace.reset(token)
+        elapsed = time.perf_counter() - start
+        # Use the route template, not the raw path, to keep label cardinality bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_LATENCY.observe(
+            elapsed, method=request.method,
+            route=route.path if route is not None else "unmatched", status=str(status))
+        if trace.sampled:
+            trace_logger.info(json.dumps(trace.to_dict(status, elapsed)))
+
+# API Routes
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def profile_response(summary: Dict[str, Any], counts: Dict[str, int], output: str):
+    """Collapsed stacks ("frame;frame;leaf count" per line, hottest first) or the same as JSON"""
+    ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+    if output == "json":
+        return {**summary, "stacks": [{"stack": stack, "count": count} for stack, count in ranked]}
+    return PlainTextResponse(
+        "".join(f"{stack} {count}\n" for stack, count in ranked),
+        headers={"X-Profile-Samples": str(summary["samples"]), "X-Profile-Seconds": str(summary["seconds"])},
+    )
+
+@app.get("/api/admin/profile")
+async def profile_worker(request: Request, seconds: float = 10.0, idle: bool = False, output: str = "collapsed"):
+    """Sample every thread of the worker serving this call for `seconds`.
+
+    Idle threads (parked in select, locks or queues) are left out unless idle=true.
+    """
+    require_admin(request)
+    if not 0 < seconds <= PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be above 0 and at most {PROFILER_MAX_SECONDS}")
+    if output not in ("collapsed", "json"):
+        raise HTTPException(status_code=400, detail="output must be collapsed or json")
+    profile = StackProfile(include_idle=idle)
+    sampling_profiler.start(profile)
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        sampling_profiler.stop(profile)
+    return profile_response(profile.summary(), profile.counts, output)
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def get_request_profile(request: Request, profile_id: str, output: str = "collapsed"):
+    """A per-request profile recorded for a call made with X-Profile: 1"""
+    require_admin(request)
+    if output not in ("collapsed", "json"):
+        raise HTTPException(status_code=400, detail="output must be collapsed or json")
+    try:
+        stored = request_profiles_collection.find_one({"id": profile_id}, {"_id": 0})
+        if not stored:
+            raise HTTPException(status_code=404, detail="Profile not found or expired")
+        counts = dict(stored.pop("counts"))
+        return profile_response(stored, counts, output)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get profile error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/health")
+async def health_check():
+    return {"status": "healthy", "message": "Prospect Lead Intelligence API is running",
+            "search_admission": search_admission.stats(),
+            "overpass_endpoints": [endpoint.stats() for endpoint in overpass_pool.endpoints]}
+
+async def run_business_search(search: BusinessSearch, timings: Optional[Dict[str, float]],
+                              snapshot_key: Optional[str] = None, persist: bool = True,
+                              limiter: Optional[UpstreamLimiter] = None) -> Dict:
+    """Geocode, fetch, qualify and persist one search; a complete result also replaces its snapshot.
+
+    With persist=False (and no snapshot_key) the search doesn't touch MongoDB at all.
+    A limiter paces the search's geocoding, Overpass and company requests.
+    """
+    limiter_token = current_upstream_limiter.set(limiter)
+    try:
+        return await _run_business_search(search, timings, snapshot_key, persist)
+    finally:
+        current_upstream_limiter.reset(limiter_token)
+
+async def _run_business_search(search: BusinessSearch, timings: Optional[Dict[str, float]],
+                               snapshot_key: Optional[str], persist: bool) -> Dict:
+    type_label = business_type_label(search.business_type)
+    deadline = current_deadline.get()
+    # Geocode location if coordinates not provided
+    if not search.lat or not search.lon:
+        with stage_timer(timings, "geocode"), deadline_limit(SEARCH_GEOCODE_SHARE):
+            try:
+                lat, lon = await asyncio.wait_for(geocode_location(search.location), deadline_timeout())
+            except asyncio.TimeoutError:
+                deadline.expire("geocode")
+                raise HTTPException(status_code=504, detail="Search deadline exceeded while geocoding the location")
+        if not lat or not lon:
+            raise HTTPException(status_code=400, detail="Could not geocode location")
+    else:
+        lat, lon = search.lat, search.lon
+    
+    pool = CompanyInfoPool(SEARCH_ENRICH_CONCURRENCY)
+    adaptive = {}
+    if search.target_leads:
+        osm_elements, businesses, adaptive = await adaptive_radius_search(lat, lon, search, timings, pool.fetch,
+                                                                          crawl_cache=persist)
+        radius = adaptive["searched_radius"]
+    else:
+        radius = search.radius
+        # Fetch businesses from Overpass API (tiled for large areas)
+        with stage_timer(timings, "fetch"), deadline_limit(SEARCH_FETCH_SHARE):
+            osm_elements = await fetch_businesses_tiled(lat, lon, radius, search.business_type)
+        
+        # Process businesses with enhanced filtering
+        with deadline_limit(reserve=SEARCH_DEADLINE_RESERVE):
+            businesses = await qualify_businesses(osm_elements, search.business_type, timings, pool.fetch,
+                                                  concurrent=True, crawl_cache=persist)
+    SEARCH_ELEMENTS_IN.inc(len(osm_elements), business_type=type_label)
+    SEARCH_LEADS_OUT.inc(len(businesses), business_type=type_label)
+    
+    # Merge into the database; staleness elsewhere is left to the background sweeper
+    complete = getattr(osm_elements, "complete", True) and (deadline is None or deadline.expired_in is None)
+    with stage_timer(timings, "persist"):
+        if osm_elements and persist:
+            await save_search_leads(search.business_type, lat, lon, radius, osm_elements, businesses)
+        # A partial result would be served as if it were the whole area, so it never becomes a snapshot
+        if snapshot_key and complete:
+            await asyncio.to_thread(save_search_snapshot, snapshot_key, search, lat, lon,
+                                    [b["id"] for b in businesses], adaptive)
+    return {"businesses": businesses, "adaptive": adaptive, "complete": complete, "lat": lat, "lon": lon}
+
+def search_deadline(search: BusinessSearch, header: Optional[float], request: Request) -> Optional[Deadline]:
+    """The request's deadline: X-Request-Deadline, else the deadline field, else the (opt-in) default"""
+    budget = header if header is not None else search.deadline
+    if budget is None:
+        budget = SEARCH_DEFAULT_DEADLINE
+    if budget < 0:
+        raise HTTPException(status_code=400, detail="deadline must not be negative")
+    if budget == 0:
+        return None
+    return Deadline(min(budget, SEARCH_MAX_DEADLINE), getattr(request.state, "arrived_at", None))
+
+@app.post("/api/search-businesses")
+async def search_businesses(search: BusinessSearch, request: Request,
+                            deadline_header: Optional[float] = Header(None, alias="X-Request-Deadline")):
+    """Search for businesses using OpenStreetMap data with AI-powered search understanding"""
+    timings: Dict[str, float] = {}
+    deadline = search_deadline(search, deadline_header, request)
+    deadline_token = current_deadline.set(deadline)
+    try:
+        snapshot_key = search_snapshot_key(search) if SEARCH_SWR_ENABLED else None
+        max_age = SEARCH_MAX_STALENESS if search.max_staleness is None else min(search.max_staleness, SEARCH_MAX_STALENESS)
+        if snapshot_key and max_age > 0:
+            with stage_timer(timings, "snapshot"):
+                snapshot = await asyncio.to_thread(search_snapshots_collection.find_one, {"key": snapshot_key}, {"_id": 0})
+            age = (datetime.now() - snapshot["refreshed_at"]).total_seconds() if snapshot else None
+            # Snapshots written before they carried a search_id are refreshed like expired ones
+            if snapshot and age <= max_age and snapshot.get("search_id"):
+                stale = age > SEARCH_STALE_AFTER
+                SEARCH_SNAPSHOTS.inc(outcome="stale" if stale else "fresh")
+                revalidating = stale and await search_revalidator.schedule(snapshot_key, search)
+                with stage_timer(timings, "snapshot"):
+                    return await serve_search_snapshot(snapshot, search, revalidating)
+            SEARCH_SNAPSHOTS.inc(outcome="expired" if snapshot else "miss")
+        
+        result = await run_business_search(search, timings, snapshot_key)
+        businesses = result["businesses"]
+        with stage_timer(timings, "persist"):
+            search_id = store_search_results([b["id"] for b in businesses])
+        
+        page, page_size, start, total_pages = paginate(len(businesses), search.page, search.page_size)
+        return {
+            **result["adaptive"],
+            "businesses": businesses[start:start + page_size],
+            "total": len(businesses),
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "search_id": search_id,
+            "complete": result["complete"],
+            "search_location": {"lat": result["lat"], "lon": result["lon"]},
+            "freshness": search_freshness("live", datetime.now(), revalidating=False),
+            "deadline": deadline.summary() if deadline else None,
+            "message": f"Found {len(businesses)} qualified prospects for {search.business_type} in {search.location}"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Search error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        current_deadline.reset(deadline_token)
+        for stage, seconds in timings.items():
+            SEARCH_STAGE_LATENCY.observe(seconds, stage=stage)
+
+@app.get("/api/search-results/{search_id}")
+async def get_search_results(search_id: str, page: int = 1, page_size: int = 50):
+    """Page through the ranked leads of an earlier search"""
+    try:
+        stored = await asyncio.to_thread(find_search_results, search_id)
+        if not stored:
+            raise HTTPException(status_code=404, detail="Search results not found or expired")
+        
+        result_page = await asyncio.to_thread(load_result_page, stored["business_ids"], page, page_size)
+        return {**result_page, "search_id": search_id}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get search results error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/search-businesses/batch")
+async def search_businesses_batch(batch: BatchSearch):
+    """Run many searches at once, sharing geocoding, Overpass queries and enrichment"""
+    if not batch.searches:
+        raise HTTPException(status_code=400, detail="No searches provided")
+    if len(batch.searches) > BATCH_MAX_SEARCHES:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_SEARCHES} searches per batch")
+    if any(s.radius is None or s.radius <= 0 or s.radius > BATCH_MAX_RADIUS_KM for s in batch.searches):
+        raise HTTPException(status_code=400, detail=f"Batch search radii must be between 0 and {BATCH_MAX_RADIUS_KM} km")
+    merged_limit = min(batch.merged_limit or 0, SEARCH_MAX_PAGE_SIZE)
+    try:
+        # Geocode each distinct location once
+        geocode_semaphore = asyncio.Semaphore(BATCH_GEOCODE_CONCURRENCY)
+        locations = {s.location.strip().lower(): s.location for s in batch.searches if not s.lat or not s.lon}
+
+        async def geocode_once(location: str) -> tuple:
+            async with geocode_semaphore:
+                return await geocode_location(location)
+
+        with stage_timer(None, "geocode"):
+            geocoded = dict(zip(locations, await asyncio.gather(*(geocode_once(l) for l in locations.values()))))
+
+        results: List[Dict[str, Any]] = []
+        areas: Dict[tuple, List[int]] = {}  # distinct (tag_query, lat, lon, radius) -> result indices
+        for search in batch.searches:
+            if search.lat and search.lon:
+                lat, lon = search.lat, search.lon
+            else:
+                lat, lon = geocoded[search.location.strip().lower()]
+            result = {"business_type": search.business_type, "location": search.location,
+                      "search_location": {"lat": lat, "lon": lon}, "businesses": [], "total": 0}
+            if not lat or not lon:
+                result["error"] = "Could not geocode location"
+                result["complete"] = False
+            else:
+                area = (resolve_osm_tag(search.business_type), lat, lon, search.radius)
+                areas.setdefault(area, []).append(len(results))
+            results.append(result)
+
+        # One Overpass union query per group of overlapping areas
+        overpass_semaphore = asyncio.Semaphore(BATCH_OVERPASS_CONCURRENCY)
+        area_groups = coalesce_areas(list(areas))
+
+        async def fetch_group(group: List[tuple]) -> List[Dict]:
+            async with overpass_semaphore:
+                return await fetch_overpass_union(group, max_elements=BATCH_MAX_ELEMENTS_PER_SEARCH * len(group))
+
+        with stage_timer(None, "fetch"):
+            group_elements = await asyncio.gather(*(fetch_group(group) for group in area_groups))
+
+        # Qualify every search against a single deduplicated enrichment pool
+        pool = CompanyInfoPool()
+        area_elements: Dict[tuple, List[Dict]] = {}
+        for group, elements in zip(area_groups, group_elements):
+            for area in group:
+                area_elements[area] = elements_in_area(elements, *area, max_elements=BATCH_MAX_ELEMENTS_PER_SEARCH)
+
+        async def qualify(index: int, area: tuple) -> None:
+            search = batch.searches[index]
+            elements = area_elements[area]
+            type_label = business_type_label(search.business_type)
+            SEARCH_ELEMENTS_IN.inc(len(elements), business_type=type_label)
+            businesses = await qualify_businesses(elements, search.business_type, None, pool.fetch, concurrent=True)
+            SEARCH_LEADS_OUT.inc(len(businesses), business_type=type_label)
+            results[index]["businesses"] = businesses
+            results[index]["total"] = len(businesses)
+            results[index]["complete"] = elements.complete
+
+        await asyncio.gather(*(qualify(index, area) for area, indices in areas.items() for index in indices))
+
+        with stage_timer(None, "persist"):
+            # Searches of different types can share an area (custom types map onto the same OSM
+            # tag); each area is stored once, and each lead under the first search that found it
+            persisted_ids: set = set()
+            for area, indices in areas.items():  # in order of each area's first search
+                if area_elements[area]:
+                    _, lat, lon, radius = area
+                    index = indices[0]
+                    businesses = [b for b in results[index]["businesses"] if b["id"] not in persisted_ids]
+                    persisted_ids.update(b["id"] for b in businesses)
+                    await save_search_leads(batch.searches[index].business_type, lat, lon, radius,
+                                            area_elements[area], businesses)
+
+        # Merged ranking across searches, one entry per lead
+        merged: Dict[str, Dict] = {}
+        for result in results:
+            for business in result["businesses"]:
+                if business["id"] not in merged or business["quality_score"] > merged[business["id"]]["quality_score"]:
+                    merged[business["id"]] = business
+        ranking = sorted(merged.values(), key=lambda x: x["quality_score"], reverse=True)[:merged_limit]
+
+        return {
+            "results": results,
+            "merged": ranking,
+            "total_searches": len(results),
+            "total_unique_leads": len(merged),
+            "stats": {
+                "geocode_requests": len(locations),
+                "overpass_queries": len(area_groups),
+                "company_lookups": pool.unique_lookups,
+                "company_lookups_saved": pool.requested - pool.unique_lookups,
+            },
+            "message": f"Ran {len(results)} searches and found {len(merged)} unique qualified prospects"
+        }
+
+    except Exception as e:
+        logger.error(f"Batch search error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/businesses")
+async def get_businesses(
+    business_type: Optional[str] = None,
+    min_quality_score: int = 60,
     lead_status: Optional[str] = None,
-    limit: int = 100
+    limit: int = 100,
+    sort: Optional[str] = Query(None, description="quality_score or last_updated, prefixed with - for descending"),
+    south: Optional[float] = Query(None, ge=-90, le=90),
+    west: Optional[float] = Query(None, ge=-180, le=180),
+    north: Optional[float] = Query(None, ge=-90, le=90),
+    east: Optional[float] = Query(None, ge=-180, le=180),
 ):
     """Get filtered businesses from database"""
     try:
-        query = {"quality_score": {"$gte": min_quality_score}}
+        bounds = (south, west, north, east)
+        if any(v is not None for v in bounds) and any(v is None for v in bounds):
+            raise HTTPException(status_code=400, detail="south, west, north and east must be given together")
+        bbox = bounds if south is not None else None
+        if sort is not None and sort not in replica.LEAD_REPLICA_SORTS:
+            raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(replica.LEAD_REPLICA_SORTS)}")
+        
+        cache_key = business_query_cache.make_key(business_type, min_quality_score, lead_status, limit, sort, bbox)
+        cached = business_query_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        generation = business_query_cache.generation(business_type)
+        
+        if lead_replica is not None and lead_replica.ready:
+            businesses = lead_replica.query(business_type, min_quality_score, lead_status, bbox,
+                                            sort=sort, limit=limit or None)
+        else:
+            query = {"quality_score": {"$gte": min_quality_score}}
+            
+            if business_type:
+                query["business_type"] = business_type
+            if lead_status:
+                query["lead_status"] = lead_status
+            if bbox:
+                query["lat"] = {"$gte": south, "$lte": north}
+                query.update(longitude_range("lon", west, east, west > east))
+            
+            cursor = businesses_collection.find(query, LEAD_PUBLIC_FIELDS)
+            if sort:
+                cursor = cursor.sort(sort.lstrip("-"), -1 if sort.startswith("-") else 1)
+            businesses = list(cursor.limit(limit))
+        result = {"businesses": businesses, "total": len(businesses)}
+        business_query_cache.put(cache_key, generation, result)
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get businesses error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/leads/search")
+async def search_stored_leads(
+    q: str,
+    business_type: Optional[str] = None,
+    min_quality_score: int = 0,
+    lead_status: Optional[str] = None,
+    limit: int = 20
+):
+    """Full-text search over stored leads' names, addresses and company details, best match first"""
+    try:
+        query = {"$text": {"$search": q}, **lead_search_filters(business_type, min_quality_score, lead_status)}
+        businesses = list(
+            businesses_collection.find(query, {**LEAD_PUBLIC_FIELDS, "relevance": {"$meta": "textScore"}})
+            .sort([("relevance", {"$meta": "textScore"}), ("quality_score", -1)])
+            .limit(max(1, min(limit, LEAD_SEARCH_MAX_LIMIT)))
+        )
+        return {"businesses": businesses, "total": len(businesses)}
         
+    except Exception as e:
+        logger.error(f"Lead search error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/leads/autocomplete")
+async def autocomplete_stored_leads(
+    q: str,
+    business_type: Optional[str] = None,
+    min_quality_score: int = 0,
+    lead_status: Optional[str] = None,
+    limit: int = 10
+):
+    """Stored leads whose name/address words start with the typed text, highest score first.
+
+    Every word but the last must match a whole word; the last one (unless followed
+    by a space) is matched as a prefix.
+    """
+    try:
+        tokens = search_tokens(q)
+        if not tokens:
+            return {"suggestions": [], "total": 0}
+        conditions = [{"search_terms": token} for token in tokens[:-1]]
+        if q[-1:].isspace():
+            conditions.append({"search_terms": tokens[-1]})
+        else:
+            conditions.append({"search_terms": {"$regex": f"^{re.escape(tokens[-1])}"}})
+        query = {"$and": conditions, **lead_search_filters(business_type, min_quality_score, lead_status)}
+        projection = {"_id": 0, "id": 1, "name": 1, "address": 1, "business_type": 1,
+                      "quality_score": 1, "lead_status": 1, "lat": 1, "lon": 1}
+        suggestions = list(
+            businesses_collection.find(query, projection)
+            .sort("quality_score", -1)
+            .limit(max(1, min(limit, LEAD_SEARCH_MAX_LIMIT)))
+        )
+        return {"suggestions": suggestions, "total": len(suggestions)}
+        
+    except Exception as e:
+        logger.error(f"Lead autocomplete error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analytics")
+async def get_lead_analytics(business_type: Optional[str] = None, include_regions: bool = True):
+    """Lead counts by status and type, score histograms and regional coverage from the rollups"""
+    try:
+        type_query = {"kind": "business_type"}
+        if business_type:
+            type_query["business_type"] = business_type
+        type_rollups = list(lead_rollups_collection.find(type_query, {"_id": 0, "kind": 0}))
+        
+        totals = {"count": 0, "by_status": {}, "score_histogram": {bucket: 0 for bucket in SCORE_BUCKETS}}
+        for rollup in type_rollups:
+            totals["count"] += rollup.get("count", 0)
+            for status, count in rollup.get("by_status", {}).items():
+                totals["by_status"][status] = totals["by_status"].get(status, 0) + count
+            for bucket, count in rollup.get("score_histogram", {}).items():
+                totals["score_histogram"][bucket] = totals["score_histogram"].get(bucket, 0) + count
+        
+        result = {
+            "totals": totals,
+            "business_types": sorted(
+                (r for r in type_rollups if r.get("count")), key=lambda r: r["count"], reverse=True),
+        }
+        if include_regions:
+            result["regions"] = list(lead_rollups_collection.find(
+                {"kind": "region", "count": {"$gt": 0}}, {"_id": 0, "kind": 0}))
+        return result
+        
+    except Exception as e:
+        logger.error(f"Analytics error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/analytics/rebuild")
+async def rebuild_analytics(request: Request):
+    """Rebuild all analytics rollups from the businesses collection (admin only)"""
+    require_admin(request)
+    try:
+        rollups = await asyncio.to_thread(rebuild_lead_rollups)
+        cells = await asyncio.to_thread(rebuild_lead_clusters)
+        return {"message": f"Rebuilt {rollups} analytics rollups and {cells} map cluster cells"}
+    except Exception as e:
+        logger.error(f"Rebuild analytics error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def longitude_range(field: str, west: float, east: float, wraps: bool) -> Dict:
+    """Range filter on a longitude-like field, split in two when the viewport crosses the antimeridian"""
+    if not wraps:
+        return {field: {"$gte": west, "$lte": east}}
+    return {"$or": [{field: {"$gte": west}}, {field: {"$lte": east}}]}
+
+@app.get("/api/clusters")
+async def get_map_clusters(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    zoom: int,
+    business_type: Optional[str] = None,
+    min_quality_score: int = 0,
+    lead_status: Optional[str] = None
+):
+    """Lead clusters (or, from CLUSTER_POINTS_ZOOM on, individual leads) inside a map viewport.
+
+    Clusters come from the precomputed per-zoom cells, so the payload is bounded
+    by the viewport size rather than the number of leads. min_quality_score is
+    applied at the 10-point granularity of the cells' score histograms; centroids
+    and average scores cover every lead in a cell.
+    """
+    try:
+        zoom = max(zoom, 0)
+        if zoom >= CLUSTER_POINTS_ZOOM:
+            query = {"lat": {"$gte": south, "$lte": north}, **longitude_range("lon", west, east, west > east),
+                     "quality_score": {"$gte": min_quality_score}}
+            if business_type:
+                query["business_type"] = business_type
+            if lead_status:
+                query["lead_status"] = lead_status
+            points = list(businesses_collection.find(query, {**LEAD_PUBLIC_FIELDS, "company_info": 0})
+                          .sort("quality_score", -1).limit(CLUSTER_MAX_POINTS + 1))
+            return {
+                "zoom": zoom,
+                "mode": "points",
+                "points": points[:CLUSTER_MAX_POINTS],
+                "total": min(len(points), CLUSTER_MAX_POINTS),
+                "truncated": len(points) > CLUSTER_MAX_POINTS,
+            }
+        
+        stored_zoom = stored_cluster_zoom(zoom)
+        shift = stored_zoom - zoom  # stored cells are merged into their ancestors at this zoom
+        x_min, y_min = cluster_cell(north, west, stored_zoom)
+        x_max, y_max = cluster_cell(south, east, stored_zoom)
+        query = {"zoom": stored_zoom, "y": {"$gte": y_min, "$lte": y_max}, "count": {"$gt": 0},
+                 **longitude_range("x", x_min, x_max, west > east)}
         if business_type:
             query["business_type"] = business_type
         if lead_status:
             query["lead_status"] = lead_status
+        included_buckets = SCORE_BUCKETS[min(max(min_quality_score, 0) // 10, 9):]
         
-        businesses = list(businesses_collection.find(query, {"_id": 0}).limit(limit))
-        return {"businesses": businesses, "total": len(businesses)}
+        merged: Dict[tuple, Dict] = {}
+        for cell in lead_clusters_collection.find(query, {"_id": 0}):
+            histogram = cell.get("score_histogram", {})
+            count = sum(histogram.get(bucket, 0) for bucket in included_buckets)
+            if count <= 0:
+                continue
+            cluster = merged.setdefault((cell["x"] >> shift, cell["y"] >> shift), {
+                "count": 0, "leads": 0, "lat_sum": 0.0, "lon_sum": 0.0, "score_sum": 0, "by_status": {},
+            })
+            cluster["count"] += count
+            cluster["leads"] += cell["count"]
+            cluster["lat_sum"] += cell["lat_sum"]
+            cluster["lon_sum"] += cell["lon_sum"]
+            cluster["score_sum"] += cell["score_sum"]
+            status = cell.get("lead_status", "unknown")
+            cluster["by_status"][status] = cluster["by_status"].get(status, 0) + count
+        
+        clusters = [{
+            "lat": cluster["lat_sum"] / cluster["leads"],
+            "lon": cluster["lon_sum"] / cluster["leads"],
+            "count": cluster["count"],
+            "avg_score": round(cluster["score_sum"] / cluster["leads"], 1),
+            "by_status": cluster["by_status"],
+            "bounds": cluster_cell_bounds(x, y, zoom),
+        } for (x, y), cluster in merged.items()]
+        return {
+            "zoom": zoom,
+            "mode": "clusters",
+            "clusters": clusters,
+            "total": sum(cluster["count"] for cluster in clusters),
+        }
         
     except Exception as e:
-        logger.error(f"Get businesses error: {e}")
+        logger.error(f"Map clusters error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/cache-stats")
+async def get_cache_stats():
+    """Hit-rate metrics for the business query cache"""
+    return {"business_query_cache": business_query_cache.stats()}
+
 @app.post("/api/favorites")
 async def add_favorite(favorite: FavoriteBusiness):
     """Add business to favorites"""
@@ -447,6 +3761,14 @@ async def add_favorite(favorite: FavoriteBusiness):
             return {"message": "Already in favorites", "id": existing["id"]}
         
         favorites_collection.insert_one(favorite_data)
+        business = businesses_collection.find_one({"id": favorite.business_id}, LEAD_PUBLIC_FIELDS) or {}
+        publish_lead_events([{
+            "type": "favorited",
+            "user_id": favorite.user_id,
+            "business_id": favorite.business_id,
+            "business_type": None,
+            "data": {**business, "id": favorite.business_id, "favorite_id": favorite_data["id"]},
+        }])
         return {"message": "Added to favorites", "id": favorite_data["id"]}
         
     except Exception as e:
@@ -463,7 +3785,7 @@ async def get_favorites(user_id: str = "default_user"):
         favorite_businesses = []
         for fav in favorites:
             business = businesses_collection.find_one(
-                {"id": fav["business_id"]}, {"_id": 0}
+                {"id": fav["business_id"]}, LEAD_PUBLIC_FIELDS
             )
             if business:
                 favorite_businesses.append({**business, "favorite_id": fav["id"]})
@@ -478,16 +3800,96 @@ async def get_favorites(user_id: str = "default_user"):
 async def remove_favorite(favorite_id: str):
     """Remove business from favorites"""
     try:
-        result = favorites_collection.delete_one({"id": favorite_id})
-        if result.deleted_count:
+        removed = favorites_collection.find_one_and_delete({"id": favorite_id}, projection={"_id": 0})
+        if removed:
+            publish_lead_events([{
+                "type": "unfavorited",
+                "user_id": removed["user_id"],
+                "business_id": removed["business_id"],
+                "business_type": None,
+                "data": {"id": removed["business_id"], "favorite_id": favorite_id},
+            }])
             return {"message": "Removed from favorites"}
         else:
             raise HTTPException(status_code=404, detail="Favorite not found")
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Remove favorite error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def format_lead_event(event: Dict) -> str:
+    payload = {key: value for key, value in event.items() if key != "created_at"}
+    return f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(payload, default=json_default)}\n\n"
+
+def format_reset_event(seq: int, reason: str) -> str:
+    return f"id: {seq}\nevent: reset\ndata: {json.dumps({'seq': seq, 'reason': reason})}\n\n"
+
+async def lead_event_stream(request: Request, subscription: LeadEventSubscription, since: Optional[int]):
+    live_after = await lead_event_hub.subscribe(subscription)
+    try:
+        yield f"retry: {LEAD_EVENTS_RETRY_MS}\n\n"
+        last_seq = live_after
+        if since is not None and since != live_after:
+            replay = await asyncio.to_thread(replay_lead_events, since, live_after) if since < live_after else None
+            if replay is None:
+                # The client's view can no longer be patched; it refetches and continues from here
+                yield format_reset_event(live_after, "resume token expired")
+            else:
+                for event in replay:
+                    if subscription.wants(event):
+                        yield format_lead_event(event)
+        while True:
+            if subscription.overflowed and subscription.queue.empty():
+                # Too far behind: end the stream, the client reconnects with its Last-Event-ID and replays
+                break
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), LEAD_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            if event["seq"] <= last_seq:
+                continue
+            last_seq = event["seq"]
+            yield format_lead_event(event)
+    finally:
+        lead_event_hub.unsubscribe(subscription)
+
+@app.get("/api/events")
+async def stream_lead_events(
+    request: Request,
+    user_id: str = "default_user",
+    business_type: Optional[str] = None,
+    types: Optional[str] = Query(None, description="Comma-separated event types, all by default"),
+    since: Optional[int] = Query(None, description="Resume after this event id (Last-Event-ID takes precedence)"),
+):
+    """Server-sent stream of lead and favorite changes.
+
+    Every event id is a resume token: reconnecting with Last-Event-ID (as
+    EventSource does) or ?since= replays the events missed meanwhile; when they
+    are no longer retained a "reset" event tells the client to refetch instead.
+    """
+    wanted = {t.strip() for t in types.split(",") if t.strip()} if types else set()
+    unknown = wanted - set(LEAD_EVENT_TYPES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown event types: {', '.join(sorted(unknown))}")
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    
+    subscription = LeadEventSubscription(user_id, business_type, wanted)
+    return StreamingResponse(
+        lead_event_stream(request, subscription, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/api/export-csv")
 async def export_businesses_csv(
     business_type: Optional[str] = None,
@@ -496,11 +3898,14 @@ async def export_businesses_csv(
 ):
     """Export businesses as CSV data"""
     try:
-        query = {"quality_score": {"$gte": min_quality_score}}
-        if business_type:
-            query["business_type"] = business_type
-        
-        businesses = list(businesses_collection.find(query, {"_id": 0}))
+        if lead_replica is not None and lead_replica.ready:
+            businesses = lead_replica.query(business_type, min_quality_score)
+        else:
+            query = {"quality_score": {"$gte": min_quality_score}}
+            if business_type:
+                query["business_type"] = business_type
+            
+            businesses = list(businesses_collection.find(query, LEAD_PUBLIC_FIELDS))
         
         # Convert to CSV format with B2B focus
         csv_headers = [
@@ -536,6 +3941,120 @@ async def export_businesses_csv(
         logger.error(f"Export CSV error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Columnar export
+EXPORT_BATCH_ROWS = int(os.environ.get('EXPORT_BATCH_ROWS', '10000'))
+EXPORT_FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+def lead_arrow_schema():
+    categorical = pa.dictionary(pa.int16(), pa.string())
+    return pa.schema([
+        ("id", pa.string()),
+        ("name", pa.string()),
+        ("business_type", categorical),
+        ("address", pa.string()),
+        ("phone", pa.string()),
+        ("website", pa.string()),
+        ("email", pa.string()),
+        ("lat", pa.float64()),
+        ("lon", pa.float64()),
+        ("quality_score", pa.int32()),
+        ("lead_status", categorical),
+        ("last_updated", pa.timestamp("ms")),
+        ("osm_type", categorical),
+        ("osm_id", pa.int64()),
+        ("company_name", pa.string()),
+        ("company_status", pa.string()),
+    ])
+
+def iter_lead_record_batches(query: Dict, batch_rows: int = EXPORT_BATCH_ROWS):
+    """Read leads from a Mongo cursor into typed Arrow record batches of batch_rows rows"""
+    schema = lead_arrow_schema()
+    plain_fields = [name for name in schema.names if not name.startswith("company_")]
+    columns: Dict[str, list] = {name: [] for name in schema.names}
+    rows = 0
+    for doc in businesses_collection.find(query, LEAD_PUBLIC_FIELDS, batch_size=batch_rows):
+        for name in plain_fields:
+            columns[name].append(doc.get(name))
+        company_info = doc.get("company_info") or {}
+        columns["company_name"].append(company_info.get("name") or None)
+        columns["company_status"].append(company_info.get("status") or None)
+        rows += 1
+        if rows == batch_rows:
+            yield pa.RecordBatch.from_pydict(columns, schema=schema)
+            columns = {name: [] for name in schema.names}
+            rows = 0
+    if rows:
+        yield pa.RecordBatch.from_pydict(columns, schema=schema)
+
+class DrainableSink(io.RawIOBase):
+    """Write-only file object whose contents can be handed off as they are produced"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def stream_columnar_export(query: Dict, export_format: str):
+    """Yield an Arrow IPC stream or Parquet file batch by batch, never holding the whole table"""
+    sink = DrainableSink()
+    schema = lead_arrow_schema()
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema, compression="zstd")
+        write = writer.write_batch
+    else:
+        writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), schema)
+        write = writer.write_batch
+    try:
+        for batch in iter_lead_record_batches(query):
+            write(batch)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+@app.get("/api/export")
+async def export_businesses_columnar(
+    format: str = "parquet",
+    business_type: Optional[str] = None,
+    min_quality_score: int = 60
+):
+    """Export businesses as a typed Arrow IPC stream or Parquet file for analytics"""
+    if pa is None:
+        raise HTTPException(status_code=501, detail="Columnar export requires pyarrow")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sorted(EXPORT_FORMATS)}")
+    
+    query = {"quality_score": {"$gte": min_quality_score}}
+    if business_type:
+        query["business_type"] = business_type
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"prospects_{business_type or 'all'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    # A sync generator is iterated in the threadpool, so cursor reads stay off the event loop
+    return StreamingResponse(
+        stream_columnar_export(query, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @app.get("/api/business-types")
 async def get_business_types():
     """Get available business types focused on lead generation"""
@@ -573,11 +4092,105 @@ async def setup_integrations(integrations: Dict[str, str]):
     # This will be implemented when user provides API keys
     return {"message": "Integration setup endpoint ready for API keys"}
 
+@app.on_event("startup")
+async def start_outreach_workers():
+    if not outreach.SMTP_HOST:
+        logger.info("SMTP_HOST is not set; outreach messages will stay queued")
+        return
+    worker_prefix = f"{socket.gethostname()}-{os.getpid()}"
+    for index in range(outreach.OUTREACH_WORKERS):
+        background_tasks.append(asyncio.create_task(outreach.run_outreach_worker(f"{worker_prefix}-{index}")))
+
+@app.post("/api/outreach/campaigns")
+async def create_outreach_campaign(campaign: OutreachCampaign):
+    """Queue a campaign to every matching lead with an email address; delivery happens in the background"""
+    try:
+        created = await asyncio.to_thread(outreach.enqueue_outreach_campaign, campaign)
+        return {"message": f"Queued {created['total']} outreach messages", "campaign": created}
+    except Exception as e:
+        logger.error(f"Create outreach campaign error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/outreach/campaigns")
+async def list_outreach_campaigns(user_id: str = "default_user", limit: int = 50):
+    """A user's outreach campaigns, newest first"""
+    try:
+        campaigns = list(outreach_campaigns_collection.find({"user_id": user_id}, {"_id": 0, "body": 0})
+                         .sort("created_at", -1).limit(limit))
+        return {"campaigns": campaigns, "total": len(campaigns)}
+    except Exception as e:
+        logger.error(f"List outreach campaigns error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/outreach/campaigns/{campaign_id}")
+async def get_outreach_campaign(campaign_id: str):
+    """Delivery progress of a campaign"""
+    try:
+        campaign = outreach_campaigns_collection.find_one({"id": campaign_id}, {"_id": 0, "body": 0})
+        if not campaign:
+            raise HTTPException(status_code=404, detail="Campaign not found")
+        done = campaign["sent"] + campaign["failed"] + campaign["cancelled"]
+        retrying = outreach_messages_collection.count_documents(
+            {"campaign_id": campaign_id, "status": "queued", "attempts": {"$gt": 0}})
+        recent_failures = list(outreach_messages_collection.find(
+            {"campaign_id": campaign_id, "status": "failed"},
+            {"_id": 0, "business_id": 1, "to": 1, "attempts": 1, "last_error": 1},
+        ).limit(10))
+        return {
+            **campaign,
+            "pending": max(campaign["total"] - done, 0),
+            "retrying": retrying,
+            "progress": round(done / campaign["total"], 4) if campaign["total"] else 1.0,
+            "recent_failures": recent_failures,
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get outreach campaign error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/outreach/campaigns/{campaign_id}/cancel")
+async def cancel_outreach_campaign(campaign_id: str):
+    """Stop a campaign; messages already being sent still go out"""
+    try:
+        campaign = outreach_campaigns_collection.find_one_and_update(
+            {"id": campaign_id, "status": {"$in": ["queued", "running"]}},
+            {"$set": {"status": "cancelling"}},
+        )
+        if not campaign:
+            raise HTTPException(status_code=404, detail="No active campaign with this id")
+        result = outreach_messages_collection.update_many(
+            {"campaign_id": campaign_id, "status": "queued"}, {"$set": {"status": "cancelled"}})
+        outreach_campaigns_collection.update_one(
+            {"id": campaign_id},
+            {"$set": {"status": "cancelled", "completed_at": datetime.now()}, "$inc": {"cancelled": result.modified_count}},
+        )
+        return {"message": f"Cancelled {result.modified_count} queued messages"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Cancel outreach campaign error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/send-outreach")
-async def send_outreach_email(business_id: str, template: str, user_id: str = "default_user"):
-    """Send cold outreach email (requires email API setup)"""
-    # Placeholder for future Gmail/Mailgun integration
-    return {"message": "Outreach endpoint ready - add email API keys to enable"}
+async def send_outreach_email(business_id: str, template: str, user_id: str = "default_user",
+                              subject: str = "Quick question for {{business_name}}"):
+    """Queue a cold outreach email to one lead"""
+    try:
+        lead = businesses_collection.find_one({"id": business_id}, {"_id": 0, "email": 1, "name": 1})
+        if not lead:
+            raise HTTPException(status_code=404, detail="Business not found")
+        if not lead.get("email") or "@" not in lead["email"]:
+            raise HTTPException(status_code=400, detail="Business has no email address")
+        campaign = OutreachCampaign(name=f"Outreach to {lead.get('name') or business_id}", subject=subject,
+                                    body=template, business_ids=[business_id], user_id=user_id)
+        created = await asyncio.to_thread(outreach.enqueue_outreach_campaign, campaign)
+        return {"message": "Outreach email queued", "campaign_id": created["id"]}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Send outreach error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""Offline load test for the request/response /api/* routes.
+
+Starts the upstream stand-ins (HTTP and SMTP) and the backend as local
+subprocesses, drives concurrent load against each route and reports
+throughput and latency percentiles. Nothing leaves the machine.
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/load_test.py --concurrency 16 --requests 200 --json bench_output.json
+
+By default the backend runs on an in-memory MongoDB (mongomock); pass
+--mongo-url to benchmark against a real local MongoDB instead. Full-text
+lead search (GET /api/leads/search) needs a real MongoDB text index and only
+runs with --mongo-url.
+
+Not covered: GET /api/events, a long-lived event stream rather than a request,
+and the admin routes (profiler captures and analytics rebuilds), which are
+operator actions behind ADMIN_TOKEN.
+
+Percentiles only cover successful requests. A route whose error rate is above
+--max-error-rate (0 by default) fails the run with a non-zero exit status.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BUSINESS_TYPES = ["restaurant", "dental", "legal", "saas", "shop", "ai consulting"]
+LOCATIONS = ["New York, NY", "San Francisco, CA", "Austin, TX", "Chicago, IL", "Seattle, WA"]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class Scenario:
+    """A named route plus a factory producing (method, path, kwargs[, on_response]) per request"""
+
+    def __init__(self, name: str, build: Callable[[int], tuple], requests: Optional[int] = None):
+        self.name = name
+        self.build = build
+        self.requests = requests
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, total: int, concurrency: int) -> Dict:
+    """Latency percentiles cover successful requests only; failed ones are counted separately"""
+    latencies: List[float] = []
+    error_latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            request = scenario.build(i)
+            if request is None:
+                continue
+            method, path, kwargs = request[:3]
+            on_response = request[3] if len(request) > 3 else None
+            start = time.perf_counter()
+            failed = True
+            try:
+                response = await client.request(method, path, **kwargs)
+                status = str(response.status_code)
+                failed = response.status_code >= 400
+                if on_response and not failed:
+                    on_response(response)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            (error_latencies if failed else latencies).append((time.perf_counter() - start) * 1000)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    requests = len(latencies) + len(error_latencies)
+    return {
+        "route": scenario.name,
+        "requests": requests,
+        "errors": len(error_latencies),
+        "error_rate": round(len(error_latencies) / requests, 4) if requests else 0.0,
+        "statuses": statuses,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        "error_latency_ms_max": round(max(error_latencies), 3) if error_latencies else None,
+    }
+
+
+def build_scenarios(rng: random.Random, state: Dict, search_requests: int, text_search: bool) -> List[Scenario]:
+    """Scenarios in dependency order: searches populate leads, favorites reuse them"""
+
+    def search_body():
+        return {"business_type": rng.choice(BUSINESS_TYPES), "location": rng.choice(LOCATIONS),
+                "radius": rng.choice([1.0, 2.0, 5.0])}
+
+    def search(i):
+        def remember(response):
+            if response.json().get("search_id"):
+                state["search_ids"].append(response.json()["search_id"])
+        return "POST", "/api/search-businesses", {"json": search_body()}, remember
+
+    def batch_search(i):
+        return "POST", "/api/search-businesses/batch", {"json": {"searches": [search_body() for _ in range(4)]}}
+
+    def search_results(i):
+        if not state["search_ids"]:
+            return None
+        params = {"page": rng.choice([1, 2]), "page_size": 20}
+        return "GET", f"/api/search-results/{rng.choice(state['search_ids'])}", {"params": params}
+
+    def lead_search(i):
+        return "GET", "/api/leads/search", {"params": {"q": rng.choice(["cafe", "summit", "harbor grill", "law"])}}
+
+    def analytics(i):
+        params = {"business_type": rng.choice(BUSINESS_TYPES)} if rng.random() < 0.5 else {}
+        return "GET", "/api/analytics", {"params": params}
+
+    def remember_ids(response):
+        businesses = response.json()["businesses"]
+        state["business_ids"].extend(b["id"] for b in businesses)
+        state["email_business_ids"].extend(b["id"] for b in businesses if b.get("email"))
+
+    def businesses(i):
+        params = {"min_quality_score": rng.choice([0, 30, 60, 80])}
+        if rng.random() < 0.7:
+            params["business_type"] = rng.choice(BUSINESS_TYPES)
+        if rng.random() < 0.3:
+            params["lead_status"] = rng.choice(["hot", "warm", "cold"])
+        return "GET", "/api/businesses", {"params": params}, remember_ids
+
+    def add_favorite(i):
+        business_id = rng.choice(state["business_ids"]) if state["business_ids"] else f"missing-{i}"
+        user_id = f"bench_user_{i % 10}"
+
+        def remember(response):
+            state["favorite_ids"].append(response.json()["id"])
+        return "POST", "/api/favorites", {"json": {"business_id": business_id, "user_id": user_id}}, remember
+
+    def remove_favorite(i):
+        if not state["favorite_ids"]:
+            return None
+        return "DELETE", f"/api/favorites/{state['favorite_ids'].pop()}", {}
+
+    def create_campaign(i):
+        body = {"name": f"bench campaign {i}", "subject": "Hello {{business_name}}",
+                "body": "Hi {{business_name}}, a quick note about {{industry}}.", "min_quality_score": 0,
+                "lead_statuses": ["hot", "warm", "cold", "unqualified"], "limit": 50, "user_id": "bench_user"}
+
+        def remember(response):
+            state["campaign_ids"].append(response.json()["campaign"]["id"])
+        return "POST", "/api/outreach/campaigns", {"json": body}, remember
+
+    def campaign_progress(i):
+        if not state["campaign_ids"]:
+            return None
+        return "GET", f"/api/outreach/campaigns/{rng.choice(state['campaign_ids'])}", {}
+
+    def cancel_campaign(i):
+        if not state["campaign_ids"]:
+            return None
+        return "POST", f"/api/outreach/campaigns/{state['campaign_ids'].pop()}/cancel", {}
+
+    def send_outreach(i):
+        if not state["email_business_ids"]:
+            return None
+        params = {"business_id": rng.choice(state["email_business_ids"]), "template": "Hi {{business_name}}"}
+        return "POST", "/api/send-outreach", {"params": params}
+
+    def clusters(i):
+        # The stand-in geocoder places every location inside this box
+        zoom = rng.choice([3, 6, 9, 12, 16])
+        lat, lon = rng.uniform(25, 45), rng.uniform(-120, -75)
+        half = 180 / 2 ** zoom
+        params = {"south": lat - half, "west": lon - half, "north": lat + half, "east": lon + half, "zoom": zoom}
+        if rng.random() < 0.5:
+            params["business_type"] = rng.choice(BUSINESS_TYPES)
+        return "GET", "/api/clusters", {"params": params}
+
+    return [
+        Scenario("GET /api/health", lambda i: ("GET", "/api/health", {})),
+        Scenario("GET /api/business-types", lambda i: ("GET", "/api/business-types", {})),
+        Scenario("POST /api/search-businesses", search, requests=search_requests),
+        Scenario("POST /api/search-businesses/batch", batch_search, requests=max(1, search_requests // 4)),
+        Scenario("GET /api/search-results/{search_id}", search_results),
+        Scenario("GET /api/businesses", businesses),
+        Scenario("GET /api/clusters", clusters),
+        Scenario("GET /api/leads/autocomplete", lambda i: (
+            "GET", "/api/leads/autocomplete", {"params": {"q": rng.choice(["ac", "summit", "harbor gr", "nova l", "main"])}})),
+        *([Scenario("GET /api/leads/search", lead_search)] if text_search else []),
+        Scenario("GET /api/analytics", analytics),
+        Scenario("GET /api/cache-stats", lambda i: ("GET", "/api/cache-stats", {})),
+        Scenario("POST /api/favorites", add_favorite),
+        Scenario("GET /api/favorites", lambda i: ("GET", "/api/favorites", {"params": {"user_id": f"bench_user_{i % 10}"}})),
+        Scenario("GET /api/export-csv", lambda i: ("GET", "/api/export-csv", {"params": {"min_quality_score": rng.choice([0, 60])}})),
+        Scenario("GET /api/export", lambda i: ("GET", "/api/export", {"params": {
+            "format": rng.choice(["parquet", "arrow"]), "min_quality_score": rng.choice([0, 60])}})),
+        Scenario("DELETE /api/favorites/{favorite_id}", remove_favorite),
+        Scenario("POST /api/setup-integrations", lambda i: ("POST", "/api/setup-integrations", {"json": {"mapbox": "x"}})),
+        Scenario("POST /api/send-outreach", send_outreach),
+        Scenario("POST /api/outreach/campaigns", create_campaign, requests=20),
+        Scenario("GET /api/outreach/campaigns", lambda i: ("GET", "/api/outreach/campaigns", {"params": {"user_id": "bench_user"}})),
+        Scenario("GET /api/outreach/campaigns/{campaign_id}", campaign_progress),
+        Scenario("POST /api/outreach/campaigns/{campaign_id}/cancel", cancel_campaign, requests=10),
+    ]
+
+
+def start_process(args: List[str], env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    # Log to a file: an unread pipe would fill up and stall the server under load
+    log = open(log_path, "w")
+    return subprocess.Popen([sys.executable, *args], env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} exited early, see the logs in --log-dir")
+            try:
+                await client.get(url)
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+async def main_async(args) -> Dict:
+    standin_url = f"http://127.0.0.1:{args.standin_port}"
+    backend_url = f"http://127.0.0.1:{args.backend_port}"
+    env = dict(os.environ)
+    env.update({
+        "NOMINATIM_URL": f"{standin_url}/search",
+        "OVERPASS_URLS": f"{standin_url}/mirror/a/api/interpreter,{standin_url}/mirror/b/api/interpreter",
+        "OPENCORPORATES_URL": f"{standin_url}/v0.4/companies/search",
+        "CRAWL_SITE_PREFIX": f"{standin_url}/sites",
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(args.smtp_port),
+        "SMTP_STARTTLS": "false",
+    })
+    if args.mongo_url:
+        env["MONGO_URL"] = args.mongo_url
+
+    standin_args = [
+        os.path.join(HERE, "standins.py"), "--port", str(args.standin_port),
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate), "--elements", str(args.elements), "--seed", str(args.seed),
+        "--overpass-tail-rate", str(args.overpass_tail_rate), "--overpass-tail-ms", str(args.overpass_tail_ms),
+    ]
+    smtp_args = [os.path.join(HERE, "smtp_standin.py"), "--port", str(args.smtp_port),
+                 "--latency-ms", str(args.smtp_latency_ms), "--stats-interval", "60"]
+    backend_args = [os.path.join(HERE, "serve_backend.py"), "--port", str(args.backend_port)]
+    if not args.mongo_url:
+        backend_args.append("--in-memory-mongo")
+
+    os.makedirs(args.log_dir, exist_ok=True)
+    processes = [
+        start_process(standin_args, env, os.path.join(args.log_dir, "standins.log")),
+        start_process(backend_args, env, os.path.join(args.log_dir, "backend.log")),
+        start_process(smtp_args, env, os.path.join(args.log_dir, "smtp_standin.log")),
+    ]
+    try:
+        await wait_until_up(f"{standin_url}/stats", processes[0])
+        await wait_until_up(f"{backend_url}/api/health", processes[1])
+
+        rng = random.Random(args.seed)
+        state = {"business_ids": [], "email_business_ids": [], "favorite_ids": [], "campaign_ids": [], "search_ids": []}
+        results = []
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=backend_url, timeout=args.timeout, limits=limits) as client:
+            for scenario in build_scenarios(rng, state, args.search_requests, text_search=bool(args.mongo_url)):
+                if args.routes and not any(r in scenario.name for r in args.routes):
+                    continue
+                total = scenario.requests or args.requests
+                results.append(await run_scenario(client, scenario, total, args.concurrency))
+                print(format_row(results[-1]), flush=True)
+            upstream_calls = (await client.get(f"{standin_url}/stats")).json()
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "git_revision": git_revision(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("json", "log_dir")},
+        "upstream_calls": upstream_calls,
+        "results": results,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=HERE, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_row(result: Dict) -> str:
+    latency = result["latency_ms"]
+    return (f"{result['route']:<40} {result['requests']:>6} req {result['errors']:>5} err "
+            f"{result['throughput_rps']:>9.1f} rps  p50 {latency['p50']:>8.1f}  p95 {latency['p95']:>8.1f}  "
+            f"p99 {latency['p99']:>8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--search-requests", type=int, default=40, help="requests for the (slow) search route")
+    parser.add_argument("--routes", nargs="*", help="only run routes whose name contains one of these")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="stand-in upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--elements", type=int, default=200, help="Overpass elements per stand-in response")
+    parser.add_argument("--overpass-tail-rate", type=float, default=0.0, help="share of slow stand-in Overpass responses")
+    parser.add_argument("--overpass-tail-ms", type=float, default=2000.0, help="extra latency of a slow Overpass response")
+    parser.add_argument("--mongo-url", help="use this MongoDB instead of the in-memory one")
+    parser.add_argument("--standin-port", type=int, default=8099)
+    parser.add_argument("--backend-port", type=int, default=8098)
+    parser.add_argument("--smtp-port", type=int, default=8097)
+    parser.add_argument("--smtp-latency-ms", type=float, default=10.0, help="SMTP stand-in time per message")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--log-dir", default=os.path.join(tempfile.gettempdir(), "leadgen-bench"),
+                        help="where stand-in and backend logs go")
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    parser.add_argument("--max-error-rate", type=float, default=0.0,
+                        help="share of failed requests per route tolerated before the run fails")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    failing = [r for r in report["results"] if r["error_rate"] > args.max_error_rate]
+    report["passed"] = not failing
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json}")
+    if failing:
+        # Percentiles of a run with failures describe timeouts and retries, not the routes' latency
+        for result in failing:
+            print(f"FAILED {result['route']}: {result['errors']}/{result['requests']} errors {result['statuses']}"
+                  + (f", slowest failure {result['error_latency_ms_max']:.0f} ms" if result['error_latency_ms_max'] else ""),
+                  file=sys.stderr)
+        sys.exit(f"{len(failing)} route(s) over the {args.max_error_rate:.1%} error budget; "
+                 f"see the logs in {args.log_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the per-element search hot path.
+
+Runs process_osm_business and the helpers it calls over synthetic Overpass
+elements (same tag distribution as the stand-ins) with the network stubbed out,
+and reports ns/element plus allocation sizes from tracemalloc.
+
+    python benchmarks/micro_bench.py --save-baseline micro_baseline.json
+    python benchmarks/micro_bench.py --baseline micro_baseline.json --threshold 0.25
+
+With --baseline the exit status is 1 when any function is slower (or allocates
+more) than the baseline by more than the threshold. Baselines are machine
+specific, so record them on the machine that runs the comparison.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "backend"))
+sys.path.insert(0, HERE)
+
+import server  # noqa: E402
+from standins import synthetic_element  # noqa: E402
+
+SEARCH_TERMS = [
+    "restaurant", "AI startups", "dentist near me", "personal injury lawyer", "accounting firm",
+    "real estate agency", "digital marketing agency", "HVAC contractor", "yoga studio", "coffee",
+]
+COMPANY_INFO = [{}, {"name": "ACME LABS", "status": "Active"}, {"name": "ACME LABS", "status": "Dissolved"}]
+
+
+async def fake_company_info(company_name: str) -> Dict:
+    return COMPANY_INFO[len(company_name) % len(COMPANY_INFO)]
+
+
+def build_inputs(count: int, seed: int) -> Dict[str, List[Any]]:
+    rng = random.Random(seed)
+    elements = [synthetic_element(rng, i, 40.7, -74.0, 5000) for i in range(count)]
+    tags = [element["tags"] for element in elements]
+    business_data = [{
+        "business_type": rng.choice(["restaurant", "legal", "saas", "ai consulting"]),
+        "address": ", ".join(t[k] for k in ("addr:housenumber", "addr:street", "addr:city") if k in t),
+        "phone": t.get("phone", t.get("contact:phone")),
+        "website": t.get("website", t.get("contact:website")),
+        "email": t.get("email"),
+    } for t in tags]
+    return {
+        "elements": elements,
+        "business_data": list(zip(business_data, (COMPANY_INFO[i % 3] for i in range(count)))),
+        "scores": [rng.randint(0, 100) for _ in range(count)],
+        "terms": [rng.choice(SEARCH_TERMS) for _ in range(count)],
+        "phones": [t.get("phone", t.get("contact:phone")) for t in tags],
+        "websites": [t.get("website", t.get("contact:website")) for t in tags],
+    }
+
+
+def sync_runner(func: Callable, star: bool = False) -> Callable[[List[Any]], List[Any]]:
+    if star:
+        return lambda items: [func(*item) for item in items]
+    return lambda items: [func(item) for item in items]
+
+
+def process_runner(items: List[Dict]) -> List[Any]:
+    async def run():
+        return [await server.process_osm_business(element, "restaurant") for element in items]
+    return asyncio.run(run())
+
+
+def measure(run: Callable[[List[Any]], List[Any]], items: List[Any], repeats: int) -> Dict[str, float]:
+    run(items)  # warm-up
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        run(items)
+        best = min(best, time.perf_counter_ns() - start)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    results = run(items)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return {
+        "ns_per_element": round(best / len(items), 1),
+        "retained_bytes_per_element": round((after - before) / len(items), 1),
+        "peak_bytes": peak - before,
+    }
+
+
+def run_benchmarks(count: int, repeats: int, seed: int) -> Dict[str, Dict[str, float]]:
+    server.fetch_company_info = fake_company_info
+    inputs = build_inputs(count, seed)
+    suite = {
+        "map_custom_search_to_osm_tags": (sync_runner(server.map_custom_search_to_osm_tags), inputs["terms"]),
+        "calculate_lead_quality_score": (sync_runner(server.calculate_lead_quality_score, star=True), inputs["business_data"]),
+        "determine_lead_status": (sync_runner(server.determine_lead_status), inputs["scores"]),
+        "clean_phone": (sync_runner(server.clean_phone), inputs["phones"]),
+        "normalize_website": (sync_runner(server.normalize_website), inputs["websites"]),
+        "process_osm_business": (process_runner, inputs["elements"]),
+    }
+    return {name: measure(run, items, repeats) for name, (run, items) in suite.items()}
+
+
+def find_regressions(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    regressions = []
+    for name, metrics in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if not reference:
+            continue
+        for key in ("ns_per_element", "retained_bytes_per_element"):
+            limit = reference[key] * (1 + threshold)
+            if metrics[key] > limit and metrics[key] - reference[key] > 1:
+                regressions.append(f"{name}: {key} {metrics[key]} > {reference[key]} (+{threshold:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--elements", type=int, default=2000, help="synthetic elements per pass")
+    parser.add_argument("--repeats", type=int, default=7, help="timed passes; the fastest one is reported")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", help="compare against this baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--save-baseline", help="write results to this file")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    server.logger.setLevel("WARNING")
+    results = run_benchmarks(args.elements, args.repeats, args.seed)
+    report = {"config": {"elements": args.elements, "repeats": args.repeats, "seed": args.seed}, "results": results}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name, metrics in results.items():
+            print(f"{name:<32} {metrics['ns_per_element']:>10.1f} ns/element "
+                  f"{metrics['retained_bytes_per_element']:>9.1f} B/element retained "
+                  f"{metrics['peak_bytes']:>10} B peak")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
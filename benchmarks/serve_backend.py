@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Run backend/server.py for benchmarking, optionally on an in-memory MongoDB.
+
+    python benchmarks/serve_backend.py --port 8001 --in-memory-mongo
+
+Upstream URLs are taken from NOMINATIM_URL / OVERPASS_URL / OPENCORPORATES_URL,
+so set those to the stand-ins before starting.
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+
+class CopiedProjections:
+    """A mongomock collection that gets its own copy of every projection.
+
+    mongomock pops and re-adds _id in the projection dict it is given, so threads
+    sharing one of the server's projection constants (LEAD_PUBLIC_FIELDS) see it
+    half-rewritten: leaked ObjectIds and "dictionary changed size" errors that
+    MongoDB itself never produces.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def find(self, filter=None, projection=None, *args, **kwargs):
+        return self._collection.find(filter, dict(projection) if projection else projection, *args, **kwargs)
+
+    def find_one(self, filter=None, projection=None, *args, **kwargs):
+        return self._collection.find_one(filter, dict(projection) if projection else projection, *args, **kwargs)
+
+    def find_one_and_update(self, filter, update, projection=None, **kwargs):
+        return self._collection.find_one_and_update(
+            filter, update, dict(projection) if projection else projection, **kwargs)
+
+    def find_one_and_delete(self, filter, projection=None, **kwargs):
+        return self._collection.find_one_and_delete(filter, dict(projection) if projection else projection, **kwargs)
+
+
+def use_in_memory_mongo(server) -> None:
+    """Swap the server's collections for mongomock ones"""
+    try:
+        import mongomock
+    except ImportError:
+        sys.exit("--in-memory-mongo needs mongomock (pip install -r benchmarks/requirements.txt) "
+                 "or use a local MONGO_URL instead")
+    server.db = mongomock.MongoClient().leadgen_db
+    for attr in dir(server):
+        if attr.endswith("_collection"):
+            setattr(server, attr, CopiedProjections(server.db[getattr(server, attr).name]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--in-memory-mongo", action="store_true")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(BACKEND_DIR))
+    import server
+    if args.in_memory_mongo:
+        use_in_memory_mongo(server)
+
+    import uvicorn
+    uvicorn.run(server.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
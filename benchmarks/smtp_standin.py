@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Local SMTP stand-in for exercising the outreach workers.
+
+Accepts mail on any number of concurrent connections, never delivers it and
+counts what it received. Latency and failure replies are configurable:
+
+    python benchmarks/smtp_standin.py --port 8025 --latency-ms 20 --tempfail-rate 0.05
+
+Point the backend at it with:
+
+    SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_STARTTLS=false
+"""
+import argparse
+import asyncio
+import json
+import random
+from dataclasses import dataclass, field
+from typing import Dict
+
+
+@dataclass
+class SmtpStats:
+    connections: int = 0
+    messages: int = 0
+    tempfailed: int = 0
+    rejected: int = 0
+    by_domain: Dict[str, int] = field(default_factory=dict)
+
+    def summary(self) -> Dict:
+        return {
+            "connections": self.connections,
+            "messages": self.messages,
+            "tempfailed": self.tempfailed,
+            "rejected": self.rejected,
+            "domains": len(self.by_domain),
+        }
+
+
+class SmtpStandin:
+    """Just enough ESMTP for smtplib: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def __init__(self, latency_ms: float, tempfail_rate: float, reject_rate: float, seed: int):
+        self.latency = latency_ms / 1000
+        self.tempfail_rate = tempfail_rate
+        self.reject_rate = reject_rate
+        self.rng = random.Random(seed)
+        self.stats = SmtpStats()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats.connections += 1
+
+        async def reply(line: str):
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        await reply("220 standin ESMTP ready")
+        recipients = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip()
+                verb = command[:4].upper()
+                if verb == "EHLO":
+                    writer.write(b"250-standin\r\n250-PIPELINING\r\n250-8BITMIME\r\n250 SIZE 10485760\r\n")
+                    await writer.drain()
+                elif verb == "HELO":
+                    await reply("250 standin")
+                elif verb == "MAIL":
+                    recipients = []
+                    await reply("250 2.1.0 OK")
+                elif verb == "RCPT":
+                    address = command.split(":", 1)[-1].strip().strip("<>").split()[0] if ":" in command else ""
+                    roll = self.rng.random()
+                    if roll < self.reject_rate:
+                        self.stats.rejected += 1
+                        await reply("550 5.1.1 Mailbox unavailable")
+                    elif roll < self.reject_rate + self.tempfail_rate:
+                        self.stats.tempfailed += 1
+                        await reply("451 4.7.1 Try again later")
+                    else:
+                        recipients.append(address)
+                        await reply("250 2.1.5 OK")
+                elif verb == "DATA":
+                    if not recipients:
+                        await reply("503 5.5.1 No valid recipients")
+                        continue
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    while (await reader.readline()).rstrip(b"\r\n") != b".":
+                        pass
+                    await asyncio.sleep(max(0.0, self.rng.gauss(self.latency, self.latency / 4)))
+                    self.stats.messages += 1
+                    for address in recipients:
+                        domain = address.rsplit("@", 1)[-1].lower()
+                        self.stats.by_domain[domain] = self.stats.by_domain.get(domain, 0) + 1
+                    recipients = []
+                    await reply("250 2.0.0 Queued")
+                elif verb == "RSET":
+                    recipients = []
+                    await reply("250 2.0.0 OK")
+                elif verb == "NOOP":
+                    await reply("250 2.0.0 OK")
+                elif verb == "QUIT":
+                    await reply("221 2.0.0 Bye")
+                    break
+                else:
+                    await reply("502 5.5.2 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(args):
+    standin = SmtpStandin(args.latency_ms, args.tempfail_rate, args.reject_rate, args.seed)
+    server = await asyncio.start_server(standin.handle, args.host, args.port)
+    print(f"SMTP stand-in listening on {args.host}:{args.port}", flush=True)
+    async with server:
+        while True:
+            await asyncio.sleep(args.stats_interval)
+            print(json.dumps(standin.stats.summary()), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="time to accept one message")
+    parser.add_argument("--tempfail-rate", type=float, default=0.0, help="share of recipients answered with 451")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="share of recipients answered with 550")
+    parser.add_argument("--stats-interval", type=float, default=5.0, help="seconds between stats lines")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
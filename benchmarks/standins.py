@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""Local stand-ins for Nominatim, Overpass, OpenCorporates and lead websites.
+
+Serves all upstreams from one FastAPI app so benchmarks never touch the
+public services. Latency, error rate and payload size are configurable:
+
+    python benchmarks/standins.py --port 8099 --latency-ms 80 --error-rate 0.02 --elements 400
+
+Point the backend at it with:
+
+    NOMINATIM_URL=http://127.0.0.1:8099/search
+    OVERPASS_URL=http://127.0.0.1:8099/api/interpreter
+    (or OVERPASS_URLS=http://127.0.0.1:8099/mirror/a/api/interpreter,http://127.0.0.1:8099/mirror/b/api/interpreter)
+    OPENCORPORATES_URL=http://127.0.0.1:8099/v0.4/companies/search
+    CRAWL_SITE_PREFIX=http://127.0.0.1:8099/sites
+
+Every website host gets a deterministic small site under /sites/{host}/: a home
+page linking to /contact, contact details on one or both pages, and a share of
+sites that are missing, disallow crawling in robots.txt or serve oversized pages.
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+
+STREETS = ["Main St", "Broadway", "Market St", "2nd Ave", "Oak Rd", "Elm St", "Park Ave", "Mission St"]
+CITIES = ["New York", "San Francisco", "Austin", "Chicago", "Seattle"]
+WORDS = ["Acme", "Summit", "Bright", "Pioneer", "Harbor", "Atlas", "Nova", "Granite", "Maple", "Vertex"]
+SUFFIXES = ["Labs", "Partners", "Group", "Dental", "Law", "Consulting", "Studio", "Clinic", "Systems", "Co"]
+AROUND_RE = re.compile(r"around:([\d.]+),(-?[\d.]+),(-?[\d.]+)")
+
+
+@dataclass
+class UpstreamProfile:
+    """Behaviour of one stand-in upstream"""
+    latency_ms: float = 50.0
+    jitter_ms: float = 20.0
+    error_rate: float = 0.0
+    tail_rate: float = 0.0  # share of requests that are slowed down by tail_ms
+    tail_ms: float = 0.0
+
+
+@dataclass
+class StandinConfig:
+    nominatim: UpstreamProfile
+    overpass: UpstreamProfile
+    opencorporates: UpstreamProfile
+    elements: int = 200  # Overpass elements per response
+    company_hit_rate: float = 0.5  # share of OpenCorporates lookups that find a company
+    seed: int = 1
+    sites: UpstreamProfile = field(default_factory=UpstreamProfile)
+    oversized_page_bytes: int = 2 * 1024 * 1024
+
+
+@dataclass
+class SiteProfile:
+    """What one stand-in website looks like, derived from its host name"""
+    missing: bool  # every page 404s
+    robots_disallow: bool
+    oversized: bool  # home page padded past the crawler's size limit
+    email_on_home: bool
+    email_on_contact: bool
+    phone_link: bool
+
+    @classmethod
+    def for_host(cls, host: str) -> "SiteProfile":
+        roll = [b / 255 for b in hashlib.sha1(host.encode()).digest()]
+        return cls(
+            missing=roll[0] < 0.05,
+            robots_disallow=roll[1] < 0.05,
+            oversized=roll[2] < 0.03,
+            email_on_home=roll[3] < 0.2,
+            email_on_contact=roll[4] < 0.6,
+            phone_link=roll[5] < 0.5,
+        )
+
+
+def site_page(host: str, path: str, profile: SiteProfile, padding: int = 0) -> str:
+    name = host.split(".")[0].title()
+    parts = [f"<html><head><title>{name}</title></head><body>",
+             '<nav><a href="/">Home</a> <a href="/about">About us</a> <a href="/contact">Contact</a></nav>']
+    if path == "contact":
+        parts.append(f"<h1>Contact {name}</h1>")
+        if profile.email_on_contact:
+            parts.append(f'<p>Write to <a href="mailto:hello@{host}">hello&#64;{host}</a></p>')
+        if profile.phone_link:
+            parts.append('<p>Call <a href="tel:+1-555-010-0199">+1 (555) 010-0199</a></p>')
+    else:
+        parts.append(f"<h1>Welcome to {name}</h1><p>Serving the community since 2009.</p>")
+        if profile.email_on_home:
+            parts.append(f"<footer>info@{host}</footer>")
+        parts.append('<img src="/static/logo@2x.png">')
+    if padding:
+        parts.append("<!--" + "x" * padding + "-->")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def synthetic_element(rng: random.Random, element_id: int, lat: float, lon: float, radius_m: float) -> Dict:
+    """One Overpass element with a realistic spread of present/missing tags"""
+    spread = radius_m / 111_000
+    tags = {"name": f"{rng.choice(WORDS)} {rng.choice(SUFFIXES)} {element_id % 997}"}
+    if rng.random() < 0.85:
+        tags["addr:housenumber"] = str(rng.randint(1, 2000))
+        tags["addr:street"] = rng.choice(STREETS)
+    if rng.random() < 0.6:
+        tags["addr:city"] = rng.choice(CITIES)
+    if rng.random() < 0.3:
+        tags["addr:postcode"] = f"{rng.randint(10000, 99999)}"
+    if rng.random() < 0.55:
+        tags[rng.choice(["phone", "contact:phone"])] = f"+1 ({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}"
+    if rng.random() < 0.45:
+        tags[rng.choice(["website", "contact:website"])] = rng.choice(["", "https://", "http://www."]) + f"example{element_id}.com"
+    if rng.random() < 0.08:
+        tags["email"] = f"info@example{element_id}.com"
+    element_type = rng.choices(["node", "way", "relation"], weights=[70, 25, 5])[0]
+    point = {"lat": lat + rng.uniform(-spread, spread), "lon": lon + rng.uniform(-spread, spread)}
+    element = {"type": element_type, "id": element_id, "tags": tags}
+    if element_type == "node":
+        element.update(point)
+    else:
+        element["center"] = point
+    return element
+
+
+def create_app(config: StandinConfig) -> FastAPI:
+    app = FastAPI(title="Upstream stand-ins")
+    rng = random.Random(config.seed)
+    stats = {"nominatim": 0, "overpass": 0, "opencorporates": 0, "sites": 0, "errors": 0}
+
+    async def behave(name: str, profile: UpstreamProfile):
+        stats[name] += 1
+        delay = max(0.0, profile.latency_ms + rng.uniform(-profile.jitter_ms, profile.jitter_ms))
+        if rng.random() < profile.tail_rate:
+            delay += profile.tail_ms
+        await asyncio.sleep(delay / 1000)
+        if rng.random() < profile.error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": f"{name} stand-in injected failure"}, status_code=503)
+        return None
+
+    @app.get("/search")
+    async def nominatim(q: str = ""):
+        failure = await behave("nominatim", config.nominatim)
+        if failure:
+            return failure
+        # Deterministic coordinates per query string
+        digest = hashlib.sha1(q.encode()).digest()
+        lat = 25 + digest[0] / 255 * 20
+        lon = -120 + digest[1] / 255 * 45
+        return [{"lat": f"{lat:.6f}", "lon": f"{lon:.6f}", "display_name": q}]
+
+    @app.post("/api/interpreter")
+    @app.post("/mirror/{mirror}/api/interpreter")
+    async def overpass(request: Request):
+        # Read the query first: hedged requests are often abandoned while the stand-in sleeps
+        query = (await request.body()).decode()
+        failure = await behave("overpass", config.overpass)
+        if failure:
+            return failure
+        if query.startswith("data="):
+            query = query[len("data="):]
+        match = AROUND_RE.search(query)
+        radius_m, lat, lon = (float(v) for v in match.groups()) if match else (5000.0, 40.7, -74.0)
+        # Same area always yields the same elements
+        area_rng = random.Random(f"{config.seed}:{lat:.4f}:{lon:.4f}:{radius_m:.0f}")
+        base_id = area_rng.randint(1, 10**9)
+        elements: List[Dict] = [
+            synthetic_element(area_rng, base_id + i, lat, lon, radius_m) for i in range(config.elements)
+        ]
+        return {"version": 0.6, "generator": "standin", "elements": elements}
+
+    @app.get("/v0.4/companies/search")
+    async def opencorporates(q: str = ""):
+        failure = await behave("opencorporates", config.opencorporates)
+        if failure:
+            return failure
+        companies = []
+        if int(hashlib.sha1(q.encode()).hexdigest(), 16) % 1000 < config.company_hit_rate * 1000:
+            companies.append({"company": {
+                "name": q.upper(),
+                "company_type": "Active",
+                "registered_address_in_full": "1 Registry Plaza, Springfield",
+                "incorporation_date": "2015-06-01",
+            }})
+        return {"results": {"companies": companies}}
+
+    @app.get("/sites/{host}/{path:path}")
+    async def website(host: str, path: str = ""):
+        failure = await behave("sites", config.sites)
+        if failure:
+            return failure
+        profile = SiteProfile.for_host(host)
+        path = path.strip("/")
+        if path == "robots.txt":
+            if profile.robots_disallow:
+                return PlainTextResponse("User-agent: *\nDisallow: /\n")
+            return PlainTextResponse("User-agent: *\nDisallow: /admin\n")
+        if profile.missing or path not in ("", "about", "contact"):
+            return HTMLResponse("<html><body>Not found</body></html>", status_code=404)
+        padding = config.oversized_page_bytes if profile.oversized and path == "" else 0
+        return HTMLResponse(site_page(host, path, profile, padding))
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="base latency for every upstream")
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--overpass-latency-ms", type=float, help="override latency for Overpass only")
+    parser.add_argument("--overpass-tail-rate", type=float, default=0.0, help="share of slow Overpass responses")
+    parser.add_argument("--overpass-tail-ms", type=float, default=0.0, help="extra latency of a slow Overpass response")
+    parser.add_argument("--elements", type=int, default=200, help="Overpass elements per response")
+    parser.add_argument("--company-hit-rate", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    base = UpstreamProfile(args.latency_ms, args.jitter_ms, args.error_rate)
+    overpass = UpstreamProfile(
+        args.overpass_latency_ms if args.overpass_latency_ms is not None else args.latency_ms,
+        args.jitter_ms, args.error_rate, args.overpass_tail_rate, args.overpass_tail_ms)
+    config = StandinConfig(base, overpass, base, args.elements, args.company_hit_rate, args.seed, sites=base)
+
+    import uvicorn
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
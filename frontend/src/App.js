@@ -2,7 +2,7 @@ import React, { useState, useEffect, useRef } from 'react';
 import './App.css';
 
 // Leaflet map imports
-import { MapContainer, TileLayer, Marker, Popup, useMap } from 'react-leaflet';
+import { MapContainer, TileLayer, Marker, Popup, useMap, useMapEvents } from 'react-leaflet';
 import L from 'leaflet';
 import 'leaflet/dist/leaflet.css';
 
@@ -50,6 +50,56 @@ function MapController({ searchLocation }) {
   return null;
 }
 
+// Reports the visible bounds and zoom whenever the map stops moving
+function ViewportWatcher({ onViewportChange }) {
+  const map = useMapEvents({
+    moveend: () => report(),
+  });
+
+  const report = () => {
+    const bounds = map.getBounds();
+    onViewportChange({
+      south: bounds.getSouth(),
+      west: bounds.getWest(),
+      north: bounds.getNorth(),
+      east: bounds.getEast(),
+      zoom: map.getZoom()
+    });
+  };
+
+  useEffect(() => {
+    report();
+  }, []); // eslint-disable-line react-hooks/exhaustive-deps
+
+  return null;
+}
+
+// Server-side clusters for viewports holding too many leads to draw one marker each
+const CLUSTER_THRESHOLD = 200;
+
+function ClusterMarkers({ clusters, theme }) {
+  const map = useMap();
+
+  return clusters.map(cluster => {
+    const size = Math.min(56, 28 + Math.round(Math.log10(cluster.count) * 10));
+    const icon = L.divIcon({
+      html: `<div style="width:${size}px;height:${size}px;line-height:${size}px" class="lead-cluster ${theme === 'dark' ? 'lead-cluster-dark' : ''}">${cluster.count}</div>`,
+      className: '',
+      iconSize: [size, size],
+      iconAnchor: [size / 2, size / 2]
+    });
+    const [south, west, north, east] = cluster.bounds;
+    return (
+      <Marker
+        key={`${cluster.bounds.join(':')}`}
+        position={[cluster.lat, cluster.lon]}
+        icon={icon}
+        eventHandlers={{ click: () => map.fitBounds([[south, west], [north, east]]) }}
+      />
+    );
+  });
+}
+
 // Mock data for demo
 const mockCampaigns = [
   {
@@ -126,6 +176,9 @@ function App() {
   const [customSearch, setCustomSearch] = useState('');
   const [showCustomSearch, setShowCustomSearch] = useState(false);
   const [searchPerformed, setSearchPerformed] = useState(false);
+  const [searchedType, setSearchedType] = useState(null);
+  const [viewport, setViewport] = useState(null);
+  const [clusters, setClusters] = useState(null);
   
   // Outreach state
   const [campaigns, setCampaigns] = useState(mockCampaigns);
@@ -158,6 +211,37 @@ function App() {
     setTimeout(() => setMapLoading(false), 1500);
   }, [theme]);
 
+  useEffect(() => {
+    // Lead and favorite changes are pushed by the backend instead of being refetched;
+    // EventSource reconnects with Last-Event-ID, so nothing is missed across drops
+    const source = new EventSource(`${backendUrl}/api/events?user_id=default_user`);
+    const eventData = (event) => JSON.parse(event.data).data;
+    const updateLead = (event) => {
+      const lead = eventData(event);
+      setBusinesses(prev => prev.map(b => (b.id === lead.id ? { ...b, ...lead } : b)));
+      setFavorites(prev => prev.map(f => (f.id === lead.id ? { ...f, ...lead, favorite_id: f.favorite_id } : f)));
+    };
+
+    source.addEventListener('lead_upserted', updateLead);
+    source.addEventListener('lead_rescored', updateLead);
+    source.addEventListener('lead_removed', (event) => {
+      const lead = eventData(event);
+      setBusinesses(prev => prev.filter(b => b.id !== lead.id));
+    });
+    source.addEventListener('favorited', (event) => {
+      const favorite = eventData(event);
+      if (!favorite.name) return;
+      setFavorites(prev => (prev.some(f => f.favorite_id === favorite.favorite_id) ? prev : [...prev, favorite]));
+    });
+    source.addEventListener('unfavorited', (event) => {
+      const favorite = eventData(event);
+      setFavorites(prev => prev.filter(f => f.favorite_id !== favorite.favorite_id));
+    });
+    // Missed events are no longer retained: resync from scratch
+    source.addEventListener('reset', () => fetchFavorites());
+    return () => source.close();
+  }, [backendUrl]);
+
   const fetchBusinessTypes = async () => {
     try {
       const response = await fetch(`${backendUrl}/api/business-types`);
@@ -199,6 +283,7 @@ function App() {
       const data = await response.json();
       setBusinesses(data.businesses);
       setSearchLocation(data.search_location);
+      setSearchedType(searchData.business_type);
     } catch (error) {
       console.error('Search error:', error);
       alert('Search failed. Please try again.');
@@ -207,6 +292,27 @@ function App() {
     }
   };
 
+  useEffect(() => {
+    if (!viewport || !searchedType) return;
+    const controller = new AbortController();
+    const params = new URLSearchParams({
+      ...viewport,
+      business_type: searchedType,
+      min_quality_score: filters.min_quality_score
+    });
+    if (filters.lead_status) params.append('lead_status', filters.lead_status);
+
+    fetch(`${backendUrl}/api/clusters?${params}`, { signal: controller.signal })
+      .then(response => response.json())
+      .then(data => {
+        setClusters(data.mode === 'clusters' && data.total > CLUSTER_THRESHOLD ? data.clusters : null);
+      })
+      .catch(error => {
+        if (error.name !== 'AbortError') console.error('Error fetching clusters:', error);
+      });
+    return () => controller.abort();
+  }, [viewport, searchedType, filters.min_quality_score, filters.lead_status, backendUrl]);
+
   const addToFavorites = async (business) => {
     try {
       const response = await fetch(`${backendUrl}/api/favorites`, {
@@ -221,7 +327,6 @@ function App() {
       });
       
       if (response.ok) {
-        fetchFavorites();
         alert('Added to favorites!');
       }
     } catch (error) {
@@ -236,7 +341,6 @@ function App() {
       });
       
       if (response.ok) {
-        fetchFavorites();
         alert('Removed from favorites!');
       }
     } catch (error) {
@@ -1019,8 +1123,11 @@ function App() {
               />
               
               {searchLocation && <MapController searchLocation={searchLocation} />}
+              <ViewportWatcher onViewportChange={setViewport} />
+              
+              {clusters && <ClusterMarkers clusters={clusters} theme={theme} />}
               
-              {filteredBusinesses.map(business => (
+              {!clusters && filteredBusinesses.map(business => (
                 <Marker
                   key={business.id}
                   position={[business.lat, business.lon]}
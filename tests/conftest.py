@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """Point every collection of the server at a fresh in-memory MongoDB"""
+    mongomock = pytest.importorskip("mongomock")
+    db = mongomock.MongoClient().leadgen_db
+    monkeypatch.setattr(server, "db", db)
+    for attr in dir(server):
+        if attr.endswith("_collection"):
+            monkeypatch.setattr(server, attr, db[getattr(server, attr).name])
+    return db
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+def test_annulus_query_subtracts_the_inner_circle():
+    query = server.build_overpass_annulus_query("amenity=cafe", 40.0, -74.0, 2, 4)
+    assert query.count("(around:4000,40.0,-74.0)") == 3
+    assert query.count("(around:2000,40.0,-74.0)") == 3
+    assert ")->.outer;" in query and ")->.inner;" in query
+    assert "(.outer; - .inner;);" in query
+    assert query.index("->.inner;") < query.index("(.outer; - .inner;)") < query.index("out center meta;")
+
+
+@pytest.fixture
+def rings(monkeypatch):
+    """Every ring yields 2 leads, scored 80 and 20; returns the (inner, outer) radii fetched"""
+    fetched = []
+
+    def ring_elements(inner, outer):
+        fetched.append((inner, outer))
+        return server.OverpassElements([{"type": "node", "id": f"{outer}-{score}", "score": score}
+                                        for score in (80, 20)])
+
+    async def fetch_circle(lat, lon, radius, business_type, max_elements=None):
+        return ring_elements(0.0, radius)
+
+    async def fetch_annulus(lat, lon, inner_km, outer_km, business_type, max_elements=None):
+        return ring_elements(inner_km, outer_km)
+
+    async def qualify(elements, business_type, timings, company_info_fetcher, **kwargs):
+        return [{"id": e["id"], "name": e["id"], "quality_score": e["score"]} for e in elements]
+    monkeypatch.setattr(server, "ADAPTIVE_START_KM", 1.0)
+    monkeypatch.setattr(server, "ADAPTIVE_GROWTH", 2.0)
+    monkeypatch.setattr(server, "fetch_businesses_from_overpass", fetch_circle)
+    monkeypatch.setattr(server, "fetch_overpass_annulus", fetch_annulus)
+    monkeypatch.setattr(server, "qualify_businesses", qualify)
+    return fetched
+
+
+def search(**fields):
+    return server.BusinessSearch(business_type="cafe", location="Here", **fields)
+
+
+def test_rings_grow_until_enough_qualified_leads(rings):
+    elements, businesses, info = asyncio.run(server.adaptive_radius_search(
+        40.0, -74.0, search(target_leads=3, min_quality_score=50, max_radius=25), None, None))
+
+    assert rings == [(0.0, 1.0), (1.0, 2.0), (2.0, 4.0)]
+    assert info == {"searched_radius": 4.0, "rings": 3, "target_reached": True}
+    assert len(elements) == 6
+    assert [b["quality_score"] for b in businesses] == [80, 80, 80, 20, 20, 20]
+
+
+def test_rings_stop_at_the_maximum_radius(rings):
+    _, _, info = asyncio.run(server.adaptive_radius_search(
+        40.0, -74.0, search(target_leads=100, min_quality_score=50, max_radius=5), None, None))
+
+    assert rings == [(0.0, 1.0), (1.0, 2.0), (2.0, 4.0), (4.0, 5.0)]
+    assert info == {"searched_radius": 5.0, "rings": 4, "target_reached": False}
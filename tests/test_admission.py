@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_cancelled_waiter_leaves_no_entry_and_slot_goes_to_next():
+    async def scenario():
+        admission = server.AdmissionController(max_concurrent=1, max_queued=4, max_wait=5)
+        await admission.acquire(0)
+        first = asyncio.create_task(admission.acquire(0))
+        second = asyncio.create_task(admission.acquire(0))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        assert len(admission.waiters) == 1
+        admission.release(0.1)
+        await asyncio.wait_for(second, 1)
+        assert admission.active == 1 and not admission.waiters
+    run(scenario())
+
+
+def test_waiter_cancelled_after_grant_hands_the_slot_on():
+    async def scenario():
+        admission = server.AdmissionController(max_concurrent=1, max_queued=4, max_wait=5)
+        await admission.acquire(0)
+        first = asyncio.create_task(admission.acquire(0))
+        second = asyncio.create_task(admission.acquire(0))
+        await asyncio.sleep(0)
+        admission.release(0.1)  # grants first's future before first runs again
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await asyncio.wait_for(second, 1)
+        assert admission.active == 1 and not admission.waiters
+        admission.release(0.1)
+        assert admission.active == 0
+    run(scenario())
+
+
+def test_queue_timeout_removes_entry():
+    async def scenario():
+        admission = server.AdmissionController(max_concurrent=1, max_queued=4, max_wait=0.01)
+        await admission.acquire(0)
+        with pytest.raises(server.AdmissionRejected) as rejection:
+            await admission.acquire(0)
+        assert rejection.value.reason == "queue_timeout"
+        assert not admission.waiters
+    run(scenario())
+
+
+def test_middlewares_wrap_outermost_first():
+    # Queue time is measured by instrumentation but never sampled by the profiler
+    dispatchers = [m.kwargs["dispatch"].__name__ for m in server.app.user_middleware if "dispatch" in m.kwargs]
+    assert dispatchers == ["instrument_request", "admission_control", "profile_request"]
+
+
+def test_waiters_are_admitted_by_priority_then_arrival():
+    async def scenario():
+        admission = server.AdmissionController(max_concurrent=1, max_queued=4, max_wait=5)
+        await admission.acquire(0)
+        order = []
+
+        async def wait(name, priority):
+            await admission.acquire(priority)
+            order.append(name)
+
+        tasks = [asyncio.create_task(wait(name, priority))
+                 for name, priority in (("batch-1", 1), ("interactive-1", 0), ("batch-2", 1), ("interactive-2", 0))]
+        await asyncio.sleep(0)
+        for _ in tasks:
+            admission.release(0.1)
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert order == ["interactive-1", "interactive-2", "batch-1", "batch-2"]
+    run(scenario())
+
+
+def test_full_queue_displaces_the_newest_lower_priority_waiter():
+    async def scenario():
+        admission = server.AdmissionController(max_concurrent=1, max_queued=2, max_wait=5)
+        await admission.acquire(0)
+        older = asyncio.create_task(admission.acquire(1))
+        newer = asyncio.create_task(admission.acquire(1))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(admission.acquire(0))
+        await asyncio.sleep(0)
+        with pytest.raises(server.AdmissionRejected) as rejection:
+            await newer
+        assert rejection.value.reason == "displaced" and not older.done()
+        with pytest.raises(server.AdmissionRejected) as rejection:
+            await admission.acquire(1)  # nothing of a lower priority than batch to displace
+        assert rejection.value.reason == "queue_full"
+        admission.release(0.1)
+        await asyncio.wait_for(interactive, 1)
+        admission.release(0.1)
+        await asyncio.wait_for(older, 1)
+    run(scenario())
@@ -0,0 +1,69 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+LEADS = [
+    {"id": "a", "business_type": "restaurant", "lead_status": "hot", "quality_score": 85, "lat": 40.5, "lon": -73.5},
+    {"id": "b", "business_type": "restaurant", "lead_status": "cold", "quality_score": 12, "lat": 40.6, "lon": -73.6},
+    {"id": "c", "business_type": "legal", "lead_status": "warm", "quality_score": 55, "lat": 41.2, "lon": -72.1},
+]
+
+
+def test_rebuild_replaces_rollups_in_place(mongo):
+    mongo.businesses.insert_many([dict(lead) for lead in LEADS])
+    mongo.lead_rollups.insert_many([
+        {"_id": "type:restaurant", "kind": "business_type", "business_type": "restaurant", "count": 7},
+        {"_id": "type:bakery", "kind": "business_type", "business_type": "bakery", "count": 1},
+    ])
+    assert server.rebuild_lead_rollups() == 4
+    restaurant = mongo.lead_rollups.find_one({"_id": "type:restaurant"})
+    assert restaurant["count"] == 2 and restaurant["by_status"] == {"hot": 1, "cold": 1}
+    assert mongo.lead_rollups.find_one({"_id": "type:bakery"}) is None
+    assert mongo.lead_rollups.find_one({"_id": "region:40.0:-74.0"})["count"] == 2
+
+
+@pytest.mark.parametrize("token, headers, status", [
+    (None, {"Authorization": "Bearer s3cret"}, 404),
+    ("s3cret", {}, 401),
+    ("s3cret", {"Authorization": "Bearer wrong"}, 401),
+])
+def test_rebuild_route_requires_admin(mongo, monkeypatch, token, headers, status):
+    monkeypatch.setattr(server, "ADMIN_TOKEN", token)
+    mongo.lead_rollups.insert_one({"_id": "type:restaurant", "count": 7})
+    response = TestClient(server.app).post("/api/analytics/rebuild", headers=headers)
+    assert response.status_code == status
+    assert mongo.lead_rollups.find_one({"_id": "type:restaurant"})["count"] == 7
+
+
+def counters(mongo):
+    """Rollups without the zero counters incremental updates leave behind"""
+    rollups = {}
+    for doc in mongo.lead_rollups.find():
+        if doc.get("count"):
+            for field in ("by_status", "score_histogram"):
+                if field in doc:
+                    doc[field] = {key: value for key, value in doc[field].items() if value}
+            rollups[doc["_id"]] = doc
+    return rollups
+
+
+def test_incremental_rollups_match_a_rebuild(mongo):
+    def lead(osm_id, score, status, lat=40.5, lon=-73.5, business_type="restaurant"):
+        return {"id": f"osm-node-{osm_id}", "osm_type": "node", "osm_id": osm_id, "name": f"Lead {osm_id}",
+                "address": "1, Main St", "business_type": business_type, "lead_status": status,
+                "quality_score": score, "lat": lat, "lon": lon}
+
+    def search(business_type, businesses, radius=50):
+        elements = [{"type": "node", "id": b["osm_id"]} for b in businesses]
+        server.persist_search_results(business_type, 40.5, -73.5, radius, elements, businesses)
+
+    search("restaurant", [lead(1, 85, "hot"), lead(2, 12, "cold"), lead(3, 100, "hot", lat=41.2, lon=-72.1)])
+    search("legal", [lead(4, 55, "warm", business_type="legal")])
+    search("restaurant", [lead(1, 40, "warm"), lead(3, 100, "hot", lat=41.2, lon=-72.1)])  # rescored, 2 vanished
+    search("legal", [lead(1, 70, "warm", business_type="legal"), lead(4, 55, "warm", business_type="legal")])
+
+    incremental = counters(mongo)
+    server.rebuild_lead_rollups()
+    assert incremental == counters(mongo)
+    assert incremental["type:restaurant"]["count"] == 1 and incremental["type:legal"]["count"] == 2
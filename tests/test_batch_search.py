@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+import server
+
+TAG = "amenity=restaurant"
+
+
+def node(osm_id, lat, lon, **tags):
+    return {"type": "node", "id": osm_id, "lat": lat, "lon": lon,
+            "tags": {"name": f"Place {osm_id}", "addr:street": "Main St", "phone": "+1 212 555 0100",
+                     "website": f"place{osm_id}.example", **tags}}
+
+
+def test_overlapping_areas_are_coalesced_transitively():
+    a = (TAG, 40.70, -74.00, 2.0)
+    b = (TAG, 40.73, -74.00, 2.0)   # 3.3 km from a: overlaps it
+    c = (TAG, 40.76, -74.00, 2.0)   # overlaps only b
+    far = (TAG, 41.50, -74.00, 2.0)
+    groups = server.coalesce_areas([a, far, b, c])
+    assert sorted(map(sorted, groups)) == sorted([sorted([a, b, c]), [far]])
+    assert [len(group) for group in server.coalesce_areas([a, b, c], max_per_query=2)] == [2, 1]
+
+
+def test_union_elements_are_assigned_back_to_their_areas():
+    elements = server.OverpassElements([
+        node(1, 40.700, -74.000, amenity="restaurant"),
+        node(2, 40.700, -74.000, amenity="cafe"),        # other tag
+        node(3, 40.717, -74.000, amenity="restaurant"),  # 1.9 km out
+        node(4, 40.740, -74.000, amenity="restaurant"),  # 4.4 km out
+        {"type": "way", "id": 5, "center": {"lat": 40.719, "lon": -74.0}, "tags": {"amenity": "restaurant"}},
+    ])
+    matched = server.elements_in_area(elements, TAG, 40.70, -74.00, 2.0)
+    assert [e["id"] for e in matched] == [1, 3, 5] and matched.complete  # way centers get 10% slack
+    capped = server.elements_in_area(elements, TAG, 40.70, -74.00, 2.0, max_elements=2)
+    assert [e["id"] for e in capped] == [1, 3] and not capped.complete
+    elements.complete = False
+    assert not server.elements_in_area(elements, TAG, 40.70, -74.00, 2.0).complete
+
+
+@pytest.fixture
+def upstreams(monkeypatch, mongo):
+    """Fake geocoding and Overpass; returns the Overpass queries and the persisted searches"""
+    queries, saved = [], []
+    places = {"Downtown": (40.70, -74.00), "Uptown": (40.73, -74.00)}
+
+    async def geocode(location):
+        return places.get(location, (None, None))
+
+    async def overpass(query, *args, **kwargs):
+        queries.append(query)
+        return server.OverpassElements([
+            node(1, 40.700, -74.000, office="company"),
+            node(2, 40.715, -74.000, office="company"),  # inside both areas
+            node(3, 40.730, -74.000, office="company"),
+        ])
+
+    async def save(business_type, lat, lon, radius, elements, businesses):
+        saved.append((business_type, lat, sorted(b["id"] for b in businesses)))
+
+    async def company(name):
+        return {}
+    monkeypatch.setattr(server, "geocode_location", geocode)
+    monkeypatch.setattr(server, "post_overpass_query", overpass)
+    monkeypatch.setattr(server, "save_search_leads", save)
+    monkeypatch.setattr(server, "fetch_company_info", company)
+    return queries, saved
+
+
+def test_batch_shares_queries_and_stores_each_area_once(upstreams):
+    queries, saved = upstreams
+    batch = server.BatchSearch(searches=[
+        server.BusinessSearch(business_type="saas", location="Downtown", radius=2),
+        server.BusinessSearch(business_type="software", location="Downtown", radius=2),  # same OSM tag and area
+        server.BusinessSearch(business_type="saas", location="Uptown", radius=2),
+        server.BusinessSearch(business_type="saas", location="Nowhere", radius=2),
+    ])
+    response = asyncio.run(server.search_businesses_batch(batch))
+    results = response["results"]
+
+    assert len(queries) == 1  # the two overlapping areas go out as one union query
+    ids = [sorted(b["id"] for b in result["businesses"]) for result in results]
+    assert ids[0] == ids[1] == ["osm-node-1", "osm-node-2"]
+    assert ids[2] == ["osm-node-2", "osm-node-3"]
+    assert [result["complete"] for result in results] == [True, True, True, False]
+    assert results[3]["error"] == "Could not geocode location"
+    # Downtown is stored once, under its first search; the shared lead only with the first area
+    assert saved == [("saas", 40.70, ["osm-node-1", "osm-node-2"]), ("saas", 40.73, ["osm-node-3"])]
+    assert response["total_unique_leads"] == 3
@@ -0,0 +1,82 @@
+import json
+import time
+import urllib.parse
+
+import httpx
+import pytest
+from typer.testing import CliRunner
+
+import cli
+import server
+
+
+@pytest.fixture
+def upstreams(monkeypatch):
+    """Serve Nominatim, Overpass and OpenCorporates from memory; returns the request log"""
+    calls = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        if "nominatim" in request.url.host:
+            location = urllib.parse.parse_qs(request.url.query.decode())["q"][0]
+            calls.append(("geocode", location, time.monotonic()))
+            if location == "Nowhere":
+                return httpx.Response(200, json=[])
+            return httpx.Response(200, json=[{"lat": str(40 + len(location) / 100), "lon": "-74.0"}])
+        if "overpass" in request.url.host:
+            calls.append(("overpass", None, time.monotonic()))
+            lat = float(request.content.decode().split("around:")[1].split(",")[1])
+            elements = [{"type": "node", "id": int(lat * 1e4) * 100 + i, "lat": lat, "lon": -74.0,
+                         "tags": {"name": f"Shop {lat:.2f} {i}", "phone": "+1 555 010 2030",
+                                  "website": f"shop{i}.example", "addr:street": "Main St", "addr:housenumber": str(i)}}
+                        for i in range(3)]
+            return httpx.Response(200, json={"elements": elements})
+        calls.append(("company", None, time.monotonic()))
+        return httpx.Response(200, json={"results": {"companies": []}})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+    monkeypatch.setattr(server, "upstream_client", lambda: client)
+    return calls
+
+
+def invoke(*args):
+    return CliRunner().invoke(cli.app, [str(arg) for arg in args])
+
+
+def test_file_only_run_resumes_from_checkpoint(tmp_path, upstreams):
+    searches = tmp_path / "searches.csv"
+    searches.write_text("business_type,location,radius\nrestaurant,New York,\nlegal,Austin,3\nrestaurant,new  york,\n")
+    out = tmp_path / "leads.jsonl"
+
+    # No MongoDB is running here: a file-only run must not touch it
+    first = invoke("run", searches, "--no-mongo", "--out", out, "--limit", "1")
+    assert first.exit_code == 0, first.output
+    assert "3 searches, 0 already done, running 1" in first.output
+    assert len(out.read_text().splitlines()) == 3
+
+    second = invoke("run", searches, "--no-mongo", "--out", out)
+    assert second.exit_code == 0, second.output
+    assert "1 already done, running 1" in second.output  # "new  york" is the same search as "New York"
+    assert len(out.read_text().splitlines()) == 6
+    assert invoke("status", searches).output.strip() == "2/2 searches done, 6 leads, 0 incomplete"
+    assert "running 0" in invoke("run", searches, "--no-mongo", "--out", out).output
+
+
+def test_failed_searches_are_retried(tmp_path, upstreams):
+    searches = tmp_path / "searches.jsonl"
+    searches.write_text(json.dumps({"business_type": "legal", "location": "Nowhere"}) + "\n")
+    failed = invoke("run", searches, "--no-mongo", "--out", tmp_path / "leads.csv")
+    assert failed.exit_code == 1
+    checkpoint = (tmp_path / "searches.jsonl.checkpoint.jsonl").read_text().splitlines()
+    assert json.loads(checkpoint[-1])["error"] == "Could not geocode location"
+    assert "0 already done, running 1" in invoke("run", searches, "--no-mongo", "--out", tmp_path / "leads.csv").output
+
+
+def test_upstream_rates_are_limited(tmp_path, upstreams):
+    searches = tmp_path / "searches.csv"
+    searches.write_text("business_type,location\n" + "".join(f"shop,Town {i}\n" for i in range(4)))
+    result = invoke("run", searches, "--no-mongo", "--out", tmp_path / "leads.jsonl", "--concurrency", 4,
+                    "--geocode-rps", 10, "--overpass-rps", 0, "--company-rps", 0)
+    assert result.exit_code == 0, result.output
+    geocodes = [at for upstream, _, at in upstreams if upstream == "geocode"]
+    assert len(geocodes) == 4
+    assert all(later - earlier >= 0.09 for earlier, later in zip(geocodes, geocodes[1:]))
@@ -0,0 +1,50 @@
+import asyncio
+import random
+
+import pytest
+
+import server
+
+
+def make_leads(count, seed=3):
+    rng = random.Random(seed)
+    return [{
+        "id": f"lead-{i}", "name": f"Lead {i}", "business_type": rng.choice(["restaurant", "legal"]),
+        "lead_status": rng.choice(["hot", "warm", "cold"]), "quality_score": rng.randint(0, 100),
+        "lat": 40.7 + rng.uniform(-0.05, 0.05), "lon": -74.0 + rng.uniform(-0.05, 0.05),
+    } for i in range(count)]
+
+
+def expected_clusters(leads, zoom):
+    cells = {}
+    for lead in leads:
+        key = server.cluster_cell(lead["lat"], lead["lon"], zoom)
+        cells[key] = cells.get(key, 0) + 1
+    return cells
+
+
+@pytest.mark.parametrize("zoom", range(server.CLUSTER_POINTS_ZOOM))
+def test_clusters_match_the_leads_at_every_zoom(mongo, zoom):
+    leads = make_leads(120)
+    mongo.businesses.insert_many([dict(lead) for lead in leads])
+    server.rebuild_lead_clusters()
+    result = asyncio.run(server.get_map_clusters(south=40.6, west=-74.1, north=40.8, east=-73.9, zoom=zoom))
+    clusters = {server.cluster_cell((c["bounds"][0] + c["bounds"][2]) / 2, (c["bounds"][1] + c["bounds"][3]) / 2,
+                                    zoom): c for c in result["clusters"]}
+    assert {key: c["count"] for key, c in clusters.items()} == expected_clusters(leads, zoom)
+    for key, cluster in clusters.items():
+        members = [lead for lead in leads if server.cluster_cell(lead["lat"], lead["lon"], zoom) == key]
+        assert cluster["lat"] == pytest.approx(sum(m["lat"] for m in members) / len(members))
+
+
+def test_cells_are_stored_only_at_every_other_zoom(mongo):
+    server.apply_rollup_changes(added=make_leads(1))
+    stored = sorted(mongo.lead_clusters.distinct("zoom"))
+    assert stored == list(range(server.CLUSTER_POINTS_ZOOM - 1, -1, -server.CLUSTER_ZOOM_STEP))[::-1]
+
+
+def test_restoring_an_unchanged_lead_writes_no_cells(mongo):
+    lead = make_leads(1)[0]
+    server.apply_rollup_changes(removed=[lead], added=[dict(lead)])
+    assert mongo.lead_clusters.count_documents({}) == 0
+    assert mongo.lead_rollups.count_documents({}) == 0
@@ -0,0 +1,47 @@
+import functools
+import io
+from datetime import datetime
+
+import pytest
+
+import server
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+LEADS = [
+    {"id": f"osm-node-{i}", "osm_type": "node", "osm_id": i, "name": f"Cafe {i}", "business_type": "restaurant",
+     "address": f"{i} Main St", "phone": "+1 555 0100" if i % 2 else None, "website": None, "email": None,
+     "lat": 40.7 + i / 1000, "lon": -74.0, "quality_score": 50 + i, "lead_status": ("hot", "warm")[i % 2],
+     "last_updated": datetime(2024, 3, 1, 12, 30, i), "company_info": {"name": f"Cafe {i} LLC", "status": ""}}
+    for i in range(5)
+]
+
+
+@pytest.fixture
+def leads(mongo, monkeypatch):
+    # Several record batches per export
+    monkeypatch.setattr(server, "iter_lead_record_batches", functools.partial(server.iter_lead_record_batches,
+                                                                             batch_rows=2))
+    mongo.businesses.insert_many([dict(lead, search_terms=["cafe"]) for lead in LEADS])
+    mongo.businesses.insert_one({**LEADS[0], "id": "osm-node-9", "osm_id": 9, "quality_score": 10})
+
+
+@pytest.mark.parametrize("export_format", ["arrow", "parquet"])
+def test_export_round_trips_with_the_lead_schema(leads, export_format):
+    data = b"".join(server.stream_columnar_export({"quality_score": {"$gte": 50}}, export_format))
+    if export_format == "arrow":
+        table = pa.ipc.open_stream(data).read_all()
+    else:
+        table = pq.read_table(io.BytesIO(data))
+
+    assert table.schema.equals(server.lead_arrow_schema())
+    assert table.num_rows == len(LEADS)
+    rows = sorted(table.to_pylist(), key=lambda row: row["osm_id"])
+    for row, lead in zip(rows, LEADS):
+        assert row["id"] == lead["id"]
+        assert row["business_type"] == "restaurant" and row["lead_status"] == lead["lead_status"]
+        assert row["phone"] == lead["phone"] and row["website"] is None
+        assert row["quality_score"] == lead["quality_score"]
+        assert row["last_updated"] == lead["last_updated"]
+        assert row["company_name"] == f"Cafe {lead['osm_id']} LLC" and row["company_status"] is None
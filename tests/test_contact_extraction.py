@@ -0,0 +1,47 @@
+import base64
+import os
+import time
+
+import server
+
+SITE = "https://www.example.com"
+
+
+def test_extracts_emails_and_phones_own_domain_first():
+    page = """
+        <p>Write to owner@gmail.com or <a href="mailto:Info@Example.com?subject=hi">us</a>.</p>
+        <img src="logo@2x.png"> <script src="https://o1.ingest.sentry.io/x"></script>
+        <a href="tel:+1%20(555)%20010-2030">call</a>
+        <script type="application/ld+json">{"telephone": "+44 20 7946 0000"}</script>
+    """
+    emails, phones = server.extract_contacts(page, SITE)
+    assert emails == ["info@example.com", "owner@gmail.com"]
+    assert phones == ["+1 (555) 010-2030", "+44 20 7946 0000"]
+
+
+def test_ignores_local_parts_longer_than_allowed():
+    emails, _ = server.extract_contacts("x" * 65 + "@example.com sales@example.com", SITE)
+    assert emails == ["sales@example.com"]
+
+
+def test_finds_contact_page_on_same_host():
+    page = '<a href="https://other.org/contact">x</a><a class="nav" href="/kontakt">Kontakt</a>'
+    assert server.find_contact_page(page, SITE) == f"{SITE}/kontakt"
+
+
+def test_pathological_pages_scan_in_linear_time():
+    size = server.CRAWL_MAX_BYTES
+    blob = base64.b64encode(os.urandom(size * 3 // 4)).decode()
+    pages = [
+        f'<img src="data:image/png;base64,{blob}"> hello@example.com',
+        "a" * size,
+        "a." * (size // 2),
+        '<a href="/x">' * (size // 13),
+    ]
+    for page in pages:
+        started = time.perf_counter()
+        server.extract_contacts(page, SITE)
+        server.find_contact_page(page, SITE)
+        # Quadratic patterns took minutes on these inputs
+        assert time.perf_counter() - started < 3
+    assert server.extract_contacts(pages[0], SITE)[0][-1] == "hello@example.com"
@@ -0,0 +1,95 @@
+import asyncio
+import contextvars
+import time
+
+import server
+
+
+def in_context(deadline, coro):
+    """Run coro as a task whose request deadline is deadline"""
+    context = contextvars.copy_context()
+    context.run(server.current_deadline.set, deadline)
+    return asyncio.get_running_loop().create_task(coro, context=context)
+
+
+def test_limit_caps_stage_at_share_of_remaining_budget():
+    deadline = server.Deadline(10.0)
+    with deadline.limit(0.2):
+        assert 1.9 < deadline.timeout() <= 2.0
+        with deadline.limit(reserve=0.5):
+            assert deadline.timeout() <= 2.0  # never widened by an inner stage
+    with deadline.limit(reserve=0.1):
+        assert 8.9 < deadline.timeout() <= 9.0
+    assert deadline.timeout() > 9.9
+
+
+def test_deadline_counts_from_arrival():
+    deadline = server.Deadline(1.0, started=time.monotonic() - 0.75)
+    assert deadline.remaining() <= 0.25
+    deadline.expire("geocode")
+    deadline.expire("fetch")
+    assert deadline.summary()["expired_in"] == "geocode"
+
+
+def test_expired_waiter_does_not_cancel_shared_company_lookup(monkeypatch):
+    async def slow_company_info(name):
+        await asyncio.sleep(0.2)
+        return {"name": name}
+    monkeypatch.setattr(server, "fetch_company_info", slow_company_info)
+
+    async def scenario():
+        pool = server.CompanyInfoPool(4)
+        hurried = server.Deadline(0.05)
+        impatient = in_context(hurried, pool.fetch("Acme"))
+        patient = in_context(None, pool.fetch("acme "))
+        assert await impatient == {}
+        assert hurried.expired_in == "enrich"
+        assert await patient == {"name": "Acme"}
+        assert pool.unique_lookups == 1
+    asyncio.run(scenario())
+
+
+def test_lookup_is_cancelled_once_every_waiter_has_left(monkeypatch):
+    started = []
+
+    async def hanging_company_info(name):
+        started.append(name)
+        await asyncio.sleep(60)
+    monkeypatch.setattr(server, "fetch_company_info", hanging_company_info)
+
+    async def scenario():
+        pool = server.CompanyInfoPool(4)
+        deadline = server.Deadline(0.05)
+        results = await asyncio.gather(*(in_context(deadline, pool.fetch("Acme")) for _ in range(3)))
+        assert results == [{}, {}, {}]
+        lookup = pool._lookups["acme"]
+        await asyncio.sleep(0)
+        assert lookup.cancelled()
+        assert await in_context(deadline, pool.fetch("Acme")) == {}  # no new lookup once abandoned
+        assert started == ["Acme"]
+    asyncio.run(scenario())
+
+
+def test_partial_fetch_is_kept_and_flagged_incomplete(monkeypatch):
+    async def partial_tiled(lat, lon, radius, business_type):
+        server.current_deadline.get().expire("fetch")
+        elements = server.OverpassElements([
+            {"type": "node", "id": 1, "lat": 40.7, "lon": -74.0,
+             "tags": {"name": "Cafe", "phone": "+1 555 010 2030", "website": "cafe.example",
+                      "addr:street": "Main St", "addr:housenumber": "1"}},
+        ])
+        elements.complete = False
+        return elements
+
+    async def no_company_info(name):
+        return {}
+    monkeypatch.setattr(server, "fetch_businesses_tiled", partial_tiled)
+    monkeypatch.setattr(server, "fetch_company_info", no_company_info)
+
+    async def scenario():
+        search = server.BusinessSearch(business_type="restaurant", location="x", lat=40.7, lon=-74.0)
+        server.current_deadline.set(server.Deadline(5.0))
+        return await server.run_business_search(search, None, persist=False)
+    result = asyncio.run(scenario())
+    assert not result["complete"]
+    assert [b["name"] for b in result["businesses"]] == ["Cafe"]
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+import server
+
+LEADS = [
+    ("1", "Café Zürich", "12 Rue de l'Église", 90),
+    ("2", "Cafeteria Nova", "3 Harbor Rd", 70),
+    ("3", "Harbor Grill", "8 Bahnhofstraße", 80),
+    ("4", "Zurich Legal", "1 Main St", 60),
+]
+
+
+@pytest.fixture
+def leads(mongo):
+    for lead_id, name, address, score in LEADS:
+        lead = {"id": lead_id, "name": name, "address": address, "business_type": "restaurant",
+                "lead_status": "warm", "quality_score": score}
+        mongo.businesses.insert_one({**lead, "search_terms": server.lead_search_terms(lead)})
+
+
+def suggest(q, **filters):
+    response = asyncio.run(server.autocomplete_stored_leads(
+        q, **{"business_type": None, "min_quality_score": 0, "lead_status": None, "limit": 10, **filters}))
+    return [suggestion["id"] for suggestion in response["suggestions"]]
+
+
+def test_search_terms_are_folded_tokens():
+    assert server.lead_search_terms({"name": "Café Zürich", "address": "8 Bahnhofstraße"}) == [
+        "cafe", "zurich", "8", "bahnhofstraße"]
+
+
+@pytest.mark.parametrize("q, expected", [
+    ("caf", ["1", "2"]),           # prefix of "cafe" and "cafeteria", best score first
+    ("CAFÉ", ["1", "2"]),          # case and accents are folded in the query too
+    ("cafe ", ["1"]),              # a trailing space makes the last word whole
+    ("zür", ["1", "4"]),
+    ("harbor g", ["3"]),           # earlier words must match whole words
+    ("eglise", ["1"]),             # address words count
+    ("grill harbor", ["3"]),       # word order doesn't matter
+    ("nov caf", []),
+    ("  ", []),
+])
+def test_prefix_matching(leads, q, expected):
+    assert suggest(q) == expected
+
+
+def test_filters_and_limit(leads):
+    assert suggest("caf", min_quality_score=80) == ["1"]
+    assert suggest("zur", limit=1) == ["1"]
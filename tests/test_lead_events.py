@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+import server
+
+
+@pytest.fixture
+def events(mongo, monkeypatch):
+    """An idle hub and a log of three lead events, seq 1 to 3"""
+    monkeypatch.setattr(server, "lead_event_hub", server.LeadEventHub())
+    server.append_lead_events([
+        server.lead_event("lead_upserted", {"id": "a", "business_type": "restaurant"}),
+        server.lead_event("lead_rescored", {"id": "b", "business_type": "legal"}),
+        server.lead_event("lead_removed", {"id": "c", "business_type": "restaurant"}),
+    ])
+    return mongo
+
+
+def connect(since=None, business_type=None, headers=(), frames=2):
+    """Open GET /api/events and read its first frames after the retry hint"""
+    async def read():
+        request = Request({"type": "http", "method": "GET", "path": "/api/events", "query_string": b"",
+                           "headers": [(name.lower().encode(), value.encode()) for name, value in headers]})
+        response = await server.stream_lead_events(request, user_id="ann", business_type=business_type,
+                                                   types=None, since=since)
+        stream = response.body_iterator
+        try:
+            assert (await stream.__anext__()).startswith("retry: ")
+            return [await asyncio.wait_for(stream.__anext__(), 1) for _ in range(frames)]
+        finally:
+            await stream.aclose()
+    return asyncio.run(read())
+
+
+def frame(text):
+    fields = dict(line.split(": ", 1) for line in text.strip().splitlines())
+    return fields["id"], fields["event"]
+
+
+def test_last_event_id_replays_the_missed_events(events):
+    assert [frame(f) for f in connect(headers=[("Last-Event-ID", "1")])] == [
+        ("2", "lead_rescored"), ("3", "lead_removed")]
+    assert not server.lead_event_hub.subscribers
+
+
+def test_last_event_id_takes_precedence_over_since(events):
+    assert [frame(f) for f in connect(since=0, headers=[("Last-Event-ID", "2")], frames=1)] == [
+        ("3", "lead_removed")]
+
+
+def test_replay_applies_the_subscription_filter(events):
+    assert [frame(f) for f in connect(since=0, business_type="restaurant")] == [
+        ("1", "lead_upserted"), ("3", "lead_removed")]
+
+
+def test_expired_resume_token_sends_reset(events):
+    events.lead_events.delete_one({"seq": 1})  # aged out of the log
+    [reset] = connect(since=0, frames=1)
+    assert frame(reset) == ("3", "reset")
+    assert '"reason": "resume token expired"' in reset
+
+
+def test_resume_token_from_the_future_sends_reset(events):
+    assert frame(connect(headers=[("Last-Event-ID", "42")], frames=1)[0]) == ("3", "reset")
+
+
+def test_invalid_last_event_id_is_rejected(events):
+    with pytest.raises(server.HTTPException) as error:
+        connect(headers=[("Last-Event-ID", "abc")])
+    assert error.value.status_code == 400
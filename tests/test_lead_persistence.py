@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import server
+
+NOW = datetime(2026, 1, 15, 12, 0)
+
+
+def lead(osm_id, lat=40.700, lon=-74.000, business_type="restaurant", score=60, **fields):
+    return {"id": server.osm_lead_id("node", osm_id), "osm_type": "node", "osm_id": osm_id,
+            "name": f"Place {osm_id}", "address": "1, Main St", "business_type": business_type, "lead_status": "warm",
+            "quality_score": score, "lat": lat, "lon": lon, "last_updated": NOW, **fields}
+
+
+def element(osm_id):
+    return {"type": "node", "id": osm_id}
+
+
+def stored_ids(mongo):
+    return sorted(doc["id"] for doc in mongo.businesses.find())
+
+
+def test_search_merge_only_touches_its_own_area_and_type(mongo):
+    mongo.businesses.insert_many([
+        lead(1),                                   # returned again, rescored
+        lead(2),                                   # vanished from OSM
+        lead(3),                                   # vanished but favorited
+        lead(4, lat=40.800),                       # outside the searched circle
+        lead(5, lat=40.708, lon=-73.990),          # inside the bounding box, outside the circle
+        lead(6, business_type="cafe"),             # another business type
+    ])
+    mongo.favorites.insert_one({"id": "fav-3", "user_id": "ann", "business_id": "osm-node-3"})
+    businesses = [lead(1, score=80), lead(7)]
+
+    changes = server.persist_search_results("restaurant", 40.700, -74.000, 1.0,
+                                            server.OverpassElements([element(1), element(7)]), businesses)
+
+    assert stored_ids(mongo) == ["osm-node-1", "osm-node-3", "osm-node-4", "osm-node-5", "osm-node-6", "osm-node-7"]
+    assert mongo.businesses.find_one({"id": "osm-node-1"})["quality_score"] == 80
+    assert [(e["type"], e["business_id"]) for e in changes.events] == [
+        ("lead_rescored", "osm-node-1"), ("lead_upserted", "osm-node-7"), ("lead_removed", "osm-node-2")]
+    assert changes.touched_types == {"restaurant"}
+
+
+def test_incomplete_response_removes_nothing(mongo):
+    mongo.businesses.insert_many([lead(1), lead(2)])
+    elements = server.OverpassElements([element(1)])
+    elements.complete = False
+
+    changes = server.persist_search_results("restaurant", 40.700, -74.000, 1.0, elements, [lead(1)])
+
+    assert stored_ids(mongo) == ["osm-node-1", "osm-node-2"]
+    assert all(e["type"] != "lead_removed" for e in changes.events)
+
+
+def test_remove_vanished_leads_keeps_favorites(mongo):
+    mongo.businesses.insert_many([lead(1), lead(2), lead(3)])
+    mongo.favorites.insert_one({"id": "fav-2", "user_id": "ann", "business_id": "osm-node-2"})
+    changes = server.LeadChanges()
+
+    assert server.remove_vanished_leads("restaurant", 40.700, -74.000, 1.0, [element(1)], changes) == 1
+    assert stored_ids(mongo) == ["osm-node-1", "osm-node-2"]
+    assert [e["business_id"] for e in changes.events] == ["osm-node-3"]
+
+
+def test_sweep_removes_stale_leads_but_not_favorites(mongo, monkeypatch):
+    monkeypatch.setattr(server, "LEAD_SWEEP_BATCH", 2)  # favorites kept in one batch must not stall the next
+    stale = NOW - timedelta(hours=server.LEAD_TTL_HOURS + 1)
+    mongo.businesses.insert_many([lead(1, last_updated=stale), lead(2, last_updated=stale),
+                                  lead(3, last_updated=stale), lead(4, last_updated=stale), lead(5)])
+    mongo.favorites.insert_many([{"id": "fav-1", "user_id": "ann", "business_id": "osm-node-1"},
+                                 {"id": "fav-2", "user_id": "bob", "business_id": "osm-node-2"}])
+    server.apply_rollup_changes(added=list(mongo.businesses.find()))
+
+    changes = server.sweep_stale_leads(now=NOW)
+
+    assert stored_ids(mongo) == ["osm-node-1", "osm-node-2", "osm-node-5"]
+    assert sorted(e["business_id"] for e in changes.events) == ["osm-node-3", "osm-node-4"]
+    assert mongo.lead_rollups.find_one({"_id": "type:restaurant"})["count"] == 3
+    assert mongo.lead_clusters.count_documents({"count": {"$lte": 0}}) == 0
@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import replica
+import server
+
+pytest.importorskip("numpy")
+
+
+def lead(**fields):
+    return {
+        "id": "node/1", "osm_type": "node", "osm_id": 1, "name": "Cafe", "business_type": "restaurant",
+        "address": "1 Main St", "phone": None, "website": "https://cafe.example", "email": None,
+        "lat": 40.7, "lon": -74.0, "quality_score": 50, "lead_status": "warm",
+        "last_updated": datetime(2024, 1, 1), "company_info": {}, **fields,
+    }
+
+
+def test_upsert_merges_into_existing_row_like_set():
+    store = replica.LeadColumnStore()
+    store.load([lead()])
+    crawled_at = datetime(2024, 1, 2)
+    store.apply([server.lead_event("lead_rescored", lead(email="hi@cafe.example", quality_score=80,
+                                                         lead_status="hot", website_crawled_at=crawled_at))])
+    # A later search rewrites the lead without the crawl-only fields
+    search_write = {key: value for key, value in lead(quality_score=82, lead_status="hot").items() if key != "email"}
+    store.apply([server.lead_event("lead_upserted", search_write)])
+
+    [stored] = store.query()
+    assert stored["email"] == "hi@cafe.example"
+    assert stored["website_crawled_at"] == crawled_at
+    assert stored["quality_score"] == 82
+    assert store.query(has_contacts=replica.LEAD_REPLICA_HAS_EMAIL) == [stored]
+
+
+def test_removed_lead_is_not_resurrected_with_old_fields():
+    store = replica.LeadColumnStore()
+    store.load([lead(email="old@cafe.example")])
+    store.apply([server.lead_event("lead_removed", lead())])
+    store.apply([server.lead_event("lead_upserted", lead())])
+    [stored] = store.query()
+    assert stored["email"] is None
+
+
+QUERIES = [
+    {},
+    {"business_type": "restaurant"},
+    {"business_type": "legal", "min_quality_score": 0},
+    {"lead_status": "hot", "min_quality_score": 40},
+    {"business_type": "dentist"},
+    {"sort": "-quality_score", "limit": 5},
+    {"sort": "last_updated", "min_quality_score": 0},
+    {"business_type": "restaurant", "sort": "quality_score", "min_quality_score": 0},
+    {"south": 40.0, "west": -75.0, "north": 41.0, "east": -73.0, "min_quality_score": 0},
+    {"south": -20.0, "west": 170.0, "north": -10.0, "east": -170.0, "min_quality_score": 0,
+     "sort": "-last_updated"},  # crosses the antimeridian
+]
+
+
+@pytest.mark.parametrize("params", QUERIES)
+def test_replica_answers_like_mongodb(mongo, monkeypatch, params):
+    places = [(40.7, -74.0), (40.2, -73.5), (51.5, -0.1), (-17.5, 178.5), (-15.0, -175.0), (-15.0, 160.0)]
+    mongo.businesses.insert_many([
+        lead(id=f"node/{i}", osm_id=i, name=f"Lead {i}", business_type=("restaurant", "legal")[i % 2],
+             lead_status=("hot", "warm", "cold")[i % 3], quality_score=(i * 37) % 100,
+             lat=places[i % len(places)][0], lon=places[i % len(places)][1],
+             last_updated=datetime(2024, 1, 1 + (i * 7) % 28, i), email=f"lead{i}@example.com" if i % 4 else None,
+             search_terms=["lead"])
+        for i in range(24)
+    ])
+
+    def get(store):
+        monkeypatch.setattr(server, "lead_replica", store)
+        monkeypatch.setattr(server, "business_query_cache", server.BusinessQueryCache())
+        return asyncio.run(server.get_businesses(**{"min_quality_score": 60, "lead_status": None, "limit": 100,
+                                                    "business_type": None, "sort": None, "south": None,
+                                                    "west": None, "north": None, "east": None, **params}))
+
+    from_mongo = get(None)
+    store = replica.LeadColumnStore()
+    monkeypatch.setattr(server, "lead_replica", store)
+    server.load_lead_replica()
+    from_replica = get(store)
+
+    assert from_replica == from_mongo
+    assert from_mongo["total"] or params.get("business_type") == "dentist"
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+import server
+
+LEGACY = {"id": "5f0c7d2e-legacy", "name": "Harbor Grill", "address": "12, Dock St", "business_type": "restaurant",
+          "lead_status": "warm", "quality_score": 60, "lat": 40.70, "lon": -74.00}
+
+
+def element(osm_id, name="Harbor Grill", housenumber="12"):
+    return {"type": "node", "id": osm_id, "lat": 40.7001, "lon": -74.0001,
+            "tags": {"name": name, "addr:housenumber": housenumber, "addr:street": "Dock St"}}
+
+
+@pytest.fixture
+def overpass(monkeypatch):
+    """Answer the migration's Overpass lookups from a list; returns the queries made"""
+    queries, responses = [], []
+
+    async def post(query, *args, **kwargs):
+        queries.append(query)
+        return responses.pop(0)
+    monkeypatch.setattr(server, "post_overpass_query", post)
+    monkeypatch.setattr(server, "lead_replica", None)
+    return queries, responses
+
+
+def favorite(mongo, user_id, business_id):
+    mongo.favorites.insert_one({"id": f"fav-{user_id}-{business_id}", "user_id": user_id, "business_id": business_id})
+
+
+def test_unsearched_legacy_lead_takes_its_osm_id(mongo, overpass):
+    queries, responses = overpass
+    mongo.businesses.insert_one(dict(LEGACY))
+    favorite(mongo, "ann", LEGACY["id"])
+    responses.append(server.OverpassElements([element(42, housenumber="14"), element(43)]))
+
+    assert asyncio.run(server.migrate_legacy_favorites()) == 1
+    assert '"name"="Harbor Grill"' in queries[0]
+    lead = mongo.businesses.find_one({"name": "Harbor Grill"})
+    assert lead["id"] == "osm-node-43" and lead["osm_id"] == 43
+    assert mongo.favorites.find_one({"user_id": "ann"})["business_id"] == "osm-node-43"
+    assert mongo.businesses.count_documents({}) == 1
+
+
+def test_legacy_lead_merges_into_the_stored_osm_lead(mongo, overpass):
+    queries, _ = overpass
+    mongo.businesses.insert_many([dict(LEGACY), {**LEGACY, "id": "osm-way-7", "osm_type": "way", "osm_id": 7}])
+    favorite(mongo, "ann", LEGACY["id"])
+    favorite(mongo, "bob", LEGACY["id"])
+    favorite(mongo, "bob", "osm-way-7")
+
+    assert asyncio.run(server.migrate_legacy_favorites()) == 1
+    assert not queries
+    assert mongo.businesses.find_one({"id": LEGACY["id"]}) is None
+    assert sorted(f["user_id"] for f in mongo.favorites.find({"business_id": "osm-way-7"})) == ["ann", "bob"]
+    assert mongo.favorites.count_documents({}) == 2
+
+
+def test_ambiguous_match_is_marked_and_not_retried(mongo, overpass):
+    queries, responses = overpass
+    mongo.businesses.insert_one(dict(LEGACY))
+    favorite(mongo, "ann", LEGACY["id"])
+    responses.append(server.OverpassElements([element(1), element(2)]))
+
+    assert asyncio.run(server.migrate_legacy_favorites()) == 0
+    assert mongo.businesses.find_one({"id": LEGACY["id"]})["legacy_unmatched"] is True
+    assert asyncio.run(server.migrate_legacy_favorites()) == 0
+    assert len(queries) == 1
+    assert mongo.favorites.find_one({"user_id": "ann"})["business_id"] == LEGACY["id"]
+
+
+def test_failed_lookup_is_retried_on_the_next_start(mongo, overpass):
+    queries, responses = overpass
+    mongo.businesses.insert_one(dict(LEGACY))
+    favorite(mongo, "ann", LEGACY["id"])
+    responses.extend([server.OverpassElements.failed(), server.OverpassElements([element(43)])])
+
+    assert asyncio.run(server.migrate_legacy_favorites()) == 0
+    assert "legacy_unmatched" not in mongo.businesses.find_one({"id": LEGACY["id"]})
+    assert asyncio.run(server.migrate_legacy_favorites()) == 1
+    assert mongo.favorites.find_one({"user_id": "ann"})["business_id"] == "osm-node-43"
@@ -0,0 +1,114 @@
+import smtplib
+from datetime import datetime, timedelta
+
+import pytest
+
+import outreach
+import server
+
+
+class FakeSender:
+    """Records sent mail, or raises the given error for every message"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.sent = []
+
+    def send(self, email):
+        if self.error:
+            raise self.error
+        self.sent.append(email)
+
+
+@pytest.fixture
+def queue(mongo, monkeypatch):
+    """A campaign of three leads, two of them on one domain; returns the campaign"""
+    monkeypatch.setattr(outreach, "outreach_domain_cooldowns", {})
+    mongo.businesses.insert_many([
+        {"id": "lead-1", "name": "Alpha", "email": "info@alpha.example", "quality_score": 90, "lead_status": "hot"},
+        {"id": "lead-2", "name": "Alpha Labs", "email": "sales@alpha.example", "quality_score": 80,
+         "lead_status": "hot"},
+        {"id": "lead-3", "name": "Beta", "email": "hello@beta.example", "quality_score": 70, "lead_status": "warm"},
+    ])
+    return outreach.enqueue_outreach_campaign(server.OutreachCampaign(
+        name="Spring", subject="Hi {{business_name}}", body="Hello {{business_name}}"))
+
+
+def test_campaign_queues_one_rendered_message_per_lead(mongo, queue):
+    assert queue["total"] == 3 and queue["status"] == "running"
+    message = mongo.outreach_messages.find_one({"business_id": "lead-1"})
+    assert message["subject"] == "Hi Alpha" and message["domain"] == "alpha.example"
+
+
+def test_leased_message_is_reclaimed_once_its_lease_expires(mongo, queue, monkeypatch):
+    monkeypatch.setattr(outreach, "OUTREACH_DOMAIN_INTERVAL", 0)
+    first = outreach.claim_outreach_message("worker-a")
+    assert first["status"] == "sending" and first["worker"] == "worker-a"
+
+    claimed = {outreach.claim_outreach_message("worker-b")["id"] for _ in range(2)}
+    assert first["id"] not in claimed
+    assert outreach.claim_outreach_message("worker-b") is None
+
+    mongo.outreach_messages.update_one({"id": first["id"]},
+                                       {"$set": {"lease_until": datetime.now() - timedelta(seconds=1)}})
+    assert outreach.claim_outreach_message("worker-b")["id"] == first["id"]
+
+
+def test_busy_domain_slot_requeues_the_message(mongo, queue):
+    first = outreach.claim_outreach_message("worker-a")
+    assert first["domain"] == "alpha.example"
+    slot = mongo.outreach_domains.find_one({"_id": "alpha.example"})["next_send_at"]
+
+    # The other alpha.example message collides with the taken slot and waits for it
+    second = outreach.claim_outreach_message("worker-a")
+    assert second["domain"] == "beta.example"
+    waiting = mongo.outreach_messages.find_one({"domain": "alpha.example", "id": {"$ne": first["id"]}})
+    assert waiting["status"] == "queued" and waiting["next_attempt_at"] == slot
+    assert "lease_until" not in waiting
+    assert outreach.outreach_domain_cooldowns == {"alpha.example": slot}
+    assert outreach.claim_outreach_message("worker-a") is None
+
+
+def test_temporary_rejection_is_retried_with_backoff(mongo, queue):
+    message = outreach.claim_outreach_message("worker-a")
+    error = smtplib.SMTPRecipientsRefused({message["to"]: (450, b"mailbox busy")})
+    before = datetime.now()
+
+    outreach.deliver_outreach_message(FakeSender(error), message)
+
+    stored = mongo.outreach_messages.find_one({"id": message["id"]})
+    assert stored["status"] == "queued" and stored["attempts"] == 1
+    delay = (stored["next_attempt_at"] - before).total_seconds()
+    assert 0.8 * outreach.OUTREACH_RETRY_BASE <= delay <= 1.2 * outreach.OUTREACH_RETRY_BASE + 1
+    assert mongo.outreach_campaigns.find_one({"id": queue["id"]})["failed"] == 0
+
+
+def test_retries_stop_after_the_last_attempt(mongo, queue):
+    message = outreach.claim_outreach_message("worker-a")
+    message["attempts"] = outreach.OUTREACH_MAX_ATTEMPTS - 1
+
+    outreach.deliver_outreach_message(FakeSender(smtplib.SMTPServerDisconnected("gone")), message)
+
+    assert mongo.outreach_messages.find_one({"id": message["id"]})["status"] == "failed"
+
+
+def test_permanent_rejection_fails_the_message(mongo, queue):
+    message = outreach.claim_outreach_message("worker-a")
+
+    outreach.deliver_outreach_message(FakeSender(smtplib.SMTPResponseException(550, b"no such user")), message)
+
+    stored = mongo.outreach_messages.find_one({"id": message["id"]})
+    assert stored["status"] == "failed" and stored["attempts"] == 1 and "550" in stored["last_error"]
+    assert mongo.outreach_campaigns.find_one({"id": queue["id"]})["failed"] == 1
+
+
+def test_campaign_completes_when_every_message_is_done(mongo, queue, monkeypatch):
+    monkeypatch.setattr(outreach, "OUTREACH_DOMAIN_INTERVAL", 0)
+    sender = FakeSender()
+    while (message := outreach.claim_outreach_message("worker-a")) is not None:
+        outreach.deliver_outreach_message(sender, message)
+
+    assert sorted(email["To"] for email in sender.sent) == [
+        "hello@beta.example", "info@alpha.example", "sales@alpha.example"]
+    campaign = mongo.outreach_campaigns.find_one({"id": queue["id"]})
+    assert campaign["sent"] == 3 and campaign["status"] == "completed"
@@ -0,0 +1,68 @@
+import asyncio
+
+import httpx
+import pytest
+
+import server
+
+
+@pytest.fixture
+def endpoints(monkeypatch):
+    """Two stand-in Overpass endpoints, primary first; set a URL's delay or error, read the launch order"""
+    pool = server.OverpassPool(["https://primary.example", "https://secondary.example"])
+    behaviour = {"https://primary.example": 0.0, "https://secondary.example": 0.0}
+    launched = []
+
+    async def attempt(endpoint, overpass_query, timeout, max_elements, winner):
+        launched.append(endpoint.url)
+        outcome = behaviour[endpoint.url]
+        if isinstance(outcome, Exception):
+            raise outcome
+        await asyncio.sleep(outcome)
+        if winner.done():
+            return server.OverpassElements.failed()
+        winner.set_result(asyncio.current_task())
+        return server.OverpassElements([{"type": "node", "id": 1, "from": endpoint.url}])
+    monkeypatch.setattr(server, "overpass_pool", pool)
+    monkeypatch.setattr(server, "overpass_attempt", attempt)
+    monkeypatch.setattr(server, "OVERPASS_EXPLORE_RATE", 0.0)
+    monkeypatch.setattr(server, "OVERPASS_HEDGE_DEFAULT_DELAY", 0.05)
+    return pool, behaviour, launched
+
+
+def query():
+    [element] = asyncio.run(server.post_overpass_query("[out:json];"))
+    return element["from"]
+
+
+def test_fast_primary_sends_no_hedge(endpoints):
+    pool, _, launched = endpoints
+    assert query() == "https://primary.example"
+    assert launched == ["https://primary.example"]
+    assert pool.hedge_tokens == pytest.approx(1.0 + server.OVERPASS_HEDGE_BUDGET)
+
+
+def test_slow_primary_is_hedged_and_the_first_answer_wins(endpoints):
+    _, behaviour, launched = endpoints
+    behaviour["https://primary.example"] = 5.0
+    assert query() == "https://secondary.example"
+    assert launched == ["https://primary.example", "https://secondary.example"]
+
+
+def test_hedges_stop_when_the_budget_runs_out(endpoints):
+    pool, behaviour, launched = endpoints
+    behaviour["https://primary.example"] = 0.2
+    assert query() == "https://secondary.example"  # spends the one token the pool starts with
+    launched.clear()
+
+    assert query() == "https://primary.example"  # waits out the slow primary instead of hedging
+    assert launched == ["https://primary.example"]
+    assert pool.hedge_tokens == pytest.approx(2 * server.OVERPASS_HEDGE_BUDGET)
+
+
+def test_failed_primary_fails_over_without_spending_the_budget(endpoints):
+    pool, behaviour, launched = endpoints
+    pool.hedge_tokens = 0.0
+    behaviour["https://primary.example"] = httpx.ConnectError("refused")
+    assert query() == "https://secondary.example"
+    assert launched == ["https://primary.example", "https://secondary.example"]
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+import server
+
+ELEMENTS = [
+    {"type": "node", "id": 1, "lat": 48.85, "lon": 2.35, "tags": {"name": "Café Crème", "amenity": "cafe"}},
+    {"type": "way", "id": 2, "center": {"lat": 48.86, "lon": 2.34}, "tags": {"name": "Bäckerei ✓ [1]"}},
+    {"type": "node", "id": 3, "lat": 48.87, "lon": 2.33, "tags": {"name": "寿司 \"Tokyo\", {east}"}},
+]
+BODY = json.dumps({"version": 0.6, "osm3s": {"copyright": "elements: []"}, "elements": ELEMENTS},
+                  ensure_ascii=False, indent=1).encode()
+
+
+def parse(chunks):
+    parser = server.OverpassStreamParser()
+    elements = []
+    for chunk in chunks:
+        elements.extend(parser.feed(chunk))
+    return parser, elements
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(BODY)])
+def test_elements_split_across_chunks_are_parsed_once(size):
+    parser, elements = parse(BODY[i:i + size] for i in range(0, len(BODY), size))
+    assert elements == ELEMENTS
+    assert parser.finished
+
+
+def test_chunk_boundary_inside_a_multibyte_character():
+    split = BODY.index("✓".encode()) + 1
+    parser, elements = parse([BODY[:split], BODY[split:split + 1], BODY[split + 1:]])
+    assert elements == ELEMENTS
+    assert parser.finished
+
+
+def test_elements_are_returned_as_soon_as_they_are_complete():
+    parser = server.OverpassStreamParser()
+    cut = BODY.index(b'"way"')
+    assert parser.feed(BODY[:cut]) == ELEMENTS[:1]
+    assert parser.feed(BODY[cut:]) == ELEMENTS[1:]
+
+
+def test_truncated_response_is_not_finished():
+    parser, elements = parse([BODY[:BODY.index("寿司".encode())]])
+    assert elements == ELEMENTS[:2]
+    assert not parser.finished
+
+
+def test_empty_element_list():
+    parser, elements = parse([b'{"elements": [', b'  ]', b', "remark": "runtime error"}'])
+    assert elements == []
+    assert parser.finished
@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+ROUTES = ["/api/admin/profile?seconds=0.01", "/api/admin/profiles/p1"]
+
+
+@pytest.fixture
+def stored_profile(mongo):
+    mongo.request_profiles.insert_one({
+        "id": "p1", "method": "GET", "path": "/api/businesses", "created_at": datetime.now(),
+        "samples": 3, "seconds": 0.03, "counts": [["main;handler;find", 2], ["main;handler", 1]],
+    })
+
+
+@pytest.mark.parametrize("route", ROUTES)
+@pytest.mark.parametrize("token, headers, status", [
+    ("", {"Authorization": "Bearer s3cret"}, 404),
+    ("s3cret", {}, 401),
+    ("s3cret", {"Authorization": "Bearer wrong"}, 401),
+    ("s3cret", {"Authorization": "s3cret"}, 401),
+])
+def test_profiler_routes_require_admin(stored_profile, monkeypatch, route, token, headers, status):
+    monkeypatch.setattr(server, "ADMIN_TOKEN", token)
+    response = TestClient(server.app).get(route, headers=headers)
+    assert response.status_code == status
+    assert "stacks" not in response.text and "handler" not in response.text
+
+
+def test_stored_profile_is_served_to_the_admin(stored_profile, monkeypatch):
+    monkeypatch.setattr(server, "ADMIN_TOKEN", "s3cret")
+    client = TestClient(server.app)
+    headers = {"Authorization": "Bearer s3cret"}
+
+    response = client.get("/api/admin/profiles/p1", headers=headers)
+    assert response.status_code == 200
+    assert response.text.splitlines()[0] == "main;handler;find 2"
+    assert client.get("/api/admin/profiles/p2", headers=headers).status_code == 404
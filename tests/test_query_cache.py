@@ -0,0 +1,51 @@
+import server
+
+
+def make_key(business_type=None, limit=50):
+    return server.BusinessQueryCache.make_key(business_type, 0, None, limit)
+
+
+def fill(cache, *business_types):
+    for business_type in business_types:
+        key = make_key(business_type)
+        cache.put(key, cache.generation(business_type), [business_type])
+
+
+def test_write_drops_its_type_and_unfiltered_queries_only():
+    cache = server.BusinessQueryCache()
+    fill(cache, "restaurant", "legal", None)
+    cache.invalidate("restaurant")
+    assert cache.get(make_key("restaurant")) is None
+    assert cache.get(make_key(None)) is None
+    assert cache.get(make_key("legal")) == ["legal"]
+
+
+def test_result_computed_before_a_write_is_not_stored():
+    cache = server.BusinessQueryCache()
+    generation = cache.generation("legal")
+    cache.invalidate("legal")  # lands while the query runs
+    cache.put(make_key("legal"), generation, ["stale"])
+    assert cache.get(make_key("legal")) is None
+    fill(cache, "legal")
+    assert cache.get(make_key("legal")) == ["legal"]
+
+
+def test_full_invalidation_drops_every_type():
+    cache = server.BusinessQueryCache()
+    fill(cache, "restaurant", "legal", None)
+    cache.invalidate()
+    assert all(cache.get(make_key(t)) is None for t in ("restaurant", "legal", None))
+    assert cache.stats()["entries"] == 0
+
+
+def test_lead_changes_invalidate_the_touched_types(mongo, monkeypatch):
+    cache = server.BusinessQueryCache()
+    monkeypatch.setattr(server, "business_query_cache", cache)
+    monkeypatch.setattr(server, "lead_replica", None)
+    fill(cache, "restaurant", "legal")
+    changes = server.LeadChanges()
+    changes.publish([server.lead_event("lead_upserted", {"id": "lead-1", "name": "Cafe", "business_type": "restaurant"})])
+    assert cache.get(make_key("restaurant")) == ["restaurant"]  # nothing is invalidated off the loop
+    changes.apply()
+    assert cache.get(make_key("restaurant")) is None
+    assert cache.get(make_key("legal")) == ["legal"]
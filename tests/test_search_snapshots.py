@@ -0,0 +1,29 @@
+import asyncio
+import os
+
+import pytest
+
+import server
+
+
+def test_snapshots_are_opt_in():
+    if "SEARCH_SWR" in os.environ:
+        pytest.skip("SEARCH_SWR is set in the environment")
+    assert server.SEARCH_SWR_ENABLED is False
+
+
+def test_snapshot_hit_reuses_its_search_id_and_skips_swept_leads(mongo):
+    search = server.BusinessSearch(business_type="restaurant", location="Springfield", page_size=2)
+    key = server.search_snapshot_key(search)
+    server.save_search_snapshot(key, search, 40.0, -74.0, ["a", "b", "c"], {})
+    mongo.businesses.insert_many([{"id": "a", "name": "A"}, {"id": "c", "name": "C"}])  # "b" was swept
+    snapshot = mongo.search_snapshots.find_one({"key": key}, {"_id": 0})
+
+    result = asyncio.run(server.serve_search_snapshot(snapshot, search, revalidating=False))
+    assert [b["id"] for b in result["businesses"]] == ["a", "c"]
+    assert result["total"] == 2 and result["total_pages"] == 1
+    assert result["search_id"] == snapshot["search_id"]
+    assert mongo.search_results.count_documents({}) == 0  # a hit writes nothing
+
+    paged = asyncio.run(server.get_search_results(snapshot["search_id"], page=2, page_size=1))
+    assert [b["id"] for b in paged["businesses"]] == ["c"] and paged["total"] == 2
@@ -0,0 +1,83 @@
+import asyncio
+import math
+
+import pytest
+
+import server
+
+LAT, LON = 40.0, -74.0
+
+
+def offset(north_km, east_km):
+    """A point the given distances north and east of the search center"""
+    return LAT + north_km / 111.0, LON + east_km / (111.0 * math.cos(math.radians(LAT)))
+
+
+def side_km(tile):
+    south, west, north, east = tile
+    return (north - south) * 111.0, (east - west) * 111.0 * math.cos(math.radians(LAT))
+
+
+def test_tiles_cover_the_circle_and_skip_outside_corners():
+    tiles = server.tile_bboxes(LAT, LON, 40, 10)
+    assert len(tiles) == 8 * 8 - 4
+    for tile in tiles:
+        assert side_km(tile) == pytest.approx((10, 10), rel=0.01)
+    for north_km, east_km in [(0, 0), (39, 0), (0, -39), (27, 27), (-27, 27), (-5, 33)]:
+        lat, lon = offset(north_km, east_km)
+        assert any(s <= lat <= n and w <= lon <= e for s, w, n, e in tiles), (north_km, east_km)
+
+
+def test_small_radius_is_one_tile():
+    [tile] = server.tile_bboxes(LAT, LON, 3, 10)
+    assert side_km(tile) == pytest.approx((6, 6), rel=0.01)
+
+
+@pytest.fixture
+def tile_fetches(monkeypatch):
+    """Serve tiles from a fixed set of elements; returns the fetched bboxes and the elements"""
+    fetched = []
+    elements = {
+        "inside": {"type": "node", "id": 1, "lat": offset(5, 5)[0], "lon": offset(5, 5)[1]},
+        "edge": {"type": "node", "id": 2, "lat": offset(0, 24)[0], "lon": offset(0, 24)[1]},
+        # In a corner tile that touches the circle, but outside the circle itself
+        "clipped": {"type": "node", "id": 3, "lat": offset(22, 22)[0], "lon": offset(22, 22)[1]},
+    }
+    # A way is returned by every tile it crosses; its center decides whether it is kept
+    spanning_way = {"type": "way", "id": 4, "center": {"lat": LAT, "lon": LON}}
+    incomplete_tiles = []
+
+    async def fetch_tile(bbox, business_type, max_elements=None):
+        fetched.append(bbox)
+        south, west, north, east = bbox
+        found = server.OverpassElements(
+            e for e in elements.values() if south <= e["lat"] < north and west <= e["lon"] < east)
+        if south <= LAT <= north + 0.05 and west <= LON <= east + 0.05:
+            found.append(spanning_way)
+        found.complete = bbox not in incomplete_tiles
+        return found
+    monkeypatch.setattr(server, "fetch_overpass_tile", fetch_tile)
+    return fetched, incomplete_tiles
+
+
+def test_tiled_fetch_dedups_and_clips_to_the_circle(tile_fetches):
+    fetched, _ = tile_fetches
+    merged = asyncio.run(server.fetch_businesses_tiled(LAT, LON, 25, "restaurant"))
+
+    assert len(fetched) == len(server.tile_bboxes(LAT, LON, 25, server.SEARCH_TILE_KM))
+    assert sorted((e["type"], e["id"]) for e in merged) == [("node", 1), ("node", 2), ("way", 4)]
+    assert merged.complete
+
+
+def test_one_incomplete_tile_makes_the_result_incomplete(tile_fetches):
+    _, incomplete_tiles = tile_fetches
+    incomplete_tiles.append(server.tile_bboxes(LAT, LON, 25, server.SEARCH_TILE_KM)[0])
+    merged = asyncio.run(server.fetch_businesses_tiled(LAT, LON, 25, "restaurant"))
+    assert not merged.complete
+
+
+def test_very_large_radius_uses_bigger_tiles(tile_fetches):
+    fetched, _ = tile_fetches
+    asyncio.run(server.fetch_businesses_tiled(LAT, LON, 200, "restaurant"))
+    assert len(fetched) <= server.SEARCH_MAX_TILES_PER_SIDE ** 2
+    assert side_km(fetched[0]) == pytest.approx((50, 50), rel=0.01)